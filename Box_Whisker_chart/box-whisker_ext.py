@@ -1,8 +1,9 @@
-import xml.etree.ElementTree as ET
 import json
 import re
 import argparse
 import os
+from workbook_model import load_workbook
+from parse_cache import ParseCache, file_digest
 # Constants for scaling (adjust as needed)
 POWER_BI_WIDTH = 1280
 POWER_BI_HEIGHT = 720
@@ -30,74 +31,45 @@ def parse_column(raw):
     return raw.replace('[', '').replace(']', '')
 
 def extract_box_whisker_charts(twb_file):
-    tree = ET.parse(twb_file)
-    root = tree.getroot()
+    """Collects box-and-whisker metadata and positions from a .twb path or a loaded Workbook."""
+    workbook = load_workbook(twb_file)
     chart_metadata = []
     chart_positions = []
 
-    # Determine XML namespace
-    if "}" in root.tag:
-        ns_uri = root.tag.split("}")[0].strip("{")
-        ns = {"t": ns_uri}
-        prefix = "t:"
-    else:
-        ns = {}
-        prefix = ""
-
     worksheet_info = {}
-    for worksheet in root.findall(f".//{prefix}worksheet", ns):
-        sheet_name = worksheet.get('name', 'Unknown')
-        panes = worksheet.findall(f".//{prefix}pane", ns)
-
-        for pane in panes:
-            ref_line = pane.find(f"{prefix}reference-line", ns)
-            if ref_line is not None and ref_line.get('boxplot-whisker-type') is not None:
-                mark = pane.find(f"{prefix}mark", ns)
-                mark_type = mark.get('class') if mark is not None else None
-
-                encodings = pane.find(f"{prefix}encodings", ns)
-                color = text = size = detail = None
-
-                if encodings is not None:
-                    color_tag = encodings.find(f"{prefix}color", ns)
-                    text_tag = encodings.find(f"{prefix}text", ns)
-                    size_tag = encodings.find(f"{prefix}size", ns)
-                    detail_tag = encodings.find(f"{prefix}lod", ns)
-
-                    color = parse_column(color_tag.get('column')) if color_tag is not None else None
-                    text = parse_column(text_tag.get('column')) if text_tag is not None else None
-                    size = parse_column(size_tag.get('column')) if size_tag is not None else None
-                    detail = parse_column(detail_tag.get('column')) if detail_tag is not None else None
-
-                table = worksheet.find(f".//{prefix}table", ns)
-                rows = table.findtext(f"{prefix}rows", default="", namespaces=ns)
-                cols = table.findtext(f"{prefix}cols", default="", namespaces=ns)
+    for worksheet in workbook.worksheets.values():
+        sheet_name = worksheet.name or 'Unknown'
+
+        for pane in worksheet.panes:
+            if pane.boxplot_whisker_type is not None:
+                mark_type = pane.mark_class
+
+                encodings = pane.encodings or {}
+                color = parse_column(encodings.get("color"))
+                text = parse_column(encodings.get("text"))
+                size = parse_column(encodings.get("size"))
+                detail = parse_column(encodings.get("lod"))
 
                 worksheet_info[sheet_name] = {
                     "worksheet": sheet_name,
                     "chart_type": "Box-and-Whisker Chart",
                     "mark_type": mark_type,
-                    "X Axis": normalize_column(parse_column(cols)),
-                    "Y Axis": normalize_column(parse_column(rows)),
+                    "X Axis": normalize_column(parse_column(worksheet.cols)),
+                    "Y Axis": normalize_column(parse_column(worksheet.rows)),
                     "Color": normalize_column(color),
                     "Text": normalize_column(text),
                     "Size": normalize_column(size),
                     "Detail": normalize_column(detail)
                 }
 
-    for dashboard in root.findall(f".//{prefix}dashboard", ns):
-        dashboard_name = dashboard.get("name")
-        for zone in dashboard.findall(f".//{prefix}zone", ns):
-            sheet_name = zone.get("name")
+    for dashboard in workbook.dashboards.values():
+        for zone in dashboard.zones:
+            sheet_name = zone.name
             if sheet_name in worksheet_info:
-                x = int(zone.get("x", 0))
-                y = int(zone.get("y", 0))
-                w = int(zone.get("w", 0))
-                h = int(zone.get("h", 0))
-                scaled_x, scaled_y, scaled_w, scaled_h = scale_to_powerbi(x, y, w, h)
+                scaled_x, scaled_y, scaled_w, scaled_h = scale_to_powerbi(zone.x, zone.y, zone.w, zone.h)
 
                 chart_positions.append({
-                    "dashboard": dashboard_name,
+                    "dashboard": dashboard.name,
                     "worksheet": sheet_name,
                     "x": scaled_x,
                     "y": scaled_y,
@@ -140,7 +112,11 @@ def main():
 
     args = parser.parse_args()
 
-    metadata, positions = extract_box_whisker_charts(args.twb_file)
+    # Skip XML parsing entirely when this exact file was extracted before
+    cache = ParseCache()
+    metadata, positions = cache.get_or_compute(
+        file_digest(args.twb_file), "box_whisker",
+        lambda: list(extract_box_whisker_charts(args.twb_file)))
     metadata = merge_duplicate_charts(metadata)
     positions = deduplicate_positions(positions)
 
@@ -153,6 +129,7 @@ def main():
     with open(f"output/{args.positions_output}", "w") as f:
         json.dump(positions, f, indent=2)
     print(f"✅ Positions saved: {args.positions_output} ({len(positions)} items)")
+    cache.report()
 
 
 
@@ -1,9 +1,9 @@
 import os
 import json
-import pandas as pd
 import google.generativeai as genai
 import re
 import uuid
+from dataset_catalog import DatasetCatalog
 
 # === Configuration Paths ===
 BASE_DIR = r"C:\Users\ksaik\OneDrive\Desktop\Box_Whisker_chart"
@@ -43,34 +43,22 @@ def clean_dataset_name(raw_name):
 
 # === Load and Clean Datasets ===
 def load_all_datasets():
-    """Load and clean CSV datasets from CSV_OUTPUT_DIR."""
+    """Catalog the datasets in CSV_OUTPUT_DIR from their headers and a sample; rows load on demand."""
     if not os.path.exists(CSV_OUTPUT_DIR):
         print("❌ Dataset folder missing.")
         return {}, {}
 
-    csv_files = [f for f in os.listdir(CSV_OUTPUT_DIR) if f.endswith(".csv")]
-    if not csv_files:
+    dataset_map = DatasetCatalog(CSV_OUTPUT_DIR, clean_dataset_name)
+    for file, error in dataset_map.errors.items():
+        print(f"❌ Error reading {file}: {error}")
+    if not dataset_map:
         print("❌ No CSVs found.")
         return {}, {}
-
-    dataset_map = {}
-    dataset_column_map = {}
-
-    for file in csv_files:
-        dataset_name_raw = file.replace(".csv", "").strip()
-        dataset_name = clean_dataset_name(dataset_name_raw)
-        file_path = os.path.join(CSV_OUTPUT_DIR, file)
-        try:
-            df = pd.read_csv(file_path, encoding='utf-8-sig', on_bad_lines='skip')
-        except Exception:
-            df = pd.read_csv(file_path, encoding='latin1', on_bad_lines='skip')
-        dataset_map[dataset_name] = df
-        for col in df.columns:
-            dataset_column_map[col.strip().lower()] = dataset_name
+    dataset_column_map = dataset_map.column_index()
 
     print("\n📌 Datasets Loaded:")
-    for name, df in dataset_map.items():
-        print(f"📂 {name} ➜ {list(df.columns)}")
+    for name, dataset in dataset_map.items():
+        print(f"📂 {name} ➜ {dataset.columns}")
 
     return dataset_map, dataset_column_map
 
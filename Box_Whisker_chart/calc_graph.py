@@ -0,0 +1,210 @@
+import argparse
+import json
+import re
+from collections import deque
+from workbook_model import load_workbook
+
+# Field references inside a formula: [Field], [Datasource].[Field]; "]]" escapes a bracket
+FIELD_REFERENCE = re.compile(r'\[((?:[^\]]|\]\])+)\](?:\.\[((?:[^\]]|\]\])+)\])?')
+# String literals and // comments can contain brackets that are not references
+FORMULA_NOISE = re.compile(r'"(?:[^"]|"")*"|\'(?:[^\']|\'\')*\'|//[^\n]*')
+
+def formula_references(formula, datasource=None):
+    """Returns the fields referenced by a Tableau formula as (datasource, "[Field]") nodes, in order,
+    without duplicates.
+
+    A bare [Field] belongs to `datasource`, the one the formula is defined in; [DS].[Field]
+    names its datasource explicitly.
+    """
+    if not formula:
+        return []
+    references = []
+    seen = set()
+    for match in FIELD_REFERENCE.finditer(FORMULA_NOISE.sub(' ', formula)):
+        if match.group(2):
+            node = (match.group(1), f"[{match.group(2)}]")
+        else:
+            node = (datasource, f"[{match.group(1)}]")
+        if node not in seen:
+            seen.add(node)
+            references.append(node)
+    return references
+
+class CalculationGraph:
+    """DAG of calculated fields and the columns they read, plus a column -> worksheet index.
+
+    Nodes are (datasource, column name) pairs, the name as stored in the .twb (e.g.
+    ("federated.0a1b", "[Calculation_123]")), so same-named fields of two datasources stay
+    apart. Every query walks only the edges it needs, so it stays linear in the graph size.
+    """
+
+    def __init__(self):
+        self.formulas = {}      # calculation -> formula
+        self.captions = {}      # calculation -> caption
+        self.dependencies = {}  # calculation -> [fields it reads]
+        self.dependents = {}    # field -> {calculations reading it}
+        self.worksheets = {}    # field -> {worksheets using it directly}
+        self._caption_index = {}
+
+    @classmethod
+    def from_workbook(cls, twb_path):
+        """Builds the graph from a .twb path or a loaded Workbook."""
+        workbook = load_workbook(twb_path)
+        graph = cls()
+        for datasource in workbook.datasources.values():
+            for column in datasource.columns.values():
+                if column.is_calculated:
+                    graph.add_calculation((datasource.name, column.name), column.formula, column.caption)
+        for worksheet in workbook.worksheets.values():
+            for datasource_name, column_name in worksheet.dependencies:
+                if column_name:
+                    graph.add_usage((datasource_name, column_name), worksheet.name)
+        graph.resolve()
+        return graph
+
+    @classmethod
+    def from_calculations(cls, calculations_mapping, usage_mapping=()):
+        """Builds the graph from twbx_parser's calculations/usage output (tableau_extracted_data.json).
+
+        Nodes use each entry's internal 'datasource' name, which is what [DS].[Field] references spell.
+        """
+        graph = cls()
+        for name, calc in calculations_mapping.items():
+            if calc.get('formula') is not None:
+                graph.add_calculation((calc.get('datasource'), name), calc['formula'], calc.get('field_name'))
+        for usage in usage_mapping:
+            graph.add_usage((usage.get('datasource'), usage['calculation']), usage['worksheet'])
+        graph.resolve()
+        return graph
+
+    def add_calculation(self, node, formula, caption=None):
+        self.formulas[node] = formula
+        if caption:
+            self.captions[node] = caption
+            self._caption_index.setdefault((node[0], f"[{caption}]"), node)
+
+    def add_usage(self, node, worksheet_name):
+        self.worksheets.setdefault(node, set()).add(worksheet_name)
+
+    def nodes_named(self, field):
+        """Every node called `field` (by name or caption), one per datasource that has it."""
+        nodes = {node for node in list(self.formulas) + list(self.dependents) + list(self.worksheets)
+                 if node[1] == field}
+        nodes.update(node for (datasource, caption), node in self._caption_index.items() if caption == field)
+        return sorted(nodes, key=lambda node: (str(node[0]), node[1]))
+
+    def resolve(self):
+        """Parses every formula into edges; references by caption resolve to the calculation's name."""
+        self.dependencies = {}
+        self.dependents = {}
+        for node, formula in self.formulas.items():
+            deps = []
+            for reference in formula_references(formula, node[0]):
+                if reference not in self.formulas:
+                    reference = self._caption_index.get(reference, reference)
+                if reference != node and reference not in deps:
+                    deps.append(reference)
+            self.dependencies[node] = deps
+            for dep in deps:
+                self.dependents.setdefault(dep, set()).add(node)
+
+    def is_calculation(self, node):
+        return node in self.formulas
+
+    def base_columns(self, node):
+        """Non-calculated columns a calculation reads, directly or through other calculations."""
+        return sorted((field for field in self._closure([node], self.dependencies) if not self.is_calculation(field)),
+                      key=lambda field: (str(field[0]), field[1]))
+
+    def impacted_calculations(self, node):
+        """Every calculation that reads the field, directly or transitively."""
+        return sorted(self._closure([node], self.dependents) - {node}, key=lambda field: (str(field[0]), field[1]))
+
+    def impacted_worksheets(self, node):
+        """Worksheets that break if the field changes: its own users plus users of dependent calcs."""
+        impacted = set()
+        for dependent in self._closure([node], self.dependents):
+            impacted.update(self.worksheets.get(dependent, ()))
+        return sorted(impacted)
+
+    def partial_order(self):
+        """(ordered calculations, blocked calculations): those in a reference cycle or reading one
+        are blocked, every other calculation is ordered as in topological_order()."""
+        pending = {node: sum(1 for dep in deps if dep in self.formulas) for node, deps in self.dependencies.items()}
+        ready = deque(node for node, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            node = ready.popleft()
+            order.append(node)
+            for dependent in self.dependents.get(node, ()):
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    ready.append(dependent)
+        return order, sorted(node for node, count in pending.items() if count > 0)
+
+    def topological_order(self):
+        """Calculations ordered so each one comes after the calculations it reads."""
+        order, blocked = self.partial_order()
+        if blocked:
+            cyclic = sorted(f"{datasource}.{name}" for datasource, name in blocked)
+            raise ValueError(f"Circular calculation references: {', '.join(cyclic)}")
+        return order
+
+    def to_dict(self):
+        return {
+            'calculations': [
+                {
+                    'datasource': node[0],
+                    'name': node[1],
+                    'caption': self.captions.get(node),
+                    'formula': self.formulas[node],
+                    'depends_on': [list(dep) for dep in self.dependencies.get(node, [])]
+                }
+                for node in self.formulas
+            ],
+            'worksheets_by_field': [
+                {'datasource': node[0], 'name': node[1], 'worksheets': sorted(ws)}
+                for node, ws in self.worksheets.items()
+            ],
+            'translation_order': [list(node) for node in self.topological_order()]
+        }
+
+    @staticmethod
+    def _closure(start, edges):
+        seen = set(start)
+        queue = deque(start)
+        while queue:
+            for nxt in edges.get(queue.popleft(), ()):
+                if nxt not in seen:
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show calculated field dependencies of a Tableau TWB file.")
+    parser.add_argument("twb_path", help="Path to the Tableau TWB file")
+    parser.add_argument("--field", help="Field name (e.g. [Sales]) to report impacted calculations and worksheets for")
+    parser.add_argument("--datasource", help="Datasource name of --field; every datasource with the field by default")
+    parser.add_argument("--output", help="Write the full graph as JSON to this path")
+
+    args = parser.parse_args()
+    graph = CalculationGraph.from_workbook(args.twb_path)
+
+    if args.field:
+        field = args.field if args.field.startswith("[") else f"[{args.field}]"
+        nodes = [(args.datasource, field)] if args.datasource else graph.nodes_named(field)
+        if not nodes:
+            print(f"⚠ {field} is not used by any calculation or worksheet.")
+        for node in nodes:
+            label = f"{node[0]}.{field}"
+            print(f"🔗 Calculations depending on {label}: {graph.impacted_calculations(node)}")
+            print(f"📊 Worksheets impacted by {label}: {graph.impacted_worksheets(node)}")
+    else:
+        print("📐 Translation order:")
+        for node in graph.topological_order():
+            print(f" - {graph.captions.get(node, node[1])} ({node[0]}.{node[1]})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(graph.to_dict(), f, indent=2)
+        print(f"✅ Calculation graph saved to {args.output}")
@@ -0,0 +1,188 @@
+import codecs
+import gzip
+import os
+import pandas as pd
+from schema_files import data_file_root, is_data_file, read_schema_file
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for Parquet exports
+    pq = None
+
+# Schema-first view of the exported tables for the visual generators: each file is known by its
+# header, the types recorded at export and a small sample, so startup costs the same however big
+# the tables are. Column data is read only when a generator asks a dataset to load() it.
+
+SAMPLE_ROWS = 1000
+SNIFF_BYTES = 64 * 1024
+
+# pandas dtypes for the Hyper SQL types recorded in the schema files; unknown types stay object
+PANDAS_DTYPES = {
+    'BIG_INT': 'Int64',
+    'INT': 'Int64',
+    'SMALL_INT': 'Int64',
+    'DOUBLE': 'float64',
+    'NUMERIC': 'float64',
+    'BOOL': 'boolean',
+    'DATE': 'datetime64[ns]',
+    'TIMESTAMP': 'datetime64[ns]',
+    'TIMESTAMP_TZ': 'datetime64[ns, UTC]'
+}
+
+def sniff_encoding(path, prefix_bytes=SNIFF_BYTES):
+    """'utf-8-sig' when the first `prefix_bytes` of a CSV (decompressed for .gz) are UTF-8, else 'latin1'."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        prefix = f.read(prefix_bytes)
+    try:
+        # Incremental, so a character cut in half by the end of the prefix is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return 'latin1'
+    return 'utf-8-sig'
+
+class Dataset:
+    """One exported table, profiled from its header and first SAMPLE_ROWS rows.
+
+    `columns`, `dtypes` and `sample` are available at once; load() reads full columns on demand
+    and keeps them, so a column is read from disk at most once.
+
+    CSV text columns without a recorded type are typed numeric when any sampled value parses as
+    a number (they are listed in `numeric`), unless `keep_text(column name)` says they hold
+    identifiers or codes; values that do not parse become missing when the column is loaded.
+    """
+
+    def __init__(self, name, path, sample_rows=SAMPLE_ROWS, keep_text=None):
+        self.name = name
+        self.path = path
+        self.raw_name = os.path.basename(data_file_root(path))
+        schema = read_schema_file(path) or []
+        self.categorical = [column['name'] for column in schema if column.get('categorical')]
+        self.encoding = None
+        if path.endswith('.parquet'):
+            self.sample = self._parquet_sample(sample_rows)
+        else:
+            self.encoding = sniff_encoding(path)
+            self.sample = self._read_csv(nrows=sample_rows)
+        self.columns = list(self.sample.columns)
+        # Types recorded at export win over what the sample suggests
+        recorded = {column['name']: column for column in schema}
+        self.numeric = [] if path.endswith('.parquet') else self._coerce_numeric(
+            [name for name in self.columns if name not in recorded and name not in self.categorical], keep_text)
+        self.dtypes = pd.Series({
+            name: 'category' if name in self.categorical
+            else PANDAS_DTYPES.get(recorded[name]['type'].split('(')[0].strip().upper(), dtype)
+            if name in recorded else dtype
+            for name, dtype in self.sample.dtypes.items()
+        }, dtype=object)
+        self._loaded = {}
+
+    def _coerce_numeric(self, candidates, keep_text):
+        numeric = []
+        for column in candidates:
+            values = self.sample[column]
+            if not pd.api.types.is_object_dtype(values) and not pd.api.types.is_string_dtype(values):
+                continue
+            if keep_text and keep_text(column):
+                continue
+            converted = pd.to_numeric(values, errors='coerce')
+            if pd.api.types.is_numeric_dtype(converted) and not converted.isnull().all():
+                self.sample[column] = converted
+                numeric.append(column)
+        return numeric
+
+    def _parquet_sample(self, sample_rows):
+        parquet_file = pq.ParquetFile(self.path, read_dictionary=self.categorical or None)
+        batch = next(parquet_file.iter_batches(batch_size=sample_rows), None)
+        if batch is None:
+            return parquet_file.schema_arrow.empty_table().to_pandas()
+        return batch.to_pandas()
+
+    def _read_csv(self, **options):
+        dtype = {column: 'category' for column in self.categorical}
+        return pd.read_csv(self.path, encoding=self.encoding, on_bad_lines='skip', dtype=dtype, **options)
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def load(self, columns=None):
+        """DataFrame of the given columns (all by default), read in full and cast to `dtypes`."""
+        columns = list(self.columns if columns is None else columns)
+        missing = [column for column in columns if column not in self._loaded]
+        if missing:
+            if self.path.endswith('.parquet'):
+                frame = pd.read_parquet(self.path, columns=missing, read_dictionary=self.categorical or None)
+            else:
+                frame = self._read_csv(usecols=missing)
+            for column in missing:
+                self._loaded[column] = self._cast(frame[column], self.dtypes[column])
+        return pd.DataFrame({column: self._loaded[column] for column in columns})
+
+    @staticmethod
+    def _cast(values, dtype):
+        """Brings a fully read column to the profiled dtype; values that do not fit become missing."""
+        if str(values.dtype) == str(dtype):
+            return values
+        try:
+            if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype)):
+                numbers = pd.to_numeric(values, errors='coerce')
+                try:
+                    return numbers.astype(dtype)
+                except (TypeError, ValueError):
+                    # e.g. an integer-typed sample but fractions or gaps further down the file
+                    return numbers.astype('float64')
+            if str(dtype).startswith('datetime64'):
+                return pd.to_datetime(values, errors='coerce', utc='UTC' in str(dtype))
+            return values.astype(dtype)
+        except (TypeError, ValueError):
+            return values
+
+class DatasetCatalog:
+    """Exported tables in a folder by cleaned dataset name, read as Dataset profiles.
+
+    Behaves like a read-only dict of name -> Dataset, so generators can keep looking up
+    `dataset_map[name].columns`. `clean_name` maps a file name without extension onto the
+    dataset name; the first file claiming a name wins and the others are listed in
+    `duplicates`. Files that cannot be read are listed in `errors` instead of failing the run.
+    `keep_text` is passed on to every Dataset.
+    """
+
+    def __init__(self, folder, clean_name=None, sample_rows=SAMPLE_ROWS, keep_text=None):
+        self.folder = folder
+        self.datasets = {}
+        self.duplicates = []
+        self.errors = {}
+        for file in sorted(os.listdir(folder)):
+            if not is_data_file(file):
+                continue
+            raw_name = data_file_root(file).strip()
+            name = clean_name(raw_name) if clean_name else raw_name
+            if name in self.datasets:
+                self.duplicates.append((name, file))
+                continue
+            try:
+                self.datasets[name] = Dataset(name, os.path.join(folder, file), sample_rows, keep_text)
+            except Exception as e:
+                self.errors[file] = f"{type(e).__name__}: {e}"
+
+    def __getitem__(self, name):
+        return self.datasets[name]
+
+    def __contains__(self, name):
+        return name in self.datasets
+
+    def __iter__(self):
+        return iter(self.datasets)
+
+    def __len__(self):
+        return len(self.datasets)
+
+    def get(self, name, default=None):
+        return self.datasets.get(name, default)
+
+    def items(self):
+        return self.datasets.items()
+
+    def column_index(self):
+        """{lower-cased column name: dataset name}; a column in several datasets maps to the last."""
+        return {column.strip().lower(): name for name, dataset in self.datasets.items() for column in dataset.columns}
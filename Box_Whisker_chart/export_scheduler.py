@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from hyper_export import DEFAULT_MEMORY_BUDGET_MB, estimate_row_bytes
+
+# Exports many Hyper tables at once: every worker thread holds its own connection on the shared
+# HyperSession, the largest tables start first so the run is not left waiting on one straggler,
+# and the memory budget is split between the workers.
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+class ExportJob:
+    """One table to export: where it lives, where it goes, and how big it is estimated to be."""
+
+    def __init__(self, hyper_file, table, path, label=None):
+        self.hyper_file = hyper_file
+        self.table = table
+        self.path = path
+        self.label = label or str(table.name).replace('"', '')
+        self.rows = None
+        self.estimated_bytes = 0
+        # Run-manifest state, filled in when the export is planned incrementally
+        self.key = None
+        self.source_sha256 = None
+        self.schema = None
+        self.current = False
+        # hyper_export.TableSample for dev-mode runs that export only some rows
+        self.sample = None
+        # Low-cardinality text columns exported dictionary-encoded (pandas categoricals)
+        self.categorical_columns = []
+        # Calculated fields materialized during export: SQL expressions Hyper computes in the
+        # export query, then the rest as calc_engine.CalculatedColumns
+        self.expressions = []
+        self.calculations = None
+        self.calculation_fallbacks = {}
+        self.skipped_calculations = {}
+
+def estimate_job_sizes(jobs, session):
+    """Fills in each job's row count and estimated in-memory size with one connection per .hyper file."""
+    by_file = {}
+    for job in jobs:
+        by_file.setdefault(job.hyper_file, []).append(job)
+    for hyper_file, file_jobs in by_file.items():
+        with session.connect(hyper_file) as connection:
+            for job in file_jobs:
+                job.rows = connection.execute_scalar_query(f"SELECT COUNT(*) FROM {job.table}")
+                table_definition = connection.catalog.get_table_definition(job.table)
+                job.estimated_bytes = job.rows * estimate_row_bytes(table_definition)
+    return jobs
+
+def run_export_jobs(jobs, session, run_job, workers=DEFAULT_WORKERS, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Runs `run_job(connection, job, memory_budget_mb)` for every job on a bounded thread pool.
+
+    Jobs are ordered largest first. Each worker gets memory_budget_mb / workers for its chunk
+    buffers, so the run as a whole stays within the budget. Returns a run report with the
+    timings and stats of every table; a failing table is recorded without stopping the others.
+    """
+    workers = max(1, min(workers or DEFAULT_WORKERS, len(jobs) or 1))
+    worker_budget_mb = max(1, memory_budget_mb // workers)
+    estimate_job_sizes(jobs, session)
+    ordered = sorted(jobs, key=lambda job: job.estimated_bytes, reverse=True)
+
+    lock = threading.Lock()
+    records = []
+
+    def run_one(job):
+        record = {
+            'hyper_file': job.hyper_file,
+            'table': job.label,
+            'path': job.path,
+            'rows_estimated': job.rows,
+            'estimated_mb': round(job.estimated_bytes / 1024 / 1024, 1)
+        }
+        started = time.perf_counter()
+        try:
+            with session.connect(job.hyper_file) as connection:
+                stats = run_job(connection, job, worker_budget_mb)
+            record.update(stats)
+            record['status'] = 'success' if stats['rows'] else 'empty'
+        except Exception as e:
+            record.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+        record['seconds'] = round(time.perf_counter() - started, 3)
+        record['thread'] = threading.current_thread().name
+        with lock:
+            records.append(record)
+        return record
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hyper-export") as pool:
+        futures = [pool.submit(run_one, job) for job in ordered]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            icon = {"success": "✅", "empty": "⚠", "failed": "❌"}[record['status']]
+            print(f"{icon} [{done}/{len(ordered)}] {record['table']} ({record['seconds']}s)")
+
+    elapsed = time.perf_counter() - started
+    return {
+        'workers': workers,
+        'memory_budget_mb': memory_budget_mb,
+        'worker_budget_mb': worker_budget_mb,
+        'elapsed_seconds': round(elapsed, 3),
+        'table_seconds': round(sum(record['seconds'] for record in records), 3),
+        'succeeded': sum(1 for record in records if record['status'] == 'success'),
+        'failed': sum(1 for record in records if record['status'] == 'failed'),
+        'tables': sorted(records, key=lambda record: (-record['estimated_mb'], record['table']))
+    }
@@ -0,0 +1,574 @@
+import bisect
+import csv
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+import pandas as pd
+from tableauhyperapi import HyperException, Nullability, escape_name, escape_string_literal
+from schema_files import schema_path
+
+try:
+    import psutil
+except ImportError:  # psutil is optional; resource covers peak RSS on Unix
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the Parquet export path
+    pa = None
+    pq = None
+
+# Streams Hyper query results to disk in fixed-size row chunks, so memory stays bounded
+# by the chunk size instead of growing with the table.
+
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_MEMORY_BUDGET_MB = 256
+
+# Rough in-memory size of one Python value per Hyper type; text gets a typical short string
+VALUE_BYTES = {'TEXT': 80, 'VARCHAR': 80, 'CHAR': 80, 'JSON': 200, 'GEOGRAPHY': 200, 'BYTES': 200}
+DEFAULT_VALUE_BYTES = 40
+
+DEFAULT_PARQUET_COMPRESSION = 'zstd'
+
+# zlib's default level: most of the size reduction of level 9 at a fraction of its CPU time
+CSV_GZIP_LEVEL = 6
+COMPRESS_BLOCK_BYTES = 1024 * 1024
+
+# Text columns with at most this many distinct values per row are exported as categoricals
+CATEGORICAL_MAX_RATIO = 0.05
+TEXT_TYPES = ('TEXT', 'VARCHAR', 'CHAR')
+
+def column_names(table_definition):
+    return [str(col.name).replace('"', '') for col in table_definition.columns]
+
+def hyper_type_name(sql_type):
+    """Hyper SQL type without its modifiers, e.g. 'NUMERIC' for NUMERIC(18, 2)."""
+    return str(sql_type).split('(')[0].strip().upper()
+
+class ColumnDefinition:
+    """Name, SQL type and nullability of one result column, shaped like a TableDefinition column."""
+
+    def __init__(self, name, type, nullability=Nullability.NULLABLE):
+        self.name = name
+        self.type = type
+        self.nullability = nullability
+
+class QueryDefinition:
+    """Columns of a query result, usable wherever a TableDefinition is expected."""
+
+    def __init__(self, columns):
+        self.columns = columns
+
+def select_query(table, expressions=None):
+    """SELECT of every table column followed by `expressions`, a list of (column name, SQL)."""
+    select = ", ".join(["*"] + [f"{sql} AS {escape_name(name)}" for name, sql in expressions or []])
+    return f"SELECT {select} FROM {table}"
+
+def query_definition(connection, table, expressions=None):
+    """Table definition extended with the columns `expressions` add, typed as Hyper infers them."""
+    table_definition = connection.catalog.get_table_definition(table)
+    if not expressions:
+        return table_definition
+    with connection.execute_query(select_query(table, expressions) + " LIMIT 0") as result:
+        extra = list(result.schema.columns)[len(table_definition.columns):]
+    return QueryDefinition(list(table_definition.columns) + [
+        ColumnDefinition(col.name, col.type, getattr(col, 'nullability', Nullability.NULLABLE)) for col in extra
+    ])
+
+# Sampling rates a stratified sample picks from: 100%, then each step 2^(1/4) lower, so every
+# stratum gets at most ~19% more rows than its share while the query needs few branches
+STRATUM_RATE_STEP = 2 ** 0.25
+STRATUM_RATE_LEVELS = 96
+
+class TableSample:
+    """Deterministic row sample for quick dev-mode exports.
+
+    Takes about `rows` rows per table with TABLESAMPLE BERNOULLI ... REPEATABLE (`seed`), so the
+    same seed draws the same rows, and the same rows every time the query runs (there is no
+    LIMIT to pick among them). With `stratify` every value of that column gets about
+    rows / distinct values rows instead, each drawn at its own rate with the same seed, so rare
+    categories still show up.
+    """
+
+    def __init__(self, rows, seed=0, stratify=None):
+        self.rows = int(rows)
+        self.seed = int(seed)
+        self.stratify = stratify
+
+    def describe(self):
+        """JSON-friendly form recorded in the run manifest and schema files."""
+        return {'rows': self.rows, 'seed': self.seed, 'stratify': self.stratify}
+
+    def _sampled(self, table, percent, condition=None):
+        where = f" WHERE {condition}" if condition else ""
+        return (f"SELECT * FROM {table} AS \"sampled\" TABLESAMPLE BERNOULLI ({round(percent, 6)}) "
+                f"REPEATABLE ({self.seed}){where}")
+
+    def source(self, connection, table):
+        """FROM-clause source of the sampled rows; the table itself when it is small enough."""
+        total = connection.execute_scalar_query(f"SELECT COUNT(*) FROM {table}")
+        if total <= self.rows:
+            return str(table)
+        if not self.stratify:
+            return f"({self._sampled(table, 100.0 * self.rows / total)}) AS \"sample\""
+
+        stratum = escape_name(self.stratify)
+        with connection.execute_query(f"SELECT COUNT(*) FROM {table} GROUP BY {stratum}") as result:
+            sizes = [row[0] for row in result]
+        per_stratum = max(1, self.rows // max(1, len(sizes)))
+        # Level k samples at 100% / STEP^k, the lowest rate still giving a stratum of
+        # bounds[k-1] <= size < bounds[k] rows its share; Python and SQL use the same bounds
+        bounds = [float(f"{per_stratum * STRATUM_RATE_STEP ** k:.6f}") for k in range(1, STRATUM_RATE_LEVELS + 1)]
+        levels = sorted({bisect.bisect_right(bounds, size) for size in sizes})
+        counts = f"(SELECT {stratum} AS \"stratum\", COUNT(*) AS \"size\" FROM {table} GROUP BY {stratum})"
+        branches = []
+        for level in levels:
+            size_range = [f"\"counts\".\"size\" >= {bounds[level - 1]:.6f}"] if level else []
+            if level < STRATUM_RATE_LEVELS:
+                size_range.append(f"\"counts\".\"size\" < {bounds[level]:.6f}")
+            condition = (f"EXISTS (SELECT 1 FROM {counts} AS \"counts\" WHERE \"counts\".\"stratum\" "
+                         f"IS NOT DISTINCT FROM \"sampled\".{stratum} AND {' AND '.join(size_range)})")
+            branches.append(self._sampled(table, 100.0 / STRATUM_RATE_STEP ** level, condition))
+        return f"({' UNION ALL '.join(branches)}) AS \"sample\""
+
+def sample_source(connection, table, sample=None):
+    return sample.source(connection, table) if sample else str(table)
+
+def schema_fingerprint(table_definition):
+    """Short hash of the column names, types and nullability; changes whenever the schema does."""
+    columns = [f"{name}:{col.type}:{col.nullability}" for name, col in zip(column_names(table_definition), table_definition.columns)]
+    return hashlib.sha256("\n".join(columns).encode('utf-8')).hexdigest()[:16]
+
+def table_schema(table_definition, categorical=()):
+    """Column names, Hyper SQL types and nullability of a table, as stored in its schema file.
+
+    Columns in `categorical` are flagged so loaders read them as pandas categoricals.
+    """
+    return [
+        {
+            'name': name,
+            'type': str(col.type),
+            'nullable': col.nullability != Nullability.NOT_NULLABLE,
+            'categorical': name in categorical
+        }
+        for name, col in zip(column_names(table_definition), table_definition.columns)
+    ]
+
+def low_cardinality_columns(connection, table, max_ratio=CATEGORICAL_MAX_RATIO):
+    """Text columns whose distinct values per row, counted by Hyper in one scan, are at most `max_ratio`."""
+    table_definition = connection.catalog.get_table_definition(table)
+    text_columns = [
+        name for name, col in zip(column_names(table_definition), table_definition.columns)
+        if hyper_type_name(col.type) in TEXT_TYPES
+    ]
+    if not text_columns:
+        return []
+    counts = ", ".join(f"COUNT(DISTINCT {escape_name(name)})" for name in text_columns)
+    with connection.execute_query(f"SELECT COUNT(*), {counts} FROM {table}") as result:
+        rows, *distinct = next(iter(result))
+    if not rows:
+        return []
+    return [name for name, values in zip(text_columns, distinct) if values / rows <= max_ratio]
+
+def write_schema_file(data_path, table_definition, source=None, computed=None, sample=None, categorical=()):
+    """Writes the table's columns, followed by any `computed` columns (see computed_columns()).
+
+    A file holding only a TableSample of the table records it under 'sample'.
+    """
+    path = schema_path(data_path)
+    temp_path = path + ".partial"
+    columns = table_schema(table_definition, categorical) + list(computed or [])
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'table': source, 'file': os.path.basename(data_path), 'columns': columns,
+                   'sample': sample.describe() if sample else None}, f, indent=2)
+    os.replace(temp_path, path)
+    return path
+
+def estimate_row_bytes(table_definition):
+    """Approximate Python memory for one fetched row (tuple plus one object per value)."""
+    row_bytes = 56 + 8 * len(table_definition.columns)
+    for col in table_definition.columns:
+        type_name = str(col.type).split('(')[0]
+        row_bytes += VALUE_BYTES.get(type_name, DEFAULT_VALUE_BYTES)
+    return row_bytes
+
+def chunk_rows_for_budget(table_definition, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB):
+    """Largest chunk that keeps the buffered rows within the memory budget."""
+    budget_rows = int(memory_budget_mb * 1024 * 1024 // estimate_row_bytes(table_definition))
+    return max(1000, budget_rows)
+
+def iter_row_chunks(result, chunk_rows):
+    """Yields lists of up to `chunk_rows` rows from a Hyper result."""
+    chunk = []
+    for row in result:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None when it cannot be measured."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return round(peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024, 1)
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / 1024 / 1024, 1)
+    return None
+
+def rows_to_frame(chunk, table_definition):
+    """DataFrame of one chunk with pandas dtypes that follow the Hyper column types.
+
+    Dates and timestamps become datetimes, NUMERIC (Decimal objects) and DOUBLE become float64
+    and integers numeric, so every chunk of a column has the same kind of dtype, even one
+    holding only nulls.
+    """
+    frame = pd.DataFrame(chunk, columns=column_names(table_definition))
+    for name, col in zip(frame.columns, table_definition.columns):
+        type_name = hyper_type_name(col.type)
+        if type_name in ('DATE', 'TIMESTAMP', 'TIMESTAMP_TZ'):
+            frame[name] = pd.to_datetime(frame[name].map(to_python), errors='coerce')
+        elif type_name in ('NUMERIC', 'DOUBLE'):
+            frame[name] = pd.to_numeric(frame[name], errors='coerce').astype('float64')
+        elif type_name in ('BIG_INT', 'INT', 'SMALL_INT'):
+            frame[name] = pd.to_numeric(frame[name], errors='coerce')
+    return frame
+
+def frame_rows(frame):
+    """Row tuples of a DataFrame with every missing value (NaN, NaT, <NA>) as None."""
+    values = frame.astype(object)
+    return values.where(frame.notna(), None).itertuples(index=False, name=None)
+
+def hyper_type_for_dtype(dtype):
+    """Hyper SQL type name recorded in schema files for a computed pandas column."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'BOOL'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'BIG_INT'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'DOUBLE'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'TIMESTAMP'
+    return 'TEXT'
+
+def computed_columns(frame):
+    return [{'name': str(name), 'type': hyper_type_for_dtype(dtype), 'nullable': True} for name, dtype in frame.dtypes.items()]
+
+def open_csv_output(csv_path, partial_path):
+    """Text stream writing `partial_path`; for a .csv.gz destination it is gzip-compressed as it is written."""
+    if csv_path.endswith('.gz'):
+        return gzip.open(partial_path, 'wt', compresslevel=CSV_GZIP_LEVEL, newline='', encoding='utf-8')
+    return open(partial_path, 'w', newline='', encoding='utf-8')
+
+def gzip_file(source_path, gzip_path):
+    """Compresses a file block by block, so it is never held in memory."""
+    with open(source_path, 'rb') as source, gzip.open(gzip_path, 'wb', compresslevel=CSV_GZIP_LEVEL) as target:
+        shutil.copyfileobj(source, target, COMPRESS_BLOCK_BYTES)
+
+def export_table_to_csv(connection, table, csv_path, chunk_rows=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                        transform=None, expressions=None, sample=None):
+    """Streams one Hyper table into a CSV file chunk by chunk; a .csv.gz path is gzip-compressed.
+
+    The file is written next to its destination and renamed once complete; an empty table
+    leaves no file behind. Returns a stats dict with rows, seconds, rows_per_sec and peak_rss_mb.
+
+    `transform` (e.g. calc_engine.CalculatedColumns) receives each chunk as a DataFrame and returns
+    extra columns, appended after the table's own; its `names` give their headers. The stats then
+    list those columns with their inferred types under 'computed_columns'. `expressions`
+    ([(column name, SQL)]) are computed by Hyper in the query itself and precede them. With a
+    TableSample only the sampled rows are exported.
+    """
+    table_definition = query_definition(connection, table, expressions)
+    chunk_rows = chunk_rows or chunk_rows_for_budget(table_definition, memory_budget_mb)
+    partial_path = csv_path + ".partial"
+    started = time.perf_counter()
+    rows = 0
+    extra_columns = None
+    try:
+        with open_csv_output(csv_path, partial_path) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(column_names(table_definition) + (list(transform.names) if transform else []))
+            with connection.execute_query(select_query(sample_source(connection, table, sample), expressions)) as result:
+                for chunk in iter_row_chunks(result, chunk_rows):
+                    if transform:
+                        # Table values are written as Hyper returned them; only computed columns go through pandas
+                        extra = transform(rows_to_frame(chunk, table_definition))
+                        extra_columns = extra_columns or computed_columns(extra)
+                        writer.writerows(list(row) + list(values) for row, values in zip(chunk, frame_rows(extra)))
+                    else:
+                        writer.writerows(chunk)
+                    rows += len(chunk)
+        if rows:
+            os.replace(partial_path, csv_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'rows': rows,
+        'chunk_rows': chunk_rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    if extra_columns:
+        stats['computed_columns'] = extra_columns
+    return stats
+
+def arrow_type(sql_type):
+    """Maps a Hyper SQL type onto the Arrow type it is stored as in Parquet; unknown types become text."""
+    type_name = hyper_type_name(sql_type)
+    if type_name in ('BIG_INT', 'BIGINT'):
+        return pa.int64()
+    if type_name in ('INT', 'INTEGER'):
+        return pa.int32()
+    if type_name in ('SMALL_INT', 'SMALLINT'):
+        return pa.int16()
+    if type_name in ('DOUBLE', 'DOUBLE PRECISION', 'FLOAT', 'REAL'):
+        return pa.float64()
+    if type_name == 'NUMERIC':
+        precision = getattr(sql_type, 'precision', None) or 18
+        scale = getattr(sql_type, 'scale', None) or 0
+        return pa.decimal128(precision, scale)
+    if type_name in ('BOOL', 'BOOLEAN'):
+        return pa.bool_()
+    if type_name == 'DATE':
+        return pa.date32()
+    if type_name == 'TIMESTAMP':
+        return pa.timestamp('us')
+    if type_name == 'TIMESTAMP_TZ':
+        return pa.timestamp('us', tz='UTC')
+    if type_name == 'BYTES':
+        return pa.binary()
+    return pa.string()
+
+def arrow_schema(table_definition, dictionary_columns=()):
+    """Arrow schema of a table; `dictionary_columns` are stored dictionary-encoded (pandas categoricals)."""
+    return pa.schema([
+        pa.field(name, pa.dictionary(pa.int32(), pa.string()) if name in dictionary_columns else arrow_type(col.type),
+                 nullable=col.nullability != Nullability.NOT_NULLABLE)
+        for name, col in zip(column_names(table_definition), table_definition.columns)
+    ])
+
+def to_python(value):
+    # Hyper returns its own Date/Timestamp/Interval classes; Arrow needs the datetime equivalents
+    if value is None:
+        return None
+    for converter in ('to_datetime', 'to_date'):
+        convert = getattr(value, converter, None)
+        if convert is not None:
+            return convert()
+    return value
+
+def _needs_conversion(arrow_field):
+    return pa.types.is_date(arrow_field.type) or pa.types.is_timestamp(arrow_field.type)
+
+def rows_to_record_batch(chunk, schema):
+    """Turns a list of Hyper rows into an Arrow record batch with the given schema."""
+    columns = list(zip(*chunk))
+    arrays = []
+    for values, field in zip(columns, schema):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=field.type.value_type).dictionary_encode())
+            continue
+        if _needs_conversion(field):
+            values = [to_python(value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def computed_arrow_schema(extra_table):
+    # A column that is all null in the first chunk has no type yet; text accepts anything later
+    return pa.schema([
+        pa.field(field.name, pa.string() if pa.types.is_null(field.type) else field.type)
+        for field in extra_table.schema
+    ])
+
+def export_table_to_parquet(connection, table, parquet_path, chunk_rows=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                            compression=DEFAULT_PARQUET_COMPRESSION, transform=None, expressions=None, sample=None,
+                            dictionary_columns=None):
+    """Streams one Hyper table into a compressed Parquet file, one row group per chunk.
+
+    Column types come from the Hyper table definition instead of being inferred from the values,
+    so integers, decimals, dates and timestamps arrive typed in pandas and Power BI. Columns
+    added by `transform` (see export_table_to_csv) take their types from the first chunk, those
+    from `expressions` the types Hyper gives them. Text columns in `dictionary_columns` are
+    dictionary-encoded, so each distinct string is stored once per row group and pandas reads
+    them back as categoricals. Returns the same stats dict as export_table_to_csv.
+    """
+    if pq is None:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+
+    table_definition = query_definition(connection, table, expressions)
+    schema = arrow_schema(table_definition, dictionary_columns or ())
+    chunk_rows = chunk_rows or chunk_rows_for_budget(table_definition, memory_budget_mb)
+    partial_path = parquet_path + ".partial"
+    started = time.perf_counter()
+    rows = 0
+    writer = None
+    extra_schema = None
+    extra_columns = None
+    try:
+        with connection.execute_query(select_query(sample_source(connection, table, sample), expressions)) as result:
+            for chunk in iter_row_chunks(result, chunk_rows):
+                chunk_table = pa.Table.from_batches([rows_to_record_batch(chunk, schema)])
+                if transform:
+                    extra = transform(rows_to_frame(chunk, table_definition))
+                    extra_columns = extra_columns or computed_columns(extra)
+                    extra_table = pa.Table.from_pandas(extra, preserve_index=False)
+                    extra_schema = extra_schema or computed_arrow_schema(extra_table)
+                    extra_table = extra_table.cast(extra_schema, safe=False)
+                    for field, column in zip(extra_schema, extra_table.columns):
+                        chunk_table = chunk_table.append_column(field, column)
+                if writer is None:
+                    writer = pq.ParquetWriter(partial_path, chunk_table.schema, compression=compression)
+                writer.write_table(chunk_table, row_group_size=chunk_rows)
+                rows += len(chunk)
+        if writer is not None:
+            writer.close()
+            writer = None
+        if rows:
+            os.replace(partial_path, parquet_path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'rows': rows,
+        'chunk_rows': chunk_rows,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds) if seconds else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+    if extra_columns:
+        stats['computed_columns'] = extra_columns
+    return stats
+
+# Formats Hyper can write itself with COPY ... TO, and the options each needs
+COPY_OPTIONS = {
+    'csv': "FORMAT csv, HEADER true",
+    'csv.gz': "FORMAT csv, HEADER true",
+    'parquet': "FORMAT parquet"
+}
+
+# Formats Hyper copies uncompressed and Python then gzips
+GZIP_FORMATS = ('csv.gz',)
+
+PYTHON_WRITERS = {
+    'csv': export_table_to_csv,
+    'csv.gz': export_table_to_csv,
+    'parquet': export_table_to_parquet
+}
+
+EXPORT_ENGINES = ('auto', 'copy', 'python')
+
+# Formats this Hyper version cannot COPY to; later tables go straight to the Python path
+_copy_unsupported = set()
+
+# Error text meaning COPY ... TO or the format itself is missing from this Hyper version, as
+# opposed to a failure of one table's COPY (disk full, bad path, a rejected expression)
+COPY_UNSUPPORTED_MARKERS = ('not supported', 'unsupported', 'syntax error', 'unrecognized', 'unknown format',
+                            'unknown option', 'requires a newer')
+
+def copy_unsupported(error):
+    message = str(error).lower()
+    return any(marker in message for marker in COPY_UNSUPPORTED_MARKERS)
+
+def copy_table_to_file(connection, table, path, file_format, expressions=None, sample=None):
+    """Has Hyper write one table to `path` with COPY ... TO, so no rows pass through Python.
+
+    hyperd resolves the path itself, so it is made absolute first. Like the Python writers, the
+    file is renamed into place once complete and an empty table leaves no file behind. With
+    `expressions` or a `sample` the table's SELECT, computed columns included, is copied instead.
+
+    For GZIP_FORMATS Hyper writes the plain CSV to local temp space, which is then compressed
+    into place, so only the compressed bytes reach the (possibly networked) output folder.
+    """
+    partial_path = os.path.abspath(path + ".partial")
+    compress = file_format in GZIP_FORMATS
+    copy_path = os.path.join(tempfile.gettempdir(), f"hyper-copy-{uuid.uuid4().hex}.csv") if compress else partial_path
+    if expressions or sample:
+        source = f"({select_query(sample_source(connection, table, sample), expressions)})"
+    else:
+        source = str(table)
+    started = time.perf_counter()
+    try:
+        rows = connection.execute_command(
+            f"COPY {source} TO {escape_string_literal(copy_path)} WITH ({COPY_OPTIONS[file_format]})")
+        if rows:
+            if compress:
+                gzip_file(copy_path, partial_path)
+            os.replace(partial_path, path)
+    finally:
+        for leftover in {copy_path, partial_path}:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    seconds = time.perf_counter() - started
+    return {
+        'rows': rows or 0,
+        'chunk_rows': None,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round((rows or 0) / seconds) if seconds else None,
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+def export_table(connection, table, path, file_format='csv', chunk_rows=None,
+                 memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, engine='auto', transform=None, expressions=None,
+                 sample=None, dictionary_columns=None):
+    """Exports one Hyper table as `file_format`, choosing between COPY and the Python writers.
+
+    engine='auto' tries COPY first and falls back to streaming through Python when this Hyper
+    version cannot COPY to the format; 'copy' and 'python' force one path. A `transform` adds
+    computed columns, which only the Python path can do; SQL `expressions` and a TableSample
+    work on both. Parquet `dictionary_columns` are written dictionary-encoded by the Python
+    writer, which 'auto' then prefers over COPY. The stats dict gains an 'engine' entry naming
+    the path that produced the file.
+    """
+    if engine not in EXPORT_ENGINES:
+        raise ValueError(f"Unknown export engine '{engine}', expected one of {EXPORT_ENGINES}")
+    if transform and engine == 'copy':
+        raise ValueError("Computed columns need the Python export path, not engine='copy'")
+
+    dictionary_columns = dictionary_columns if file_format == 'parquet' else None
+    if engine == 'auto' and dictionary_columns:
+        engine = 'python'
+
+    if engine != 'python' and not transform and file_format not in _copy_unsupported:
+        try:
+            stats = copy_table_to_file(connection, table, path, file_format, expressions, sample)
+            stats['engine'] = 'copy'
+            return stats
+        except HyperException as e:
+            if engine == 'copy':
+                raise
+            if copy_unsupported(e):
+                _copy_unsupported.add(file_format)
+                print(f"⚠ Hyper cannot COPY to {file_format} ({str(e).splitlines()[0]}); using the Python export path.")
+            else:
+                print(f"⚠ COPY of {table} failed ({str(e).splitlines()[0]}); exporting this table through Python.")
+
+    # Only the Parquet writer has dictionary-encoded columns
+    options = {'dictionary_columns': dictionary_columns} if dictionary_columns else {}
+    stats = PYTHON_WRITERS[file_format](connection, table, path, chunk_rows, memory_budget_mb, transform=transform,
+                                        expressions=expressions, sample=sample, **options)
+    stats['engine'] = 'python'
+    return stats
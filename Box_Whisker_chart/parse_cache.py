@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+
+# Bump whenever an extractor's output changes so stale entries stop matching
+PARSER_VERSION = "3"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output", ".parse_cache")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def file_digest(source, chunk_size=1024 * 1024):
+    """SHA-256 of a .twb given as a path or a binary stream (e.g. a TwbxArchive member)."""
+    sha = hashlib.sha256()
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha.update(chunk)
+    else:
+        with source:
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                sha.update(chunk)
+    return sha.hexdigest()
+
+class ParseCache:
+    """On-disk JSON cache of parse results keyed by workbook content and parser version.
+
+    Entries are evicted least-recently-used first once the folder grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, version=PARSER_VERSION):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_path(self, digest, kind):
+        key = hashlib.sha256(f"{self.version}:{kind}:{digest}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, digest, kind):
+        """Returns the cached value or None, counting the hit or miss."""
+        path = self._entry_path(digest, kind)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, digest, kind, value):
+        path = self._entry_path(digest, kind)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def get_or_compute(self, digest, kind, compute):
+        value = self.get(digest, kind)
+        if value is None:
+            value = compute()
+            self.put(digest, kind, value)
+        return value
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries)
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"🗄️ Parse cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries ({stats['bytes'] / 1024:.0f} KB)")
@@ -0,0 +1,114 @@
+import json
+import os
+import time
+from parse_cache import file_digest
+
+# Remembers what the last dataset_automate runs exported, so a re-run only redoes the tables
+# whose source .hyper or schema changed and rewrites them under the same file name.
+
+MANIFEST_VERSION = 1
+
+def table_key(hyper_file, table):
+    return f"{os.path.abspath(hyper_file)}::{str(table.name).replace(chr(34), '')}"
+
+class RunManifest:
+    """JSON record of source .hyper files and the tables exported from them.
+
+    sources: abs .hyper path -> {size, mtime_ns, sha256}
+    tables:  "<abs .hyper path>::<table>" -> {source_sha256, schema, output_format, path, rows, sample, exported_at}
+
+    `sample` is None for a full export, or TableSample.describe() of the rows a dev-mode run exported.
+    """
+
+    def __init__(self, path, data=None):
+        self.path = path
+        data = data or {}
+        self.sources = data.get('sources', {})
+        self.tables = data.get('tables', {})
+        self.excel = data.get('excel')
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Reads the manifest at `path`; a missing, unreadable or older-version file starts empty."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls(path)
+        if data.get('version') != MANIFEST_VERSION:
+            return cls(path)
+        return cls(path, data)
+
+    def source_digest(self, hyper_file):
+        """SHA-256 of a .hyper file, only re-hashed when its size or mtime changed."""
+        hyper_file = os.path.abspath(hyper_file)
+        stat = os.stat(hyper_file)
+        recorded = self.sources.get(hyper_file)
+        if recorded and recorded['size'] == stat.st_size and recorded['mtime_ns'] == stat.st_mtime_ns:
+            return recorded['sha256']
+        digest = file_digest(hyper_file)
+        self.sources[hyper_file] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        self.dirty = True
+        return digest
+
+    def output_path(self, key, output_format):
+        """Path a table was last exported to in this format, so a re-export overwrites it."""
+        entry = self.tables.get(key)
+        if entry and entry['output_format'] == output_format:
+            return entry['path']
+        return None
+
+    def is_current(self, key, source_sha256, schema, output_format, sample=None):
+        """True when the table was exported from the same source and schema and its file still exists.
+
+        A sampled export only stands in for the same sample, so a full run always replaces it;
+        a full export serves any sampled run.
+        """
+        entry = self.tables.get(key)
+        recorded_sample = entry.get('sample') if entry else None
+        return bool(entry
+                    and entry['source_sha256'] == source_sha256
+                    and entry['schema'] == schema
+                    and entry['output_format'] == output_format
+                    and (recorded_sample is None or recorded_sample == sample)
+                    and os.path.exists(entry['path']))
+
+    def record(self, key, source_sha256, schema, output_format, path, rows, sample=None):
+        self.tables[key] = {
+            'source_sha256': source_sha256,
+            'schema': schema,
+            'output_format': output_format,
+            'path': path,
+            'rows': rows,
+            'sample': sample,
+            'exported_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self.dirty = True
+
+    def forget(self, key):
+        if self.tables.pop(key, None) is not None:
+            self.dirty = True
+
+    def record_excel(self, path, table_states, table_sheets):
+        """Remembers which table versions the combined workbook was built from, and the sheets
+        of each table as {exported file: [sheets]}."""
+        self.excel = {'path': path, 'tables': table_states, 'table_sheets': table_sheets}
+        self.dirty = True
+
+    def excel_table_sheets(self, path, table_states):
+        """{exported file: [sheets]} of the combined workbook if it was built from exactly these table versions."""
+        if (self.excel and self.excel['path'] == path and self.excel['tables'] == table_states
+                and 'table_sheets' in self.excel and os.path.exists(path)):
+            return self.excel['table_sheets']
+        return None
+
+    def save(self):
+        if not self.dirty:
+            return
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'sources': self.sources, 'tables': self.tables, 'excel': self.excel},
+                      f, indent=2)
+        os.replace(temp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,102 @@
+import os
+import shutil
+import time
+import zipfile
+
+class TwbxArchive:
+    """Reads a packaged workbook (.twbx) in place instead of extracting everything up front.
+
+    The .twb member is streamed straight from the zip; .hyper and other members are
+    only written to `extract_dir` when a stage asks for them via materialize().
+    """
+
+    def __init__(self, twbx_file_path, extract_dir):
+        self.path = twbx_file_path
+        self.extract_dir = extract_dir
+        self._zip = zipfile.ZipFile(twbx_file_path, 'r')
+        self._infos = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+        self._materialized = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    @property
+    def twb_name(self):
+        """Name of the .twb member, preferring the one at the archive root."""
+        twb_members = [name for name in self._infos if name.endswith('.twb')]
+        if not twb_members:
+            return None
+        return min(twb_members, key=lambda name: (name.count('/'), name))
+
+    def members(self, *extensions):
+        """Lists member names, optionally filtered by file extension."""
+        return [name for name in self._infos if not extensions or name.endswith(extensions)]
+
+    def member_size(self, member):
+        return self._infos[member].file_size
+
+    def member_crc(self, member):
+        return self._infos[member].CRC
+
+    def open(self, member):
+        """Opens a member as a binary stream without touching the disk."""
+        return self._zip.open(member)
+
+    def open_twb(self):
+        twb_name = self.twb_name
+        if not twb_name:
+            raise ValueError(f"No .twb file found in {self.path}")
+        return self.open(twb_name)
+
+    def hyper_members(self):
+        """Maps each .hyper file name to its archive member, like find_hyper_files does on disk."""
+        return {os.path.basename(name): name for name in self.members('.hyper')}
+
+    def target_path(self, member):
+        """Path `member` is written to under extract_dir.
+
+        Like ZipFile.extractall, members that are absolute, carry a drive letter or climb out of
+        extract_dir with '..' are refused, so a crafted archive cannot write anywhere else.
+        """
+        parts = member.replace('\\', '/').split('/')
+        if member.startswith(('/', '\\')) or os.path.splitdrive(member)[0] or ':' in parts[0]:
+            raise ValueError(f"Refusing to extract {member!r} from {self.path}: absolute path")
+        extract_root = os.path.realpath(self.extract_dir)
+        target_path = os.path.realpath(os.path.join(extract_root, *parts))
+        if os.path.commonpath([extract_root, target_path]) != extract_root:
+            raise ValueError(f"Refusing to extract {member!r} from {self.path}: outside {self.extract_dir}")
+        return target_path
+
+    def materialize(self, member):
+        """Writes a single member to extract_dir and returns its path.
+
+        A file already on disk with the member's size and timestamp is reused, so the
+        table listing and export stages (and re-runs) only pay for the copy once. Raises
+        ValueError for a member whose path would leave extract_dir (see target_path()).
+        """
+        if member in self._materialized:
+            return self._materialized[member]
+
+        info = self._infos[member]
+        target_path = self.target_path(member)
+        member_mtime = time.mktime(info.date_time + (0, 0, -1))
+
+        if not (os.path.isfile(target_path)
+                and os.path.getsize(target_path) == info.file_size
+                and int(os.path.getmtime(target_path)) == int(member_mtime)):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            temp_path = target_path + '.partial'
+            with self._zip.open(info) as source, open(temp_path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            os.utime(temp_path, (member_mtime, member_mtime))
+            os.replace(temp_path, target_path)
+            print(f"✅ Extracted {member} to {target_path}")
+
+        self._materialized[member] = target_path
+        return target_path
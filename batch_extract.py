@@ -0,0 +1,128 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from twbx_parser import extract_tableau_workbook, save_to_output_folder
+from parse_cache import ParseCache
+
+TABLEAU_EXTENSIONS = ('.twbx', '.twb')
+
+def find_workbooks(source):
+    """Resolves a directory, glob pattern or single file into a sorted list of Tableau workbooks."""
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for file in files:
+                if file.endswith(TABLEAU_EXTENSIONS):
+                    paths.append(os.path.join(root, file))
+    elif os.path.isfile(source):
+        paths = [source]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if path.endswith(TABLEAU_EXTENSIONS))
+
+def workbook_output_dirs(workbook_paths, output_root):
+    """Gives every workbook its own output folder, named after the file and unique within the run."""
+    output_dirs = {}
+    used = set()
+    for path in workbook_paths:
+        base_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.splitext(os.path.basename(path))[0]).strip('_') or 'workbook'
+        folder = base_name
+        counter = 1
+        while folder.lower() in used:
+            folder = f"{base_name}_{counter}"
+            counter += 1
+        used.add(folder.lower())
+        output_dirs[path] = os.path.join(output_root, folder)
+    return output_dirs
+
+def extract_one_workbook(file_path, output_dir, streaming=False, use_cache=True):
+    """Worker entry point: extracts one workbook and returns its manifest record."""
+    started = time.perf_counter()
+    record = {'workbook': file_path, 'output_dir': output_dir}
+    try:
+        cache = ParseCache() if use_cache else None
+        extracted = extract_tableau_workbook(file_path, output_dir, streaming=streaming, cache=cache)
+        record['cache_hit'] = bool(cache and cache.hits)
+        visuals = extracted['visuals']
+        record.update({
+            'status': 'success',
+            'counts': {
+                'calculations': len(extracted['calculations']),
+                'usage': len(extracted['usage']),
+                'references': len(extracted['references']),
+                'worksheets': sum(1 for v in visuals if v['Type'] == 'Worksheet'),
+                'dashboards': sum(1 for v in visuals if v['Type'] == 'Dashboard'),
+                'hyper_files': len(extracted['hyper_files']),
+                'csv_files': len(extracted['csv_files'])
+            }
+        })
+    except Exception as e:
+        record.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+    record['seconds'] = round(time.perf_counter() - started, 3)
+    return record
+
+def run_batch(source, output_root, workers=None, streaming=False, use_cache=True):
+    """Extracts every workbook matched by `source` in parallel and writes batch_manifest.json."""
+    workbook_paths = find_workbooks(source)
+    if not workbook_paths:
+        print(f"❌ No .twb/.twbx files found for {source}")
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    output_dirs = workbook_output_dirs(workbook_paths, output_root)
+    print(f"🔹 Extracting {len(workbook_paths)} workbooks with {workers} workers...")
+
+    started = time.perf_counter()
+    records = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(extract_one_workbook, path, output_dirs[path], streaming, use_cache): path
+            for path in workbook_paths
+        }
+        for future in as_completed(futures):
+            record = future.result()
+            records.append(record)
+            icon = "✅" if record['status'] == 'success' else "❌"
+            print(f"{icon} [{len(records)}/{len(workbook_paths)}] {record['workbook']} ({record['seconds']}s)")
+
+    records.sort(key=lambda record: record['workbook'])
+    elapsed = time.perf_counter() - started
+    succeeded = sum(1 for record in records if record['status'] == 'success')
+    totals = {}
+    for record in records:
+        for key, value in record.get('counts', {}).items():
+            totals[key] = totals.get(key, 0) + value
+
+    manifest = {
+        'source': source,
+        'workers': workers,
+        'workbooks_total': len(records),
+        'succeeded': succeeded,
+        'failed': len(records) - succeeded,
+        'cache_hits': sum(1 for record in records if record.get('cache_hit')),
+        'elapsed_seconds': round(elapsed, 3),
+        'cpu_seconds': round(sum(record['seconds'] for record in records), 3),
+        'totals': totals,
+        'workbooks': records
+    }
+    save_to_output_folder(manifest, 'batch_manifest.json', output_root)
+    print(f"\n✅ Batch finished: {succeeded}/{len(records)} workbooks in {elapsed:.1f}s")
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract metadata from many Tableau workbooks in parallel.")
+    parser.add_argument("source", help="Directory, glob pattern (quote it) or single .twb/.twbx file")
+    parser.add_argument("--output", default=os.path.join("output", "batch"), help="Root folder for per-workbook output")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--streaming", action="store_true", help="Use the streaming parser for large workbooks")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-parse instead of using the parse cache")
+
+    args = parser.parse_args()
+    manifest = run_batch(args.source, args.output, workers=args.workers,
+                         streaming=args.streaming, use_cache=not args.no_cache)
+    if manifest and manifest['failed']:
+        print(json.dumps([r for r in manifest['workbooks'] if r['status'] == 'failed'], indent=2))
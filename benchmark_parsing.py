@@ -0,0 +1,129 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from twbx_parser import parse_workbook, save_to_output_folder
+from bullet_chart_ext import extract_bullet_charts_metadata
+from synthetic_twb import corpus_is_current, corpus_path, corpus_spec, generate_corpus
+
+# Offline benchmark for the workbook extractors: wall time, peak Python memory and
+# XML elements/sec per extractor and file. Compare against a saved run to catch regressions.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _load_box_whisker_extractor():
+    """box-whisker_ext.py has a dash in its name, so it is loaded from its path."""
+    path = os.path.join(SCRIPT_DIR, "Box_Whisker_chart", "box-whisker_ext.py")
+    spec = importlib.util.spec_from_file_location("box_whisker_ext", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.extract_box_whisker_charts
+
+EXTRACTORS = {
+    'parse_workbook': lambda path: parse_workbook(path),
+    'parse_workbook_streaming': lambda path: parse_workbook(path, streaming=True),
+    'extract_bullet_charts_metadata': extract_bullet_charts_metadata,
+    'extract_box_whisker_charts': _load_box_whisker_extractor(),
+}
+
+def count_elements(twb_path):
+    """Number of XML elements in the workbook, the denominator for elements/sec."""
+    count = 0
+    for _, elem in ET.iterparse(twb_path, events=("end",)):
+        count += 1
+        elem.clear()
+    return count
+
+def measure(extractor, twb_path, repeat):
+    """Best-of-N wall time, then one extra run under tracemalloc for the peak allocation."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        extractor(twb_path)
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        extractor(twb_path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+def run_benchmark(twb_paths, extractor_names=None, repeat=3):
+    """Measures every selected extractor on every file and returns a list of result records."""
+    results = []
+    for twb_path in twb_paths:
+        elements = count_elements(twb_path)
+        size_mb = os.path.getsize(twb_path) / 1024 / 1024
+        print(f"\n📄 {twb_path} ({size_mb:.1f} MB, {elements:,} elements)")
+        for name in extractor_names or EXTRACTORS:
+            seconds, peak = measure(EXTRACTORS[name], twb_path, repeat)
+            record = {
+                'file': os.path.basename(twb_path),
+                'extractor': name,
+                'elements': elements,
+                'size_mb': round(size_mb, 2),
+                'seconds': round(seconds, 4),
+                'peak_mb': round(peak / 1024 / 1024, 2),
+                'elements_per_sec': round(elements / seconds) if seconds else None
+            }
+            results.append(record)
+            print(f"  {name:>30}: {seconds * 1000:9.1f} ms | peak {record['peak_mb']:8.1f} MB | "
+                  f"{record['elements_per_sec'] or 0:>12,} elements/s")
+    return results
+
+def compare_to_baseline(results, baseline_path, tolerance=0.25):
+    """Flags results more than `tolerance` slower or larger than the baseline run. Returns the regressions."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['file'], r['extractor']): r for r in json.load(f)['results']}
+
+    regressions = []
+    for record in results:
+        previous = baseline.get((record['file'], record['extractor']))
+        if not previous:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if previous[metric] and record[metric] > previous[metric] * (1 + tolerance):
+                regressions.append({**record, 'metric': metric, 'baseline': previous[metric]})
+                print(f"❌ {record['file']} {record['extractor']}: {metric} {previous[metric]} -> {record[metric]}")
+    if not regressions:
+        print(f"✅ No regressions over {tolerance:.0%} against {baseline_path}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the TWB extractors on real or synthetic workbooks.")
+    parser.add_argument("twb_paths", nargs="*", help="TWB files to measure (default: a generated synthetic corpus)")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="Worksheet counts for the synthetic corpus")
+    parser.add_argument("--corpus", default=os.path.join("output", "synthetic"), help="Folder for the synthetic corpus")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic corpus")
+    parser.add_argument("--extractors", default=None, help=f"Comma separated subset of: {', '.join(EXTRACTORS)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per extractor; the best is reported")
+    parser.add_argument("--output", default=None, help="Write results to this JSON file")
+    parser.add_argument("--baseline", default=None, help="Results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging a regression")
+
+    args = parser.parse_args()
+    twb_paths = args.twb_paths
+    if not twb_paths:
+        sizes = [int(n) for n in args.sizes.split(',')]
+        # Files left by another seed or generator version would skew a comparison; rebuild those
+        stale = [n for n in sizes if not corpus_is_current(corpus_path(args.corpus, n), corpus_spec(n, seed=args.seed))]
+        if stale:
+            generate_corpus(args.corpus, stale, seed=args.seed)
+        twb_paths = [corpus_path(args.corpus, n) for n in sizes]
+
+    extractor_names = args.extractors.split(',') if args.extractors else None
+    results = run_benchmark(twb_paths, extractor_names, repeat=args.repeat)
+    if args.output:
+        save_to_output_folder({'results': results}, os.path.basename(args.output), os.path.dirname(args.output) or ".")
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            raise SystemExit(1)
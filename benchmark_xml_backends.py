@@ -0,0 +1,46 @@
+import argparse
+import time
+import xml_backend
+from workbook_model import build_workbook, workbook_to_dict
+
+def time_backend(twb_path, backend, repeat):
+    """Best-of-N seconds for parsing and for building the Workbook model with one backend."""
+    best_parse = best_build = float('inf')
+    workbook = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        root = xml_backend.parse(twb_path, backend)
+        parsed = time.perf_counter()
+        workbook = build_workbook(root, twb_path)
+        built = time.perf_counter()
+        best_parse = min(best_parse, parsed - started)
+        best_build = min(best_build, built - parsed)
+    return best_parse, best_build, workbook
+
+def benchmark(twb_paths, repeat=3):
+    backends = xml_backend.available_backends()
+    if xml_backend.LXML not in backends:
+        print("⚠ lxml is not installed; only the ElementTree backend can be measured.")
+
+    for twb_path in twb_paths:
+        print(f"\n📄 {twb_path}")
+        results = {}
+        for backend in backends:
+            results[backend] = time_backend(twb_path, backend, repeat)
+            parse_s, build_s, workbook = results[backend]
+            print(f"  {backend:>6}: parse {parse_s * 1000:9.1f} ms | lookups {build_s * 1000:9.1f} ms | "
+                  f"{len(workbook.worksheets)} worksheets, {len(workbook.dashboards)} dashboards")
+
+        if len(results) == 2:
+            lxml_total = sum(results[xml_backend.LXML][:2])
+            etree_total = sum(results[xml_backend.ELEMENTTREE][:2])
+            identical = workbook_to_dict(results[xml_backend.LXML][2]) == workbook_to_dict(results[xml_backend.ELEMENTTREE][2])
+            print(f"  ⚡ lxml speedup: {etree_total / lxml_total:.2f}x | identical output: {'✅' if identical else '❌'}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare lxml and ElementTree parsing of Tableau TWB files.")
+    parser.add_argument("twb_paths", nargs="+", help="One or more TWB files (large ones show the difference best)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per backend; the best time is reported")
+
+    args = parser.parse_args()
+    benchmark(args.twb_paths, repeat=args.repeat)
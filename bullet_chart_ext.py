@@ -229,9 +229,10 @@
 
 #     print(f"✅ Extracted {len(result)} bullet charts.")
 
-import xml.etree.ElementTree as ET
 import re
 import json
+from workbook_model import load_workbook
+from parse_cache import ParseCache, file_digest
 
 # def clean_column_name(full_col):
 #     if not full_col:
@@ -276,43 +277,28 @@ def clean_column_name(full_col):
     return full_col.strip("[]")
 
 def extract_bullet_charts_metadata(twb_path):
-    tree = ET.parse(twb_path)
-    root = tree.getroot()
-
-    # Handle namespace
-    if "}" in root.tag:
-        ns_uri = root.tag.split("}")[0].strip("{")
-        ns = {"t": ns_uri}
-        prefix = "t:"
-    else:
-        ns = {}
-        prefix = ""
+    """Collects bullet chart fields from a .twb path or an already loaded Workbook."""
+    workbook = load_workbook(twb_path)
 
     bullet_charts = []
 
-    for worksheet in root.findall(f".//{prefix}worksheet", ns):
-        sheet_name = worksheet.get("name")
-        panes = worksheet.findall(f".//{prefix}pane", ns)
+    for worksheet in workbook.worksheets.values():
+        sheet_name = worksheet.name
 
-        for pane in panes:
-            mark_elem = pane.find(f"{prefix}mark", ns)
-            if mark_elem is None or mark_elem.get("class") != "Bar":
+        for pane in worksheet.panes:
+            if pane.mark_class != "Bar":
                 continue
 
-            encodings = pane.find(f"{prefix}encodings", ns)
+            encodings = pane.encodings
             if encodings is None:
                 continue
 
-            color = encodings.find(f"{prefix}color", ns)
-            text = encodings.find(f"{prefix}text", ns)
-            size = encodings.find(f"{prefix}size", ns)
-
             # Require at least text or color for bullet chart
-            if all(e is None for e in [color, text]):
+            if "color" not in encodings and "text" not in encodings:
                 continue
 
-            x_axis = pane.get("x-axis-name")
-            y_axis = pane.get("y-axis-name")
+            x_axis = pane.x_axis
+            y_axis = pane.y_axis
 
             bullet_charts.append({
                 "worksheet": sheet_name,
@@ -320,9 +306,9 @@ def extract_bullet_charts_metadata(twb_path):
                 "mark_type": "Bar",
                 "X Axis": clean_column_name(x_axis) if x_axis else None,
                 "Y Axis": clean_column_name(y_axis) if y_axis else None,
-                "Color": clean_column_name(color.get("column")) if color is not None else None,
-                "Text": clean_column_name(text.get("column")) if text is not None else None,
-                "Size": clean_column_name(size.get("column")) if size is not None else None
+                "Color": clean_column_name(encodings["color"]) if "color" in encodings else None,
+                "Text": clean_column_name(encodings["text"]) if "text" in encodings else None,
+                "Size": clean_column_name(encodings["size"]) if "size" in encodings else None
             })
 
     return bullet_charts
@@ -421,16 +407,14 @@ def scale_to_powerbi(x, y, width, height):
     new_height = (height / TABLEAU_MAX_HEIGHT) * POWER_BI_HEIGHT
     return round(new_x, 2), round(new_y, 2), round(new_width, 2), round(new_height, 2)
 
-def is_bullet_chart_from_panes(worksheet, ns, prefix):
-    panes = worksheet.findall(f".//{prefix}pane", ns)
+def is_bullet_chart_from_panes(worksheet):
     bar_panes = 0
-    for pane in panes:
-        marks = pane.findall(f".//{prefix}mark", ns)
-        encodings = pane.find(f"{prefix}encodings", ns)
+    for pane in worksheet.panes:
+        encodings = pane.encodings
 
-        has_bar = any(m.get("class", "").lower() == "bar" for m in marks)
-        has_text = encodings is not None and encodings.find(f"{prefix}text", ns) is not None
-        has_color = encodings is not None and encodings.find(f"{prefix}color", ns) is not None
+        has_bar = any(mark_class.lower() == "bar" for mark_class in pane.mark_classes)
+        has_text = encodings is not None and "text" in encodings
+        has_color = encodings is not None and "color" in encodings
 
         if has_bar and (has_text or has_color):
             bar_panes += 1
@@ -438,41 +422,25 @@ def is_bullet_chart_from_panes(worksheet, ns, prefix):
     return bar_panes >= 2
 
 def extract_bullet_charts_from_twb(twb_path):
-    tree = ET.parse(twb_path)
-    root = tree.getroot()
-
-    # Detect namespace
-    if "}" in root.tag:
-        ns_uri = root.tag.split("}")[0].strip("{")
-        ns = {'t': ns_uri}
-        prefix = "t:"
-    else:
-        ns = {}
-        prefix = ""
+    """Finds the dashboard position of the first bullet chart worksheet."""
+    workbook = load_workbook(twb_path)
 
     # Step 1: Identify bullet worksheets
     bullet_worksheets = {}
-    for worksheet in root.findall(f".//{prefix}worksheet", ns):
-        name = worksheet.get("name")
-        if is_bullet_chart_from_panes(worksheet, ns, prefix):
-            bullet_worksheets[name] = True
+    for worksheet in workbook.worksheets.values():
+        if is_bullet_chart_from_panes(worksheet):
+            bullet_worksheets[worksheet.name] = True
     print("✅ Bullet chart worksheets found:", list(bullet_worksheets.keys()))
 
     # Step 2: Match dashboard zones and scale dimensions
     results = []
-    for dashboard in root.findall(f".//{prefix}dashboard", ns):
-        dashboard_name = dashboard.get("name")
-        zones = dashboard.findall(f".//{prefix}zone", ns)
-        for zone in zones:
-            sheet_name = zone.get("name")
+    for dashboard in workbook.dashboards.values():
+        for zone in dashboard.zones:
+            sheet_name = zone.name
             if sheet_name in bullet_worksheets:
-                x = int(zone.get("x", 0))
-                y = int(zone.get("y", 0))
-                w = int(zone.get("w", 0))
-                h = int(zone.get("h", 0))
-                scaled_x, scaled_y, scaled_w, scaled_h = scale_to_powerbi(x, y, w, h)
+                scaled_x, scaled_y, scaled_w, scaled_h = scale_to_powerbi(zone.x, zone.y, zone.w, zone.h)
                 results.append({
-                    "dashboard": dashboard_name,
+                    "dashboard": dashboard.name,
                     "worksheet": sheet_name,
                     "x": scaled_x,
                     "y": scaled_y,
@@ -544,8 +512,17 @@ if __name__ == "__main__":
     args = parser.parse_args()
     twb_path = args.twb_path
     # input_path = r"D:\tableau_to_powerbi_migration\tableau_to_powerbi_migration\output\input_tableau_output\Bullet Chart.twb"
-    result = extract_bullet_charts_metadata(twb_path)
-    result = merge_duplicate_charts(result)
+    # Reuse cached results for an unchanged file, otherwise parse once for both extractors
+    cache = ParseCache()
+    digest = file_digest(twb_path)
+    result = cache.get(digest, "bullet_metadata")
+    pos_result = cache.get(digest, "bullet_positions")
+    if result is None or pos_result is None:
+        workbook = load_workbook(twb_path)
+        result = merge_duplicate_charts(extract_bullet_charts_metadata(workbook))
+        pos_result = extract_bullet_charts_from_twb(workbook)
+        cache.put(digest, "bullet_metadata", result)
+        cache.put(digest, "bullet_positions", pos_result)
     # result = deduplicate_positions(result)
     with open("output/final_json.json", "w") as f:
         json.dump(result, f, indent=2)
@@ -553,6 +530,6 @@ if __name__ == "__main__":
     print(f"✅ Extracted {len(result)} bullet charts.")
 
     with open("output/powerbi_chart_positions.json", "w") as f:
-        pos_result = extract_bullet_charts_from_twb(twb_path)
         json.dump(pos_result, f, indent=2)
-    print(f"✅ Extracted {len(pos_result)} bullet chart positions (with scaled dimensions).")
\ No newline at end of file
+    print(f"✅ Extracted {len(pos_result)} bullet chart positions (with scaled dimensions).")
+    cache.report()
\ No newline at end of file
@@ -0,0 +1,748 @@
+import re
+import numpy as np
+import pandas as pd
+from calc_graph import CalculationGraph
+
+# Evaluates row-level Tableau calculations over whole DataFrame chunks. A formula is parsed once
+# into a small AST of tuples and every node is computed column-wise with pandas/numpy, so a
+# chunk of a million rows costs a handful of vector operations instead of a million Python calls.
+#
+# AST nodes:
+#   ('literal', value)                  ('field', name)           ('parameter', name)
+#   ('unary', op, operand)              ('binary', op, left, right)
+#   ('if', [(condition, value)], else)  ('case', subject, [(match, value)], else)
+#   ('call', FUNCTION, [arguments])   ('lod', FIXED|INCLUDE|EXCLUDE, [dimension fields], body)
+
+class FormulaError(ValueError):
+    """A formula that cannot be parsed or is not a row-level calculation."""
+
+TOKEN_PATTERN = re.compile(r'''
+    (?P<space>\s+|//[^\n]*)
+  | (?P<field>\[(?:[^\]]|\]\])+\](?:\.\[(?:[^\]]|\]\])+\])?)
+  | (?P<string>"(?:[^"]|"")*"|'(?:[^']|'')*')
+  | (?P<date>\#[^#]+\#)
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<op><=|>=|<>|!=|==|&&|\|\||[-+*/%=<>(),{}:])
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+''', re.VERBOSE)
+
+LOD_KEYWORDS = {'FIXED', 'INCLUDE', 'EXCLUDE'}
+
+KEYWORDS = {'IF', 'THEN', 'ELSEIF', 'ELSE', 'END', 'CASE', 'WHEN', 'AND', 'OR', 'NOT', 'TRUE', 'FALSE', 'NULL'}
+
+# Functions that need more than one row (aggregates, table calcs); left to the LOD/window engine
+AGGREGATE_FUNCTIONS = {
+    'SUM', 'AVG', 'COUNT', 'COUNTD', 'MEDIAN', 'ATTR', 'STDEV', 'STDEVP', 'VAR', 'VARP', 'PERCENTILE',
+    'INDEX', 'SIZE', 'FIRST', 'LAST', 'LOOKUP', 'PREVIOUS_VALUE', 'TOTAL', 'RANK', 'RANK_DENSE',
+    'RANK_MODIFIED', 'RANK_PERCENTILE', 'RANK_UNIQUE', 'RUNNING_SUM', 'RUNNING_AVG', 'RUNNING_COUNT',
+    'RUNNING_MIN', 'RUNNING_MAX', 'WINDOW_SUM', 'WINDOW_AVG', 'WINDOW_COUNT', 'WINDOW_MIN', 'WINDOW_MAX',
+    'WINDOW_MEDIAN', 'WINDOW_STDEV', 'WINDOW_VAR', 'WINDOW_PERCENTILE'
+}
+
+def field_name(reference):
+    """'[Orders].[Sales]' -> 'Sales'; ']]' unescapes to ']'."""
+    last = reference.rsplit('].[', 1)[-1]
+    return last.strip('[]').replace(']]', ']')
+
+def tokenize(formula):
+    tokens = []
+    position = 0
+    while position < len(formula):
+        match = TOKEN_PATTERN.match(formula, position)
+        if match is None:
+            raise FormulaError(f"Unexpected character {formula[position]!r} at {position}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group()
+        if kind == 'space':
+            continue
+        if kind == 'name' and text.upper() in KEYWORDS:
+            tokens.append(('keyword', text.upper()))
+        elif kind == 'op':
+            tokens.append(('op', {'&&': 'AND', '||': 'OR', '==': '=', '!=': '<>'}.get(text, text)))
+        else:
+            tokens.append((kind, text))
+    tokens.append(('end', None))
+    return tokens
+
+class Parser:
+    """Recursive-descent parser for Tableau's row-level formula language."""
+
+    def __init__(self, formula):
+        self.tokens = tokenize(formula)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position]
+
+    def advance(self):
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            return self.advance()
+        return None
+
+    def expect(self, kind, value=None):
+        token = self.accept(kind, value)
+        if token is None:
+            raise FormulaError(f"Expected {value or kind}, found {self.peek()[1] or 'end of formula'}")
+        return token
+
+    def parse(self):
+        node = self.expression()
+        self.expect('end')
+        return node
+
+    def expression(self):
+        return self.or_expression()
+
+    def or_expression(self):
+        node = self.and_expression()
+        while self.accept('keyword', 'OR') or self.accept('op', 'OR'):
+            node = ('binary', 'OR', node, self.and_expression())
+        return node
+
+    def and_expression(self):
+        node = self.not_expression()
+        while self.accept('keyword', 'AND') or self.accept('op', 'AND'):
+            node = ('binary', 'AND', node, self.not_expression())
+        return node
+
+    def not_expression(self):
+        if self.accept('keyword', 'NOT'):
+            return ('unary', 'NOT', self.not_expression())
+        return self.comparison()
+
+    def comparison(self):
+        node = self.additive()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('=', '<>', '<', '<=', '>', '>='):
+            op = self.advance()[1]
+            node = ('binary', op, node, self.additive())
+        return node
+
+    def additive(self):
+        node = self.multiplicative()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('+', '-'):
+            op = self.advance()[1]
+            node = ('binary', op, node, self.multiplicative())
+        return node
+
+    def multiplicative(self):
+        node = self.unary()
+        while self.peek()[0] == 'op' and self.peek()[1] in ('*', '/', '%'):
+            op = self.advance()[1]
+            node = ('binary', op, node, self.unary())
+        return node
+
+    def unary(self):
+        if self.accept('op', '-'):
+            return ('unary', '-', self.unary())
+        if self.accept('op', '+'):
+            return self.unary()
+        return self.primary()
+
+    def primary(self):
+        kind, text = self.advance()
+        if kind == 'number':
+            value = float(text)
+            return ('literal', int(value) if value.is_integer() and '.' not in text and 'e' not in text.lower() else value)
+        if kind == 'string':
+            quote = text[0]
+            return ('literal', text[1:-1].replace(quote * 2, quote))
+        if kind == 'date':
+            return ('literal', pd.Timestamp(text.strip('#')))
+        if kind == 'field':
+            if text.startswith('[Parameters].'):
+                return ('parameter', field_name(text))
+            return ('field', text)
+        if kind == 'keyword':
+            if text in ('TRUE', 'FALSE'):
+                return ('literal', text == 'TRUE')
+            if text == 'NULL':
+                return ('literal', None)
+            if text == 'IF':
+                return self.if_expression()
+            if text == 'CASE':
+                return self.case_expression()
+        if kind == 'op' and text == '(':
+            node = self.expression()
+            self.expect('op', ')')
+            return node
+        if kind == 'op' and text == '{':
+            return self.lod_expression()
+        if kind == 'name' and self.accept('op', '('):
+            arguments = []
+            if not self.accept('op', ')'):
+                arguments.append(self.expression())
+                while self.accept('op', ','):
+                    arguments.append(self.expression())
+                self.expect('op', ')')
+            return ('call', text.upper(), arguments)
+        raise FormulaError(f"Unexpected {text or 'end of formula'}")
+
+    def if_expression(self):
+        branches = [(self.expression(), self.then_value())]
+        otherwise = ('literal', None)
+        while True:
+            if self.accept('keyword', 'ELSEIF'):
+                branches.append((self.expression(), self.then_value()))
+            elif self.accept('keyword', 'ELSE'):
+                otherwise = self.expression()
+                self.expect('keyword', 'END')
+                break
+            else:
+                self.expect('keyword', 'END')
+                break
+        return ('if', branches, otherwise)
+
+    def case_expression(self):
+        subject = self.expression()
+        branches = []
+        otherwise = ('literal', None)
+        while self.accept('keyword', 'WHEN'):
+            branches.append((self.expression(), self.then_value()))
+        if self.accept('keyword', 'ELSE'):
+            otherwise = self.expression()
+        self.expect('keyword', 'END')
+        return ('case', subject, branches, otherwise)
+
+    def lod_expression(self):
+        # {FIXED [Region], [Segment] : SUM([Sales])}; a bare {SUM([Sales])} is FIXED over nothing
+        keyword = self.peek()
+        lod_kind = 'FIXED'
+        dimensions = []
+        if keyword[0] == 'name' and keyword[1].upper() in LOD_KEYWORDS:
+            self.advance()
+            lod_kind = keyword[1].upper()
+            if not self.accept('op', ':'):
+                dimensions.append(self.expect('field')[1])
+                while self.accept('op', ','):
+                    dimensions.append(self.expect('field')[1])
+                self.expect('op', ':')
+        body = self.expression()
+        self.expect('op', '}')
+        return ('lod', lod_kind, dimensions, body)
+
+    def then_value(self):
+        self.expect('keyword', 'THEN')
+        return self.expression()
+
+def is_aggregate(call):
+    """True for aggregate and table calculation calls; MIN/MAX with one argument aggregate too."""
+    return call[1] in AGGREGATE_FUNCTIONS or (call[1] in ('MIN', 'MAX') and len(call[2]) == 1)
+
+def parse_expression(formula, functions=()):
+    """Parses any Tableau formula, LOD expressions and aggregates included.
+
+    Calls must be row-level FUNCTIONS, aggregates, or one of `functions`.
+    """
+    if formula is None or not formula.strip():
+        raise FormulaError("Empty formula")
+    node = Parser(formula).parse()
+    for call in iter_nodes(node, 'call'):
+        if call[1] not in FUNCTIONS and call[1] not in AGGREGATE_FUNCTIONS and call[1] not in functions:
+            raise FormulaError(f"Unsupported function {call[1]}")
+    return node
+
+def parse_formula(formula):
+    """Parses a Tableau formula into an AST, rejecting LOD expressions and aggregates."""
+    node = parse_expression(formula)
+    if any(True for _ in iter_nodes(node, 'lod')):
+        raise FormulaError("Level of detail expression")
+    for call in iter_nodes(node, 'call'):
+        if is_aggregate(call):
+            raise FormulaError(f"{call[1]} is an aggregate, not a row-level calculation")
+    return node
+
+def iter_nodes(node, kind=None):
+    """Walks an AST depth first, yielding every node (of `kind`, when given)."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if kind is None or current[0] == kind:
+            yield current
+        if current[0] == 'unary':
+            stack.append(current[2])
+        elif current[0] == 'binary':
+            stack.extend(current[2:])
+        elif current[0] == 'if':
+            for condition, value in current[1]:
+                stack.extend((condition, value))
+            stack.append(current[2])
+        elif current[0] == 'case':
+            stack.append(current[1])
+            for match, value in current[2]:
+                stack.extend((match, value))
+            stack.append(current[3])
+        elif current[0] == 'call':
+            stack.extend(current[2])
+        elif current[0] == 'lod':
+            stack.append(current[3])
+
+# --- Column-wise helpers -----------------------------------------------------------------
+
+def broadcast(value, index):
+    if isinstance(value, pd.Series):
+        return value
+    return pd.Series([value] * len(index), index=index, dtype=object if value is None else None)
+
+def is_null(value):
+    if isinstance(value, pd.Series):
+        return value.isna()
+    return value is None or (isinstance(value, float) and np.isnan(value))
+
+def is_text(value):
+    """True for text. Object columns are judged by their values, so a column of Decimals or a
+    chunk holding only nulls never turns + into concatenation."""
+    if isinstance(value, pd.Series):
+        if isinstance(value.dtype, pd.StringDtype):
+            return True
+        if isinstance(value.dtype, pd.CategoricalDtype):
+            return pd.api.types.infer_dtype(value.cat.categories, skipna=True) == 'string'
+        if pd.api.types.is_object_dtype(value.dtype):
+            return pd.api.types.infer_dtype(value, skipna=True) == 'string'
+        return False
+    return isinstance(value, str)
+
+def is_datetime(value):
+    return isinstance(value, pd.Timestamp) or pd.api.types.is_datetime64_any_dtype(getattr(value, 'dtype', None))
+
+def as_boolean(value, index):
+    """Boolean Series with <NA> for nulls, so AND/OR/NOT follow Tableau's three-valued logic."""
+    return broadcast(value, index).astype('boolean')
+
+def as_datetime(value, index):
+    series = broadcast(value, index)
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series
+    return pd.to_datetime(series, errors='coerce')
+
+def as_number(value, index):
+    series = broadcast(value, index)
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series
+    return pd.to_numeric(series, errors='coerce')
+
+def as_text(value, index):
+    series = broadcast(value, index)
+    text = series.astype(str)
+    return text.where(series.notna(), None).astype(object)
+
+def scalar_argument(value, name):
+    if isinstance(value, pd.Series):
+        raise FormulaError(f"{name} needs a constant argument here")
+    return value
+
+def choose(branches, otherwise, index):
+    """First matching branch wins, like IF/ELSEIF and CASE; unmatched rows take `otherwise`."""
+    result = broadcast(otherwise, index).astype(object)
+    for condition, value in reversed(branches):
+        mask = as_boolean(condition, index).fillna(False).astype(bool)
+        result = result.mask(mask, broadcast(value, index).astype(object))
+    return result.infer_objects()
+
+def compare(op, left, right, index):
+    if isinstance(left, pd.Timestamp) or isinstance(right, pd.Timestamp):
+        left, right = as_datetime(left, index), as_datetime(right, index)
+    left, right = broadcast(left, index), broadcast(right, index)
+    if op == '=':
+        result = left == right
+    elif op == '<>':
+        result = left != right
+    elif op == '<':
+        result = left < right
+    elif op == '<=':
+        result = left <= right
+    elif op == '>':
+        result = left > right
+    else:
+        result = left >= right
+    # Comparing with a null yields null, not False/True
+    return result.astype('boolean').mask(left.isna() | right.isna())
+
+def arithmetic(op, left, right, index):
+    if op == '+' and (is_text(left) or is_text(right)):
+        return as_text(left, index) + as_text(right, index)
+    if op == '-' and is_datetime(left) and is_datetime(right):
+        # date - date is the difference in days
+        return (as_datetime(left, index) - as_datetime(right, index)).dt.days
+    if op in ('+', '-') and is_datetime(left):
+        # date + number adds days
+        days = pd.to_timedelta(as_number(right, index), unit='D')
+        return as_datetime(left, index) + days if op == '+' else as_datetime(left, index) - days
+    left, right = as_number(left, index), as_number(right, index)
+    if op == '+':
+        return left + right
+    if op == '-':
+        return left - right
+    if op == '*':
+        return left * right
+    if op == '%':
+        # The remainder keeps the dividend's sign (-5 % 3 = -2) and % 0 is null
+        return np.fmod(left, right.where(right != 0))
+    # Division by zero is null in Tableau
+    return (left / right).replace([np.inf, -np.inf], np.nan)
+
+# --- Functions -------------------------------------------------------------------------
+
+DATE_PARTS = ('year', 'quarter', 'month', 'week', 'weekday', 'dayofyear', 'day', 'hour', 'minute', 'second')
+
+def date_part(part, dates):
+    part = part.lower()
+    if part == 'year':
+        return dates.dt.year
+    if part == 'quarter':
+        return dates.dt.quarter
+    if part == 'month':
+        return dates.dt.month
+    if part == 'day':
+        return dates.dt.day
+    if part == 'dayofyear':
+        return dates.dt.dayofyear
+    if part == 'weekday':
+        # Tableau counts Sunday as 1
+        return (dates.dt.dayofweek + 1) % 7 + 1
+    if part == 'week':
+        # Week of year with weeks starting on Sunday, January 1st in week 1
+        start_offset = (pd.to_datetime(dates.dt.year.astype('Int64').astype(str) + '-01-01', errors='coerce').dt.dayofweek + 1) % 7
+        return (dates.dt.dayofyear - 1 + start_offset) // 7 + 1
+    if part == 'hour':
+        return dates.dt.hour
+    if part == 'minute':
+        return dates.dt.minute
+    if part == 'second':
+        return dates.dt.second
+    raise FormulaError(f"Unsupported date part '{part}'")
+
+def date_trunc(part, dates):
+    part = part.lower()
+    if part == 'week':
+        days_since_sunday = (dates.dt.dayofweek + 1) % 7
+        return dates.dt.normalize() - pd.to_timedelta(days_since_sunday, unit='D')
+    periods = {'year': 'Y', 'quarter': 'Q', 'month': 'M', 'day': 'D', 'hour': 'h', 'minute': 'min', 'second': 's'}
+    if part not in periods:
+        raise FormulaError(f"Unsupported date part '{part}'")
+    if part in ('day', 'hour', 'minute', 'second'):
+        return dates.dt.floor(periods[part])
+    return dates.dt.to_period(periods[part]).dt.start_time
+
+def date_add(part, amount, dates):
+    part = part.lower()
+    amount = scalar_argument(amount, 'DATEADD')
+    if part in ('year', 'quarter', 'month'):
+        months = int(amount) * {'year': 12, 'quarter': 3, 'month': 1}[part]
+        return dates + pd.DateOffset(months=months)
+    units = {'week': 'W', 'day': 'D', 'hour': 'h', 'minute': 'min', 'second': 's'}
+    if part not in units:
+        raise FormulaError(f"Unsupported date part '{part}'")
+    return dates + pd.to_timedelta(amount, unit=units[part])
+
+def date_diff(part, start, end):
+    part = part.lower()
+    if part == 'year':
+        return end.dt.year - start.dt.year
+    if part == 'quarter':
+        return (end.dt.year * 4 + end.dt.quarter) - (start.dt.year * 4 + start.dt.quarter)
+    if part == 'month':
+        return (end.dt.year * 12 + end.dt.month) - (start.dt.year * 12 + start.dt.month)
+    if part == 'week':
+        return (date_trunc('week', end) - date_trunc('week', start)).dt.days // 7
+    if part == 'day':
+        return (end.dt.normalize() - start.dt.normalize()).dt.days
+    seconds = {'hour': 3600, 'minute': 60, 'second': 1}
+    if part not in seconds:
+        raise FormulaError(f"Unsupported date part '{part}'")
+    return (date_trunc(part, end) - date_trunc(part, start)).dt.total_seconds() // seconds[part]
+
+def date_name(part, dates):
+    part = part.lower()
+    if part == 'month':
+        return dates.dt.month_name()
+    if part == 'weekday':
+        return dates.dt.day_name()
+    return as_text(date_part(part, dates), dates.index)
+
+def text_slice(text, start=None, stop=None):
+    return text.str.slice(start, stop)
+
+def function_iif(index, condition, when_true, when_false, when_unknown=None):
+    condition = as_boolean(condition, index)
+    result = choose([(condition, when_true)], when_false, index)
+    # A null test yields the fourth argument, or null without one
+    return result.astype(object).mask(condition.isna(), broadcast(when_unknown, index).astype(object)).infer_objects()
+
+def function_ifnull(index, value, replacement):
+    value = broadcast(value, index)
+    return value.where(value.notna(), broadcast(replacement, index))
+
+def function_least(index, left, right, how):
+    # Unlike Series.min(), a null on either side makes the result null
+    pair = pd.concat([broadcast(left, index), broadcast(right, index)], axis=1)
+    return pair.agg(how, axis=1).where(pair.notna().all(axis=1))
+
+def function_div(index, left, right):
+    # Integer division truncates toward zero (-7 DIV 2 = -3); a zero divisor gives null
+    right = as_number(right, index)
+    return np.trunc(as_number(left, index) / right.where(right != 0))
+
+def function_round(index, value, digits=0):
+    # Halves round away from zero (ROUND(2.5) = 3), not to even as Series.round() does
+    scale = 10.0 ** int(scalar_argument(digits, 'ROUND'))
+    numbers = as_number(value, index)
+    return np.sign(numbers) * np.floor(np.abs(numbers) * scale + 0.5) / scale
+
+def function_int(index, value):
+    return np.trunc(as_number(value, index)).astype('Int64')
+
+def function_log(index, value, base=10):
+    return np.log(as_number(value, index)) / np.log(scalar_argument(base, 'LOG'))
+
+def function_mid(index, value, start, length=None):
+    start = int(scalar_argument(start, 'MID')) - 1
+    stop = None if length is None else start + int(scalar_argument(length, 'MID'))
+    return text_slice(as_text(value, index), start, stop)
+
+def function_right(index, value, count):
+    count = int(scalar_argument(count, 'RIGHT'))
+    text = as_text(value, index)
+    return text_slice(text, -count) if count > 0 else text.where(text.isna(), '')
+
+def function_find(index, value, substring, start=1):
+    substring = scalar_argument(substring, 'FIND')
+    found = as_text(value, index).str.find(substring, int(scalar_argument(start, 'FIND')) - 1) + 1
+    return found
+
+def function_split(index, value, delimiter, token):
+    token = int(scalar_argument(token, 'SPLIT'))
+    parts = as_text(value, index).str.split(scalar_argument(delimiter, 'SPLIT'))
+    return parts.str[token - 1 if token > 0 else token]
+
+def function_makedate(index, year, month, day):
+    frame = pd.DataFrame({'year': as_number(year, index), 'month': as_number(month, index), 'day': as_number(day, index)})
+    return pd.to_datetime(frame, errors='coerce')
+
+FUNCTIONS = {
+    # Logical
+    'IIF': function_iif,
+    'IFNULL': function_ifnull,
+    'ZN': lambda index, value: as_number(value, index).fillna(0),
+    'ISNULL': lambda index, value: broadcast(value, index).isna(),
+    'MIN': lambda index, left, right: function_least(index, left, right, 'min'),
+    'MAX': lambda index, left, right: function_least(index, left, right, 'max'),
+    # Number
+    'ABS': lambda index, value: as_number(value, index).abs(),
+    'ROUND': function_round,
+    'FLOOR': lambda index, value: np.floor(as_number(value, index)),
+    'CEILING': lambda index, value: np.ceil(as_number(value, index)),
+    'SQRT': lambda index, value: np.sqrt(as_number(value, index)),
+    'POWER': lambda index, value, exponent: as_number(value, index) ** as_number(exponent, index),
+    'EXP': lambda index, value: np.exp(as_number(value, index)),
+    'LN': lambda index, value: np.log(as_number(value, index)),
+    'LOG': function_log,
+    'SIGN': lambda index, value: np.sign(as_number(value, index)),
+    'DIV': function_div,
+    'INT': function_int,
+    'FLOAT': lambda index, value: as_number(value, index).astype(float),
+    'STR': lambda index, value: as_text(value, index),
+    # String
+    'LEN': lambda index, value: as_text(value, index).str.len(),
+    'UPPER': lambda index, value: as_text(value, index).str.upper(),
+    'LOWER': lambda index, value: as_text(value, index).str.lower(),
+    'TRIM': lambda index, value: as_text(value, index).str.strip(),
+    'LTRIM': lambda index, value: as_text(value, index).str.lstrip(),
+    'RTRIM': lambda index, value: as_text(value, index).str.rstrip(),
+    'LEFT': lambda index, value, count: text_slice(as_text(value, index), 0, int(scalar_argument(count, 'LEFT'))),
+    'RIGHT': function_right,
+    'MID': function_mid,
+    'CONTAINS': lambda index, value, substring: as_text(value, index).str.contains(scalar_argument(substring, 'CONTAINS'), regex=False),
+    'STARTSWITH': lambda index, value, prefix: as_text(value, index).str.startswith(scalar_argument(prefix, 'STARTSWITH')),
+    'ENDSWITH': lambda index, value, suffix: as_text(value, index).str.endswith(scalar_argument(suffix, 'ENDSWITH')),
+    'FIND': function_find,
+    'REPLACE': lambda index, value, old, new: as_text(value, index).str.replace(
+        scalar_argument(old, 'REPLACE'), scalar_argument(new, 'REPLACE'), regex=False),
+    'SPLIT': function_split,
+    # Date
+    'DATEPART': lambda index, part, value: date_part(scalar_argument(part, 'DATEPART'), as_datetime(value, index)),
+    'DATENAME': lambda index, part, value: date_name(scalar_argument(part, 'DATENAME'), as_datetime(value, index)),
+    'DATETRUNC': lambda index, part, value: date_trunc(scalar_argument(part, 'DATETRUNC'), as_datetime(value, index)),
+    'DATEADD': lambda index, part, amount, value: date_add(scalar_argument(part, 'DATEADD'), amount, as_datetime(value, index)),
+    'DATEDIFF': lambda index, part, start, end: date_diff(scalar_argument(part, 'DATEDIFF'), as_datetime(start, index), as_datetime(end, index)),
+    'YEAR': lambda index, value: as_datetime(value, index).dt.year,
+    'QUARTER': lambda index, value: as_datetime(value, index).dt.quarter,
+    'MONTH': lambda index, value: as_datetime(value, index).dt.month,
+    'DAY': lambda index, value: as_datetime(value, index).dt.day,
+    'WEEK': lambda index, value: date_part('week', as_datetime(value, index)),
+    'DATE': lambda index, value: as_datetime(value, index).dt.normalize(),
+    'DATETIME': lambda index, value: as_datetime(value, index),
+    'MAKEDATE': function_makedate,
+    'TODAY': lambda index: pd.Timestamp.today().normalize(),
+    'NOW': lambda index: pd.Timestamp.now()
+}
+
+# --- Evaluation ------------------------------------------------------------------------
+
+def evaluate(node, frame, parameters=None):
+    """Evaluates an AST against a DataFrame; returns a Series aligned with it, or a scalar."""
+    index = frame.index
+    kind = node[0]
+    if kind == 'literal':
+        return node[1]
+    if kind == 'field':
+        name = field_name(node[1])
+        if node[1] in frame.columns:
+            return frame[node[1]]
+        if name not in frame.columns:
+            raise FormulaError(f"Unknown field {node[1]}")
+        return frame[name]
+    if kind == 'parameter':
+        if not parameters or node[1] not in parameters:
+            raise FormulaError(f"No value for parameter [{node[1]}]")
+        return parameters[node[1]]
+    if kind == 'unary':
+        operand = evaluate(node[2], frame, parameters)
+        if node[1] == 'NOT':
+            return ~as_boolean(operand, index)
+        return -as_number(operand, index)
+    if kind == 'binary':
+        op = node[1]
+        left = evaluate(node[2], frame, parameters)
+        right = evaluate(node[3], frame, parameters)
+        if op == 'AND':
+            return as_boolean(left, index) & as_boolean(right, index)
+        if op == 'OR':
+            return as_boolean(left, index) | as_boolean(right, index)
+        if op in ('=', '<>', '<', '<=', '>', '>='):
+            return compare(op, left, right, index)
+        return arithmetic(op, left, right, index)
+    if kind == 'if':
+        branches = [(evaluate(condition, frame, parameters), evaluate(value, frame, parameters)) for condition, value in node[1]]
+        return choose(branches, evaluate(node[2], frame, parameters), index)
+    if kind == 'case':
+        subject = evaluate(node[1], frame, parameters)
+        branches = [
+            (compare('=', subject, evaluate(match, frame, parameters), index), evaluate(value, frame, parameters))
+            for match, value in node[2]
+        ]
+        return choose(branches, evaluate(node[3], frame, parameters), index)
+    if kind == 'call':
+        arguments = [evaluate(argument, frame, parameters) for argument in node[2]]
+        try:
+            return FUNCTIONS[node[1]](index, *arguments)
+        except TypeError as e:
+            raise FormulaError(f"{node[1]}: {e}") from e
+    raise FormulaError(f"Unknown node {kind}")
+
+class CompiledCalculation:
+    """A calculated field parsed once and evaluated per chunk."""
+
+    def __init__(self, name, caption, formula, ast):
+        self.name = name          # e.g. "[Calculation_123]"
+        self.caption = caption    # column name in the exported data
+        self.formula = formula
+        self.ast = ast
+
+    def evaluate(self, frame, parameters=None):
+        return broadcast(evaluate(self.ast, frame, parameters), frame.index)
+
+class CalculatedColumns:
+    """Calculations that apply to one table, in dependency order, computed chunk by chunk.
+
+    Calling it with a chunk DataFrame returns a DataFrame of just the calculated columns, named
+    by caption. Calculations reading other calculations see them under both name and caption,
+    including those computed before the chunk arrives (e.g. by Hyper), listed in `aliases`.
+
+    A calculation that raises is recorded in `failed` and yields nulls from then on, so one bad
+    formula costs its own column rather than the table's export.
+    """
+
+    def __init__(self, calculations, parameters=None, aliases=None):
+        self.calculations = calculations
+        self.parameters = parameters
+        # {calculation name: column caption} for calculations already present in the chunk
+        self.aliases = aliases or {}
+        self.failed = {}  # calculation name -> error
+
+    @property
+    def names(self):
+        return [calc.caption for calc in self.calculations]
+
+    def __bool__(self):
+        return bool(self.calculations)
+
+    def __call__(self, frame):
+        working = frame.copy(deep=False)
+        for name, caption in self.aliases.items():
+            if caption in working.columns:
+                working[name] = working[caption]
+        results = {}
+        for calc in self.calculations:
+            values = None
+            if calc.name not in self.failed:
+                try:
+                    values = calc.evaluate(working, self.parameters)
+                except Exception as e:
+                    self.failed[calc.name] = f"{type(e).__name__}: {e}"
+            if values is None:
+                values = pd.Series(None, index=frame.index, dtype=object)
+            working[calc.name] = values
+            working[calc.caption] = values
+            results[calc.caption] = values
+        return pd.DataFrame(results, index=frame.index, columns=self.names)
+
+def compile_calculations(calculations_json, columns, parameters=None, datasource=None):
+    """Picks the calculations computable from `columns`, parsed and in dependency order.
+
+    A calculation applies when every field it reads is one of the columns or another applicable
+    calculation. With `datasource` only calculations recorded for that datasource are considered,
+    so another datasource's calculation never lands on a table that happens to share its column
+    names. Returns (CalculatedColumns, {calculation: reason skipped}) for the rest.
+    """
+    calculations_json = calculations_json or {}
+    if datasource is not None:
+        calculations_json = {
+            name: calc for name, calc in calculations_json.items()
+            if calc.get('datasource') in (None, datasource)
+        }
+    graph = CalculationGraph.from_calculations(calculations_json)
+    available = {f"[{column}]" for column in columns}
+    compiled = []
+    skipped = {}
+    order, blocked = graph.partial_order()
+    for _, name in blocked:
+        # Only the cycle and what reads it are lost; unrelated calculations still compile
+        skipped[name] = f"in or reading a circular reference among {', '.join(sorted(name for _, name in blocked))}"
+
+    for _, name in order:
+        calc = calculations_json[name]
+        caption = calc.get('field_name') or name.strip('[]')
+        formula = calc.get('formula')
+        try:
+            ast = parse_formula(formula)
+            for parameter in iter_nodes(ast, 'parameter'):
+                if not parameters or parameter[1] not in parameters:
+                    raise FormulaError(f"no value for parameter [{parameter[1]}]")
+        except FormulaError as e:
+            skipped[name] = str(e)
+            continue
+        missing = sorted({
+            f"[{field_name(node[1])}]" for node in iter_nodes(ast, 'field')
+            if node[1] not in available and f"[{field_name(node[1])}]" not in available
+        })
+        if missing:
+            skipped[name] = f"reads {', '.join(missing)}, not in this table"
+            continue
+        if f"[{caption}]" in available:
+            skipped[name] = f"column [{caption}] already exists"
+            continue
+        compiled.append(CompiledCalculation(name, caption, formula, ast))
+        available.update({name, f"[{caption}]"})
+    return CalculatedColumns(compiled, parameters), skipped
+
+def calculation_fingerprint(calculated_columns):
+    """Stable text identifying the formulas applied to a table, for change detection."""
+    return "\n".join(f"{calc.name}={calc.formula}" for calc in calculated_columns.calculations)
+
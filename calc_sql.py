@@ -0,0 +1,334 @@
+import pandas as pd
+from calc_engine import CalculatedColumns, FormulaError, field_name, iter_nodes
+
+try:
+    from tableauhyperapi import escape_string_literal
+except ImportError:  # translating needs no Hyper; only column_fields and push_down_calculations do
+    def escape_string_literal(text):
+        return "'" + text.replace("'", "''") + "'"
+
+# Translates row-level Tableau calculations (calc_engine ASTs) into Hyper SQL expressions, so the
+# export query computes them in Hyper's engine and no rows pass through pandas for them.
+# Anything without a faithful SQL equivalent raises FormulaError and stays with calc_engine.
+
+# Value kinds tracked while translating, to pick '||' over '+' and reject mixed comparisons
+TEXT, NUMBER, DATE, BOOL, NULL = 'text', 'number', 'date', 'bool', 'null'
+
+HYPER_KINDS = {
+    'TEXT': TEXT, 'VARCHAR': TEXT, 'CHAR': TEXT,
+    'BIG_INT': NUMBER, 'BIGINT': NUMBER, 'INT': NUMBER, 'INTEGER': NUMBER, 'SMALL_INT': NUMBER, 'SMALLINT': NUMBER,
+    'DOUBLE': NUMBER, 'DOUBLE PRECISION': NUMBER, 'FLOAT': NUMBER, 'REAL': NUMBER, 'NUMERIC': NUMBER,
+    'DATE': DATE, 'TIMESTAMP': DATE, 'TIMESTAMP_TZ': DATE,
+    'BOOL': BOOL, 'BOOLEAN': BOOL
+}
+
+# Date parts as EXTRACT fields; Tableau's week numbering has no SQL equivalent and stays in pandas
+EXTRACT_FIELDS = {
+    'year': 'YEAR', 'quarter': 'QUARTER', 'month': 'MONTH', 'day': 'DAY', 'dayofyear': 'DOY',
+    'hour': 'HOUR', 'minute': 'MINUTE', 'second': 'SECOND'
+}
+TRUNC_PARTS = ('year', 'quarter', 'month', 'day', 'hour', 'minute', 'second')
+INTERVALS = {
+    'year': "INTERVAL '1 year'", 'quarter': "INTERVAL '3 months'", 'month': "INTERVAL '1 month'",
+    'week': "INTERVAL '7 days'", 'day': "INTERVAL '1 day'", 'hour': "INTERVAL '1 hour'",
+    'minute': "INTERVAL '1 minute'", 'second': "INTERVAL '1 second'"
+}
+
+def literal_sql(value):
+    if value is None:
+        return 'NULL', NULL
+    if isinstance(value, bool):
+        return ('TRUE' if value else 'FALSE'), BOOL
+    if isinstance(value, (int, float)):
+        return repr(value), NUMBER
+    if isinstance(value, pd.Timestamp):
+        return f"TIMESTAMP {escape_string_literal(value.strftime('%Y-%m-%d %H:%M:%S'))}", DATE
+    return escape_string_literal(str(value)), TEXT
+
+def constant(argument, name):
+    """Literal value of an argument that Tableau requires to be constant (date parts, prefixes)."""
+    if argument[0] != 'literal':
+        raise FormulaError(f"{name} needs a constant argument for SQL")
+    return argument[1]
+
+def expect_kind(kind, expected, name):
+    if kind not in (expected, NULL):
+        raise FormulaError(f"{name} expects {expected}, not {kind}")
+
+def extract(part, value):
+    part = part.lower()
+    if part == 'weekday':
+        # Tableau counts Sunday as 1, EXTRACT(DOW) as 0
+        return f"(CAST(EXTRACT(DOW FROM {value}) AS BIGINT) + 1)"
+    if part not in EXTRACT_FIELDS:
+        raise FormulaError(f"Date part '{part}' has no SQL equivalent")
+    return f"CAST(FLOOR(EXTRACT({EXTRACT_FIELDS[part]} FROM {value})) AS BIGINT)"
+
+def trunc(part, value):
+    part = part.lower()
+    if part == 'week':
+        # DATE_TRUNC weeks start on Monday, Tableau's on Sunday
+        return f"(DATE_TRUNC('week', {value} + INTERVAL '1 day') - INTERVAL '1 day')"
+    if part not in TRUNC_PARTS:
+        raise FormulaError(f"Date part '{part}' has no SQL equivalent")
+    return f"DATE_TRUNC('{part}', {value})"
+
+def date_diff(part, start, end):
+    part = part.lower()
+    if part == 'day':
+        return f"(CAST({end} AS DATE) - CAST({start} AS DATE))"
+    if part == 'week':
+        return f"(CAST({trunc('week', end)} AS DATE) - CAST({trunc('week', start)} AS DATE)) / 7"
+    if part in ('year', 'quarter', 'month'):
+        per_year = {'year': 1, 'quarter': 4, 'month': 12}[part]
+        total = lambda value: (f"({extract('year', value)} * {per_year} + {extract(part, value)})"
+                               if part != 'year' else extract('year', value))
+        return f"({total(end)} - {total(start)})"
+    raise FormulaError(f"DATEDIFF by '{part}' has no SQL equivalent")
+
+class SqlTranslator:
+    """Turns a calc_engine AST into a Hyper SQL expression.
+
+    `fields` maps field references ('[Sales]', '[Calculation_1]') to (sql, kind): table columns
+    map to quoted identifiers, calculations already translated to their parenthesized SQL.
+    """
+
+    def __init__(self, fields, parameters=None):
+        self.fields = fields
+        self.parameters = parameters or {}
+
+    def visit(self, node):
+        kind = node[0]
+        if kind == 'literal':
+            return literal_sql(node[1])
+        if kind == 'field':
+            reference = node[1] if node[1] in self.fields else f"[{field_name(node[1])}]"
+            if reference not in self.fields:
+                raise FormulaError(f"Unknown field {node[1]}")
+            return self.fields[reference]
+        if kind == 'parameter':
+            if node[1] not in self.parameters:
+                raise FormulaError(f"No value for parameter [{node[1]}]")
+            return literal_sql(self.parameters[node[1]])
+        if kind == 'unary':
+            operand, operand_kind = self.visit(node[2])
+            if node[1] == 'NOT':
+                return f"(NOT {operand})", BOOL
+            expect_kind(operand_kind, NUMBER, 'Negation')
+            return f"(-{operand})", NUMBER
+        if kind == 'binary':
+            return self.binary(node[1], self.visit(node[2]), self.visit(node[3]))
+        if kind == 'if':
+            branches = [(self.visit(condition)[0], self.visit(value)) for condition, value in node[1]]
+            return self.case_when(branches, self.visit(node[2]))
+        if kind == 'case':
+            subject = self.visit(node[1])[0]
+            branches = [(f"{subject} = {self.visit(match)[0]}", self.visit(value)) for match, value in node[2]]
+            return self.case_when(branches, self.visit(node[3]))
+        if kind == 'call':
+            return self.call(node[1], node[2])
+        raise FormulaError(f"Unknown node {kind}")
+
+    def case_when(self, branches, otherwise):
+        kinds = {value_kind for _, (_, value_kind) in branches} | {otherwise[1]}
+        kinds.discard(NULL)
+        if len(kinds) > 1:
+            raise FormulaError(f"Branches mix {', '.join(sorted(kinds))}")
+        whens = " ".join(f"WHEN {condition} THEN {value}" for condition, (value, _) in branches)
+        return f"(CASE {whens} ELSE {otherwise[0]} END)", kinds.pop() if kinds else NULL
+
+    def binary(self, op, left, right):
+        (left_sql, left_kind), (right_sql, right_kind) = left, right
+        if op in ('AND', 'OR'):
+            return f"({left_sql} {op} {right_sql})", BOOL
+        if op in ('=', '<>', '<', '<=', '>', '>='):
+            if NULL not in (left_kind, right_kind) and left_kind != right_kind:
+                raise FormulaError(f"Comparing {left_kind} with {right_kind}")
+            return f"({left_sql} {op} {right_sql})", BOOL
+        if op == '+' and TEXT in (left_kind, right_kind):
+            expect_kind(left_kind, TEXT, 'String concatenation')
+            expect_kind(right_kind, TEXT, 'String concatenation')
+            return f"({left_sql} || {right_sql})", TEXT
+        if op in ('+', '-') and left_kind == DATE:
+            # date + number adds days
+            expect_kind(right_kind, NUMBER, 'Date arithmetic')
+            return f"({left_sql} {op} {right_sql} * INTERVAL '1 day')", DATE
+        expect_kind(left_kind, NUMBER, f"'{op}'")
+        expect_kind(right_kind, NUMBER, f"'{op}'")
+        if op == '/':
+            # Tableau divides as floating point and yields null for division by zero
+            return f"(CAST({left_sql} AS DOUBLE PRECISION) / NULLIF({right_sql}, 0))", NUMBER
+        if op == '%':
+            return f"({left_sql} % NULLIF({right_sql}, 0))", NUMBER
+        return f"({left_sql} {op} {right_sql})", NUMBER
+
+    def call(self, name, arguments):
+        values = [self.visit(argument) for argument in arguments]
+        sql = [value for value, _ in values]
+        kinds = [kind for _, kind in values]
+
+        def numeric(function):
+            for kind in kinds:
+                expect_kind(kind, NUMBER, name)
+            return f"{function}({', '.join(sql)})", NUMBER
+
+        def text(function):
+            expect_kind(kinds[0], TEXT, name)
+            return f"{function}({', '.join(sql)})", TEXT
+
+        if name == 'IIF':
+            unknown = sql[3] if len(sql) > 3 else 'NULL'
+            return self.case_when([(sql[0], values[1]), (f"NOT {sql[0]}", values[2])], (unknown, kinds[3] if len(sql) > 3 else NULL))
+        if name == 'IFNULL':
+            return self.case_when([(f"{sql[0]} IS NOT NULL", values[0])], values[1])
+        if name == 'ZN':
+            expect_kind(kinds[0], NUMBER, name)
+            return f"COALESCE({sql[0]}, 0)", NUMBER
+        if name == 'ISNULL':
+            return f"({sql[0]} IS NULL)", BOOL
+        if name in ('MIN', 'MAX'):
+            if NULL not in kinds and kinds[0] != kinds[1]:
+                raise FormulaError(f"{name} of {kinds[0]} and {kinds[1]}")
+            # LEAST/GREATEST skip nulls; Tableau's two-argument MIN/MAX is null if either side is
+            function = 'LEAST' if name == 'MIN' else 'GREATEST'
+            return (f"(CASE WHEN {sql[0]} IS NULL OR {sql[1]} IS NULL THEN NULL ELSE {function}({sql[0]}, {sql[1]}) END)",
+                    kinds[0] if kinds[0] != NULL else kinds[1])
+        if name in ('ABS', 'FLOOR', 'SQRT', 'EXP', 'LN', 'SIGN'):
+            return numeric(name)
+        if name == 'CEILING':
+            return numeric('CEIL')
+        if name == 'POWER':
+            return numeric('POWER')
+        if name == 'ROUND':
+            expect_kind(kinds[0], NUMBER, name)
+            digits = int(constant(arguments[1], name)) if len(arguments) > 1 else 0
+            return f"CAST(ROUND(CAST({sql[0]} AS NUMERIC(38, 10)), {digits}) AS DOUBLE PRECISION)", NUMBER
+        if name == 'LOG':
+            expect_kind(kinds[0], NUMBER, name)
+            if len(sql) == 1:
+                return f"(LN({sql[0]}) / LN(10))", NUMBER
+            return f"(LN({sql[0]}) / LN({sql[1]}))", NUMBER
+        if name == 'DIV':
+            numeric(name)
+            # Truncates toward zero like Tableau: -7 DIV 2 = -3
+            return f"TRUNC(CAST({sql[0]} AS DOUBLE PRECISION) / NULLIF({sql[1]}, 0))", NUMBER
+        if name == 'INT':
+            expect_kind(kinds[0], NUMBER, name)
+            return f"CAST(TRUNC({sql[0]}) AS BIGINT)", NUMBER
+        if name == 'FLOAT':
+            expect_kind(kinds[0], NUMBER, name)
+            return f"CAST({sql[0]} AS DOUBLE PRECISION)", NUMBER
+        if name == 'STR':
+            # Dates and numbers print differently in pandas; only text round-trips unchanged
+            if kinds[0] not in (TEXT, NULL):
+                raise FormulaError(f"STR of {kinds[0]} formats differently in SQL")
+            return f"CAST({sql[0]} AS TEXT)", TEXT
+        if name == 'LEN':
+            expect_kind(kinds[0], TEXT, name)
+            return f"CAST(CHAR_LENGTH({sql[0]}) AS BIGINT)", NUMBER
+        if name in ('UPPER', 'LOWER', 'LTRIM', 'RTRIM', 'REPLACE'):
+            return text(name)
+        if name == 'TRIM':
+            return text('BTRIM')
+        if name in ('LEFT', 'RIGHT'):
+            count = int(constant(arguments[1], name))
+            expect_kind(kinds[0], TEXT, name)
+            if count < 0:
+                raise FormulaError(f"{name} with a negative length counts differently in SQL")
+            return f"{name}({sql[0]}, {count})", TEXT
+        if name == 'MID':
+            expect_kind(kinds[0], TEXT, name)
+            start = int(constant(arguments[1], name))
+            if start < 1:
+                raise FormulaError("MID from a position before 1")
+            if len(arguments) > 2:
+                return f"SUBSTRING({sql[0]} FROM {start} FOR {max(int(constant(arguments[2], name)), 0)})", TEXT
+            return f"SUBSTRING({sql[0]} FROM {start})", TEXT
+        if name in ('CONTAINS', 'STARTSWITH', 'ENDSWITH'):
+            expect_kind(kinds[0], TEXT, name)
+            part = str(constant(arguments[1], name))
+            if name == 'CONTAINS':
+                return f"(POSITION({sql[1]} IN {sql[0]}) > 0)", BOOL
+            side = 'LEFT' if name == 'STARTSWITH' else 'RIGHT'
+            return f"({side}({sql[0]}, {len(part)}) = {sql[1]})", BOOL
+        if name == 'FIND':
+            expect_kind(kinds[0], TEXT, name)
+            constant(arguments[1], name)
+            if len(arguments) > 2 and constant(arguments[2], name) != 1:
+                raise FormulaError("FIND from a start position has no SQL equivalent")
+            return f"CAST(POSITION({sql[1]} IN {sql[0]}) AS BIGINT)", NUMBER
+        if name == 'SPLIT':
+            expect_kind(kinds[0], TEXT, name)
+            token = int(constant(arguments[2], name))
+            if token < 1:
+                raise FormulaError("SPLIT from the end has no SQL equivalent")
+            return f"NULLIF(SPLIT_PART({sql[0]}, {sql[1]}, {token}), '')", TEXT
+        if name in ('DATEPART', 'DATETRUNC', 'DATEADD', 'DATEDIFF'):
+            part = str(constant(arguments[0], name))
+            for kind in kinds[-2 if name == 'DATEDIFF' else -1:]:
+                expect_kind(kind, DATE, name)
+            if name == 'DATEPART':
+                return extract(part, sql[1]), NUMBER
+            if name == 'DATETRUNC':
+                return f"CAST({trunc(part, sql[1])} AS TIMESTAMP)", DATE
+            if name == 'DATEADD':
+                if part.lower() not in INTERVALS:
+                    raise FormulaError(f"Date part '{part}' has no SQL equivalent")
+                expect_kind(kinds[1], NUMBER, name)
+                return f"CAST({sql[2]} + {sql[1]} * {INTERVALS[part.lower()]} AS TIMESTAMP)", DATE
+            return f"CAST({date_diff(part, sql[1], sql[2])} AS BIGINT)", NUMBER
+        if name in ('YEAR', 'QUARTER', 'MONTH', 'DAY'):
+            expect_kind(kinds[0], DATE, name)
+            return extract(name.lower(), sql[0]), NUMBER
+        if name == 'DATE':
+            expect_kind(kinds[0], DATE, name)
+            return f"CAST(CAST({sql[0]} AS DATE) AS TIMESTAMP)", DATE
+        if name == 'DATETIME':
+            expect_kind(kinds[0], DATE, name)
+            return f"CAST({sql[0]} AS TIMESTAMP)", DATE
+        if name == 'TODAY':
+            return "CAST(CURRENT_DATE AS TIMESTAMP)", DATE
+        raise FormulaError(f"{name} has no SQL translation")
+
+def column_fields(table_definition):
+    """Field references of a table's columns mapped to their quoted identifier and value kind."""
+    from tableauhyperapi import escape_name
+    from hyper_export import column_names, hyper_type_name
+    return {
+        f"[{name}]": (escape_name(name), HYPER_KINDS.get(hyper_type_name(col.type)))
+        for name, col in zip(column_names(table_definition), table_definition.columns)
+    }
+
+def push_down_calculations(connection, table, calculated_columns):
+    """Splits a table's calculations into Hyper SQL expressions and a pandas remainder.
+
+    Calculations are translated in dependency order; each translation is checked by having Hyper
+    plan it against the table, so a formula Hyper rejects falls back to calc_engine. Returns
+    ([(caption, sql)], CalculatedColumns for the rest, {caption: reason not pushed down}).
+    """
+    from tableauhyperapi import HyperException
+    table_definition = connection.catalog.get_table_definition(table)
+    fields = column_fields(table_definition)
+    translator = SqlTranslator(fields, calculated_columns.parameters)
+    expressions = []
+    remaining = []
+    fallbacks = {}
+    for calc in calculated_columns.calculations:
+        try:
+            for node in iter_nodes(calc.ast, 'field'):
+                if any(node[1] in (other.name, f"[{other.caption}]") for other in remaining):
+                    raise FormulaError(f"reads {node[1]}, which is computed in pandas")
+            sql, kind = translator.visit(calc.ast)
+            if kind == NULL:
+                raise FormulaError("Always null")
+            with connection.execute_query(f"SELECT {sql} FROM {table} LIMIT 0"):
+                pass
+        except (FormulaError, HyperException) as e:
+            fallbacks[calc.caption] = str(e).splitlines()[0]
+            remaining.append(calc)
+            continue
+        expressions.append((calc.caption, sql))
+        # Later calculations reading this one inline its SQL
+        fields[calc.name] = fields[f"[{calc.caption}]"] = (f"({sql})", kind)
+    aliases = {calc.name: calc.caption for calc in calculated_columns.calculations if calc not in remaining}
+    return expressions, CalculatedColumns(remaining, calculated_columns.parameters, aliases), fallbacks
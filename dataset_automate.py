@@ -135,9 +135,20 @@ import os
 import xml.etree.ElementTree as ET
 import pandas as pd
 import re
-from tableauhyperapi import HyperProcess, Connection, Telemetry, HyperException
+from tableauhyperapi import HyperException
 import json
+import hashlib
 import numpy as np  # ✅ Required for CASE evaluation
+from twbx_archive import TwbxArchive
+from hyper_session import HyperSession, session_scope
+from hyper_export import (DEFAULT_MEMORY_BUDGET_MB, TableSample, column_names, export_table,
+                          low_cardinality_columns, query_definition, schema_fingerprint, write_schema_file)
+from schema_files import data_file_root, read_schema_file
+from calc_engine import calculation_fingerprint, compile_calculations
+from calc_sql import push_down_calculations
+from export_scheduler import DEFAULT_WORKERS, ExportJob, run_export_jobs
+from excel_export import StreamingExcelWriter, write_csv_table, write_hyper_table
+from run_manifest import RunManifest, table_key
 
 # Set Directories
 BASE_DIR = os.getcwd()
@@ -146,6 +157,37 @@ EXTRACT_DIR = os.path.join(OUTPUT_DIR, "extracted")
 CSV_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "csv_output")
 EXCEL_OUTPUT_FILE = os.path.join(OUTPUT_DIR, "combined_datasets.xlsx")
 MSCRIPT_FILE = os.path.join(OUTPUT_DIR, "powerbi_mscript.txt")
+EXPORT_REPORT_FILE = os.path.join(OUTPUT_DIR, "export_report.json")
+RUN_MANIFEST_FILE = os.path.join(OUTPUT_DIR, "run_manifest.json")
+QUERY_FOLDER = os.path.join(OUTPUT_DIR, "powerbi_queries")
+
+# Power Query types for the Hyper SQL types recorded in the schema files
+M_TYPES = {
+    'BIG_INT': "Int64.Type",
+    'INT': "Int64.Type",
+    'SMALL_INT': "Int64.Type",
+    'DOUBLE': "type number",
+    'NUMERIC': "type number",
+    'BOOL': "type logical",
+    'DATE': "type date",
+    'TIME': "type time",
+    'TIMESTAMP': "type datetime",
+    'TIMESTAMP_TZ': "type datetimezone",
+    'INTERVAL': "type duration",
+    'TEXT': "type text",
+    'VARCHAR': "type text",
+    'CHAR': "type text"
+}
+
+# Export formats and the file extension each is written with
+OUTPUT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'parquet': '.parquet'
+}
+
+# Formats Power BI reads file by file instead of through the combined Excel workbook
+DIRECT_FORMATS = ('csv.gz', 'parquet')
 
 # Ensure Required Directories Exist
 os.makedirs(EXTRACT_DIR, exist_ok=True)
@@ -201,10 +243,115 @@ def find_hyper_files():
 #                     print(f"❌ Error processing {file_path}: {e}")
 #     return table_mapping, table_names
 
-def find_table_names():
-    """Extracts dataset names and table names from the .twb file."""
+def collect_table_names(xml_root, workbook_name, table_mapping, table_names, hyper_datasources=None):
+    """Adds the hyper file -> datasource and table -> datasource names found in one parsed .twb.
+
+    `hyper_datasources`, when given, receives hyper file -> the datasource's internal name, the
+    key calculations are recorded under (see compile_calculations).
+    """
+    # Find all datasources
+    datasources = xml_root.findall(".//datasource")
+    if not datasources:
+        # For single datasource files, try alternative path
+        datasources = xml_root.findall(".//datasources/datasource")
+    
+    # If still no datasources found, create a dummy entry
+    if not datasources:
+        # Find any hyper files referenced directly
+        connections = xml_root.findall(".//connection")
+        for connection in connections:
+            dbname = connection.get('dbname', '')
+            if dbname and dbname.endswith('.hyper'):
+                hyper_filename = os.path.basename(dbname)
+                table_mapping[hyper_filename] = workbook_name
+        return
+    
+    for datasource in datasources:
+        # Get datasource name (try caption first, then name)
+        caption = datasource.get('caption', '').strip()
+        name = datasource.get('name', '').strip()
+        ds_name = caption if caption else name if name else workbook_name
+        
+        # Find connections to hyper files
+        connections = datasource.findall(".//connection")
+        for connection in connections:
+            dbname = connection.get('dbname', '').strip()
+            if dbname and dbname.endswith('.hyper'):
+                hyper_filename = os.path.basename(dbname)
+                table_mapping[hyper_filename] = ds_name
+                if hyper_datasources is not None and name:
+                    hyper_datasources[hyper_filename] = name
+        
+        # Find relations (tables)
+        relations = datasource.findall(".//relation") + datasource.findall(".//relation-table")
+        for relation in relations:
+            table_name = relation.get('name', '').strip() or relation.get('table', '').strip()
+            if table_name:
+                table_names[table_name] = ds_name
+        
+        # If no relations found, use default "Extract" name
+        if not relations:
+            table_names["Extract"] = ds_name
+
+# Table-name lookups keyed by the .twb they were read from; see find_table_names()
+_table_name_cache = {}
+
+def table_names_signature(archive=None):
+    """Identifies the .twb input of find_table_names: the packaged member's CRC and size,
+    or the path, mtime and size of every .twb under EXTRACT_DIR."""
+    if archive is not None:
+        twb_name = archive.twb_name
+        if twb_name is None:
+            return ('archive', os.path.abspath(archive.path), None)
+        return ('archive', os.path.abspath(archive.path), twb_name, archive.member_crc(twb_name), archive.member_size(twb_name))
+
+    twb_files = []
+    for root, _, files in os.walk(EXTRACT_DIR):
+        for file in files:
+            if file.endswith('.twb'):
+                stat = os.stat(os.path.join(root, file))
+                twb_files.append((os.path.join(root, file), stat.st_mtime_ns, stat.st_size))
+    return ('dir', EXTRACT_DIR, tuple(sorted(twb_files)))
+
+def clear_table_name_cache():
+    """Forgets every memoized find_table_names() result."""
+    _table_name_cache.clear()
+
+def find_table_names(archive=None):
+    """Extracts dataset names and table names from the .twb file.
+
+    With a TwbxArchive the .twb is read from the package; otherwise EXTRACT_DIR is scanned.
+    Results are memoized until the underlying .twb files change.
+    """
+    signature = table_names_signature(archive)
+    if signature not in _table_name_cache:
+        _table_name_cache[signature] = _read_table_names(archive)
+    table_mapping, table_names, _ = _table_name_cache[signature]
+    return dict(table_mapping), dict(table_names)
+
+def find_hyper_datasources(archive=None):
+    """{hyper file name: internal datasource name} from the same .twb read as find_table_names()."""
+    signature = table_names_signature(archive)
+    if signature not in _table_name_cache:
+        _table_name_cache[signature] = _read_table_names(archive)
+    return dict(_table_name_cache[signature][2])
+
+def _read_table_names(archive=None):
     table_mapping = {}
     table_names = {}
+    hyper_datasources = {}
+
+    if archive is not None:
+        try:
+            with archive.open_twb() as twb_stream:
+                xml_root = ET.parse(twb_stream).getroot()
+            workbook_name = os.path.splitext(os.path.basename(archive.twb_name))[0]
+            collect_table_names(xml_root, workbook_name, table_mapping, table_names, hyper_datasources)
+        except ET.ParseError as e:
+            print(f"❌ XML Parsing Error in {archive.path}: {e}")
+        except Exception as e:
+            print(f"❌ Error processing {archive.path}: {e}")
+        return table_mapping, table_names, hyper_datasources
     
     for root, _, files in os.walk(EXTRACT_DIR):
         for file in files:
@@ -217,55 +364,14 @@ def find_table_names():
                     
                     # Get workbook name as fallback
                     workbook_name = os.path.splitext(file)[0]
-                    
-                    # Find all datasources
-                    datasources = xml_root.findall(".//datasource")
-                    if not datasources:
-                        # For single datasource files, try alternative path
-                        datasources = xml_root.findall(".//datasources/datasource")
-                    
-                    # If still no datasources found, create a dummy entry
-                    if not datasources:
-                        # Find any hyper files referenced directly
-                        connections = xml_root.findall(".//connection")
-                        for connection in connections:
-                            dbname = connection.get('dbname', '')
-                            if dbname and dbname.endswith('.hyper'):
-                                hyper_filename = os.path.basename(dbname)
-                                table_mapping[hyper_filename] = workbook_name
-                        continue
-                    
-                    for datasource in datasources:
-                        # Get datasource name (try caption first, then name)
-                        caption = datasource.get('caption', '').strip()
-                        name = datasource.get('name', '').strip()
-                        ds_name = caption if caption else name if name else workbook_name
-                        
-                        # Find connections to hyper files
-                        connections = datasource.findall(".//connection")
-                        for connection in connections:
-                            dbname = connection.get('dbname', '').strip()
-                            if dbname and dbname.endswith('.hyper'):
-                                hyper_filename = os.path.basename(dbname)
-                                table_mapping[hyper_filename] = ds_name
-                        
-                        # Find relations (tables)
-                        relations = datasource.findall(".//relation") + datasource.findall(".//relation-table")
-                        for relation in relations:
-                            table_name = relation.get('name', '').strip() or relation.get('table', '').strip()
-                            if table_name:
-                                table_names[table_name] = ds_name
-                        
-                        # If no relations found, use default "Extract" name
-                        if not relations:
-                            table_names["Extract"] = ds_name
+                    collect_table_names(xml_root, workbook_name, table_mapping, table_names, hyper_datasources)
                 
                 except ET.ParseError as e:
                     print(f"❌ XML Parsing Error in {file_path}: {e}")
                 except Exception as e:
                     print(f"❌ Error processing {file_path}: {e}")
     
-    return table_mapping, table_names
+    return table_mapping, table_names, hyper_datasources
 
 # def extract_hyper_to_csv(hyper_file, hyper_filename, calculations_json=None):
 #     """Extracts data from .hyper files with clean table names without hash suffixes."""
@@ -348,74 +454,191 @@ def find_table_names():
 #         print(f"❌ Error extracting data from {hyper_file}: {e}")
 #     return None
 
-def extract_hyper_to_csv(hyper_file, hyper_filename, calculations_json=None):
-    """Extracts data from a .hyper file and saves each table as a CSV."""
-    try:
-        extracted_files = []
-        with HyperProcess(telemetry=Telemetry.SEND_USAGE_DATA_TO_TABLEAU) as hyper:
-            with Connection(endpoint=hyper.endpoint, database=hyper_file) as connection:
-                schema_name = "Extract"
-                tables = connection.catalog.get_table_names(schema_name)
-                if not tables:
-                    print(f"❌ No tables found in {hyper_file}.")
-                    return None
-                
-                # Get the proper table name from our dynamic mapping
-                table_mapping, _ = find_table_names()
-                ds_name = table_mapping.get(hyper_filename, os.path.splitext(hyper_filename)[0])
-                
-                for table in tables:
-                    table_name_str = str(table.name).replace('"', '')  # e.g. 'Sales Order!data_FE11F2FA...'
-
+def output_table_name(table_name_str, table_count, ds_name):
+    """Name of the exported file for one extract table, without extension."""
     # Extract base table name (e.g., 'Sales Order') and clean it
-                    if len(tables) > 1:
-                        base_name = table_name_str.split('!')[0].strip()  # Extract 'Sales Order'
-                        clean_table_name = base_name.replace(" ", "_") + "_data"  # Result: 'Sales_Order_data'
-                        print(f"Using extracted table name for multiple sheets: {clean_table_name}")
-                    else:
+    if table_count > 1:
+        base_name = table_name_str.split('!')[0].strip()  # Extract 'Sales Order'
+        clean_table_name = base_name.replace(" ", "_") + "_data"  # Result: 'Sales_Order_data'
+        print(f"Using extracted table name for multiple sheets: {clean_table_name}")
+    else:
         # Single sheet logic (keep existing)
-                        clean_table_name = ds_name if ds_name else re.sub(r'_[A-F0-9]{32}$', '', table_name_str).replace("!", "_")
-                        print(f"Using cleaned table name for single sheet: {clean_table_name}")
-                    # Use the actual table name when there are multiple sheets
-                    # if len(tables) > 1:
-                    #     # Use the extracted table name (or clean it)
-                    #     clean_table_name = re.sub(r'[\\/*?:"<>|]', "_", table_name_str)
-                    #     print(f"Using extracted table name for multiple sheets: {clean_table_name}")
-                    # else:
-                    #     # For single sheet, keep the previous logic
-                    #     print(f"Using cleaned table name for single sheet: {clean_table_name}")
-                    
-                    # Final CSV filename
-                    csv_filename = clean_table_name + ".csv"
-                    csv_filepath = os.path.join(CSV_OUTPUT_DIR, csv_filename)
-                    
-                    # Handle duplicate filenames by appending a number
-                    counter = 1
-                    while os.path.exists(csv_filepath):
-                        csv_filepath = os.path.join(CSV_OUTPUT_DIR, f"{clean_table_name}_{counter}.csv")
-                        counter += 1
-                    
-                    # Rest of your extraction logic remains the same...
-                    columns = connection.catalog.get_table_definition(table).columns
-                    column_names = [str(col.name).replace('"', '') for col in columns]
-                    query = f"SELECT * FROM {table}"
-                    rows = connection.execute_query(query)
-                    data = pd.DataFrame(rows, columns=column_names)
-                    
-                    if data.empty:
-                        print(f"⚠ Table {clean_table_name} is empty. Skipping...")
-                        continue
-                        
-                    # Handle calculations if provided
-                    if calculations_json:
-                        # Your existing calculations logic...
-                        pass
-                    
-                    data.to_csv(csv_filepath, index=False)
-                    extracted_files.append(csv_filepath)
-                    print(f"✅ Data saved to {csv_filepath}")
-                    
-        return extracted_files
+        clean_table_name = ds_name if ds_name else re.sub(r'_[A-F0-9]{32}$', '', table_name_str).replace("!", "_")
+        print(f"Using cleaned table name for single sheet: {clean_table_name}")
+    return clean_table_name
+
+def unique_output_path(clean_table_name, extension, reserved=()):
+    """First free path for `clean_table_name` in CSV_OUTPUT_DIR, also avoiding paths already planned."""
+    csv_filepath = os.path.join(CSV_OUTPUT_DIR, clean_table_name + extension)
+
+    # Handle duplicate filenames by appending a number
+    counter = 1
+    while os.path.exists(csv_filepath) or csv_filepath in reserved:
+        csv_filepath = os.path.join(CSV_OUTPUT_DIR, f"{clean_table_name}_{counter}{extension}")
+        counter += 1
+    return csv_filepath
+
+def plan_hyper_exports(hyper_file, hyper_filename, table_mapping, session, output_format='csv', reserved=None,
+                       manifest=None, calculations_json=None, sample=None, categorical=False, datasource=None):
+    """Lists the extract tables of one .hyper file as ExportJobs with their output paths.
+
+    Paths are assigned here, before any export runs, so parallel workers never race for a name.
+    With a RunManifest, a table keeps the path it was exported to before and is marked
+    `current` when neither the .hyper file nor the table schema changed since. Calculated
+    fields from `calculations_json` whose inputs are all columns of a table, and that belong to
+    `datasource` (the .hyper file's internal datasource name) when it is known, are attached to
+    its job and materialized during export: translated to SQL for Hyper where possible
+    (calc_sql), otherwise evaluated by calc_engine. With a TableSample only the sampled rows
+    of each table are exported. With categorical=True, text columns with few distinct values
+    per row (counted by Hyper) are exported dictionary-encoded and loaded as categoricals.
+    """
+    extension = OUTPUT_FORMATS[output_format]
+    reserved = set() if reserved is None else reserved
+    source_sha256 = manifest.source_digest(hyper_file) if manifest is not None else None
+    with session.connect(hyper_file) as connection:
+        schema_name = "Extract"
+        tables = connection.catalog.get_table_names(schema_name)
+        definitions = {str(table): connection.catalog.get_table_definition(table) for table in tables}
+        calculations = {}
+        for table in tables:
+            compiled, skipped = compile_calculations(calculations_json, column_names(definitions[str(table)]),
+                                                     datasource=datasource)
+            # Hyper computes what translates to SQL in the export query; calc_engine does the rest
+            expressions, remaining, fallbacks = push_down_calculations(connection, table, compiled)
+            calculations[str(table)] = (compiled, expressions, remaining, fallbacks, skipped)
+        categorical_columns = {
+            str(table): low_cardinality_columns(connection, table) if categorical else []
+            for table in tables
+        }
+    if not tables:
+        print(f"❌ No tables found in {hyper_file}.")
+        return []
+
+    # Get the proper table name from our dynamic mapping
+    ds_name = table_mapping.get(hyper_filename, os.path.splitext(hyper_filename)[0])
+
+    jobs = []
+    for table in tables:
+        table_name_str = str(table.name).replace('"', '')  # e.g. 'Sales Order!data_FE11F2FA...'
+        clean_table_name = output_table_name(table_name_str, len(tables), ds_name)
+        key = table_key(hyper_file, table)
+        csv_filepath = manifest.output_path(key, output_format) if manifest is not None else None
+        if csv_filepath is None or csv_filepath in reserved:
+            csv_filepath = unique_output_path(clean_table_name, extension, reserved)
+        reserved.add(csv_filepath)
+
+        job = ExportJob(hyper_file, table, csv_filepath, clean_table_name)
+        job.key = key
+        job.source_sha256 = source_sha256
+        compiled, job.expressions, job.calculations, job.calculation_fallbacks, job.skipped_calculations = \
+            calculations[str(table)]
+        job.schema = schema_fingerprint(definitions[str(table)])
+        if compiled:
+            # Changing a formula re-exports the table just like a schema change
+            job.schema += ":" + hashlib.sha256(calculation_fingerprint(compiled).encode('utf-8')).hexdigest()[:16]
+            if job.expressions:
+                print(f"➕ {clean_table_name}: Hyper computes {', '.join(name for name, _ in job.expressions)}")
+            if job.calculations:
+                print(f"➕ {clean_table_name}: computing {', '.join(job.calculations.names)} in pandas during export")
+        job.categorical_columns = categorical_columns[str(table)]
+        if job.categorical_columns:
+            # Files written before the columns were dictionary-encoded are re-exported
+            job.schema += ":categorical:" + ",".join(job.categorical_columns)
+            print(f"🏷 {clean_table_name}: categorical {', '.join(job.categorical_columns)}")
+        job.sample = sample
+        job.current = (manifest is not None
+                       and manifest.is_current(key, source_sha256, job.schema, output_format,
+                                               sample.describe() if sample else None)
+                       and read_schema_file(csv_filepath) is not None)
+        if job.current and manifest.tables[key].get('sample') is None:
+            # An up-to-date full export already covers any sample
+            job.sample = None
+        jobs.append(job)
+    return jobs
+
+def export_hyper_tables(jobs, session, chunk_rows=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+                        output_format='csv', engine='auto', workers=DEFAULT_WORKERS):
+    """Exports planned tables concurrently and returns the scheduler's run report.
+
+    Calculated fields pushed down to SQL are part of the export query, so those tables may still
+    be written by Hyper with COPY. Tables with calculations left to calc_engine stream through
+    the Python path, where they are computed column-wise on every chunk. Each table's record
+    lists which calculations ran where, and why the others were not pushed down.
+    """
+    def run_job(connection, job, worker_budget_mb):
+        calculations = job.calculations or None
+        table_engine = 'python' if calculations else engine
+
+        # COPY in Hyper, or stream the table in row chunks so memory stays within the budget
+        stats = export_table(connection, job.table, job.path, output_format, chunk_rows, worker_budget_mb, table_engine,
+                             transform=calculations, expressions=job.expressions, sample=job.sample,
+                             dictionary_columns=job.categorical_columns)
+        if stats['rows']:
+            # Names, Hyper types and nullability travel with the file for typed loads downstream
+            write_schema_file(job.path, query_definition(connection, job.table, job.expressions), job.label,
+                              stats.get('computed_columns'), job.sample, job.categorical_columns)
+        if job.sample:
+            stats['sample'] = job.sample.describe()
+        if job.categorical_columns:
+            stats['categorical_columns'] = job.categorical_columns
+        if job.expressions or calculations:
+            stats['calculations'] = {
+                'pushed_down': [name for name, _ in job.expressions],
+                'python': calculations.names if calculations else [],
+                'not_pushed_down': job.calculation_fallbacks
+            }
+            if calculations and calculations.failed:
+                # Left as null columns; the rest of the table is exported as usual
+                stats['calculations']['failed'] = dict(calculations.failed)
+                for name, error in calculations.failed.items():
+                    print(f"⚠ {job.label}: calculation {name} failed and is exported as nulls ({error})")
+        return stats
+
+    report = run_export_jobs(jobs, session, run_job, workers, memory_budget_mb)
+    for record in report['tables']:
+        if record['status'] == 'empty':
+            print(f"⚠ Table {record['table']} is empty. Skipping...")
+        elif record['status'] == 'failed':
+            print(f"❌ Error exporting {record['table']} from {record['hyper_file']}: {record['error']}")
+        else:
+            print(f"✅ Data saved to {record['path']} ({record['rows']:,} rows via {record['engine']}, "
+                  f"{record['rows_per_sec'] or 0:,} rows/s, peak RSS {record['peak_rss_mb']} MB)")
+    return report
+
+def save_export_report(report, report_file=EXPORT_REPORT_FILE):
+    with open(report_file, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"📊 Export report saved to: {report_file} ({report['elapsed_seconds']}s wall, "
+          f"{report['table_seconds']}s across {report['workers']} workers)")
+
+def extract_hyper_to_csv(hyper_file, hyper_filename, calculations_json=None, table_mapping=None, session=None,
+                         chunk_rows=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, output_format='csv',
+                         engine='auto', workers=DEFAULT_WORKERS, archive=None):
+    """Extracts data from a .hyper file and saves each table as a CSV.
+
+    Output files are named from `table_mapping` (see find_table_names); pass it, or the workbook's
+    TwbxArchive to read it from. The .twb is no longer extracted, so there is nothing on disk to
+    fall back to.
+
+    With output_format='parquet' each table is written as typed, compressed Parquet instead, and
+    with 'csv.gz' as gzip-compressed CSV. Hyper writes the files itself with COPY ... TO where it
+    can (engine='auto'); otherwise rows are streamed through Python in chunks of `chunk_rows`, or
+    as many as fit in `memory_budget_mb`. Up to `workers` tables are exported at once.
+    """
+    if table_mapping is None:
+        if archive is None:
+            raise ValueError("extract_hyper_to_csv needs the workbook's table_mapping or its TwbxArchive")
+        table_mapping, _ = find_table_names(archive)
+    datasource = find_hyper_datasources(archive).get(hyper_filename) if archive is not None else None
+    try:
+        with session_scope(session) as hyper:
+            jobs = plan_hyper_exports(hyper_file, hyper_filename, table_mapping, hyper, output_format,
+                                      calculations_json=calculations_json, datasource=datasource)
+            if not jobs:
+                return None
+            report = export_hyper_tables(jobs, hyper, chunk_rows, memory_budget_mb,
+                                         output_format, engine, workers)
+        return [record['path'] for record in report['tables'] if record['status'] == 'success']
     except HyperException as e:
         print(f"❌ Hyper API error processing {hyper_file}: {e}")
     except Exception as e:
@@ -512,11 +735,11 @@ def extract_hyper_to_csv(hyper_file, hyper_filename, calculations_json=None):
 #     return None
 
 
-def list_tables_in_hyper(hyper_file):
+def list_tables_in_hyper(hyper_file, session=None):
     """Lists all tables inside a .hyper file."""
     try:
-        with HyperProcess(telemetry=Telemetry.SEND_USAGE_DATA_TO_TABLEAU) as hyper:
-            with Connection(endpoint=hyper.endpoint, database=hyper_file) as connection:
+        with session_scope(session) as hyper:
+            with hyper.connect(hyper_file) as connection:
                 schema_name = "Extract"
                 tables = connection.catalog.get_table_names(schema_name)
                 if not tables:
@@ -531,44 +754,68 @@ def list_tables_in_hyper(hyper_file):
     return []
 
 def csv_to_excel(csv_folder, excel_file):
-    """Converts all CSV files in the folder to sheets in a single Excel file."""
+    """Converts all CSV files in the folder to sheets in a single Excel file.
+
+    CSVs are streamed in chunks through a write-only workbook, so memory does not grow with the
+    data. Returns {table sheet: [sheets]}; tables over Excel's row limit span numbered sheets.
+    """
     csv_files = [f for f in os.listdir(csv_folder) if f.endswith(".csv")]
     if not csv_files:
         print(f"❌ No CSV files found in {csv_folder} to convert to Excel.")
-        return []
-    
-    sheet_names = []
-    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+        return {}
+
+    with StreamingExcelWriter(excel_file) as writer:
         for csv_file in csv_files:
             csv_path = os.path.join(csv_folder, csv_file)
-            df = pd.read_csv(csv_path)
             # Use the CSV filename (without .csv) as the sheet name, sanitized
-            sheet_name = os.path.splitext(csv_file)[0]
-            # Sanitize sheet name: replace invalid chars and truncate to 31 chars
-            sheet_name = re.sub(r'[\/:*?"<>|]', '_', sheet_name)
-            if len(sheet_name) > 31:
-                sheet_name = sheet_name[:31]
-            # Ensure uniqueness by appending a counter if necessary
-            base_name = sheet_name
-            counter = 1
-            while sheet_name in sheet_names:
-                suffix = f"_{counter}"
-                sheet_name = base_name[:31 - len(suffix)] + suffix
-                counter += 1
-            sheet_names.append(sheet_name)
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            print(f"✅ Converted {csv_file} to sheet '{sheet_name}' in {excel_file}")
-    return sheet_names
-
-def generate_mscript_for_powerbi(excel_file, sheet_names):
-    """Generates a Power BI M script for loading data from the Excel file."""
+            sheets = write_csv_table(writer, os.path.splitext(csv_file)[0], csv_path)
+            print(f"✅ Converted {csv_file} to sheet(s) {sheets} in {excel_file}")
+    return writer.sheet_parts
+
+def hyper_to_excel(jobs, session, excel_file):
+    """Writes exported tables into a single Excel file straight from Hyper, without re-reading CSVs.
+
+    Same output as csv_to_excel; one sheet per table, continued on numbered sheets past Excel's
+    row limit. Returns {job.path: [sheets]}, so each table's sheets are tied to the file it was
+    exported to rather than to its position.
+    """
+    if not jobs:
+        print("❌ No tables to convert to Excel.")
+        return {}
+
+    table_sheets = {}
+    with StreamingExcelWriter(excel_file) as writer:
+        for job in jobs:
+            with session.connect(job.hyper_file) as connection:
+                sheets = write_hyper_table(writer, os.path.splitext(os.path.basename(job.path))[0], connection, job.table,
+                                           transform=job.calculations or None, expressions=job.expressions,
+                                           sample=job.sample)
+            table_sheets[job.path] = sheets
+            print(f"✅ Wrote {job.label} to sheet(s) {sheets} in {excel_file}")
+    return table_sheets
+
+def generate_mscript_for_powerbi(excel_file, sheet_names, column_schemas=None):
+    """Generates a Power BI M script for loading data from the Excel file.
+
+    `sheet_names` is a list of sheets or, as returned by csv_to_excel, a {table: [sheets]} mapping;
+    a table split across numbered sheets is re-appended into one table. With `column_schemas`
+    ({sheet: schema file columns}) the column types are applied statically; without it they are
+    detected at refresh time and incomplete and duplicate rows are dropped, as before.
+    """
     if not sheet_names:
         return "// Error: No sheets found."
     
+    sheet_parts = sheet_names if isinstance(sheet_names, dict) else {sheet: [sheet] for sheet in sheet_names}
     excel_file_path = excel_file.replace("\\", "\\\\")
     dataset_name = "Excel_Dataset"
-    selected_sheets_str = ", ".join(f'"{sheet}"' for sheet in sheet_names)
-    default_sheet = sheet_names[0] if sheet_names else ""
+    selected_sheets_str = ", ".join(f'"{sheet}"' for sheet in sheet_parts)
+    sheet_parts_str = ", ".join(
+        f'#"{sheet}" = {{' + ", ".join(f'"{part}"' for part in parts) + '}' for sheet, parts in sheet_parts.items()
+    )
+    if column_schemas:
+        typing_steps = static_typing_steps(dataset_name, column_schemas)
+    else:
+        typing_steps = detected_typing_steps(dataset_name)
     
     mscript = f'''
     let
@@ -578,31 +825,62 @@ def generate_mscript_for_powerbi(excel_file, sheet_names):
         // Parameter for sheet selection
         SelectedSheetName = "",
 
-        // Filter sheets of interest
+        // Filter sheets of interest; tables over Excel's row limit continue on numbered sheets
         SelectedSheets = {{{selected_sheets_str}}},
-        FilteredSheets = Table.SelectRows(Source_{dataset_name}, each List.Contains(SelectedSheets, [Name])),
+        SheetParts = [{sheet_parts_str}],
+        FilteredSheets = Table.SelectRows(Source_{dataset_name}, each List.Contains(List.Combine(Record.FieldValues(SheetParts)), [Name])),
 
         // Validate selected sheet exists
-        TargetSheet = Table.SelectRows(FilteredSheets, each [Name] = SelectedSheetName),
+        TargetParts = Record.FieldOrDefault(SheetParts, SelectedSheetName, {{}}),
+        TargetSheet = Table.SelectRows(FilteredSheets, each List.Contains(TargetParts, [Name])),
         CheckSheet = if Table.IsEmpty(TargetSheet) then 
             error Error.Record(
                 "Sheet not found", 
-                "Available sheets: " & Text.Combine(FilteredSheets[Name], ", "), 
+                "Available sheets: " & Text.Combine(SelectedSheets, ", "), 
                 [RequestedSheet = SelectedSheetName]
             )
         else TargetSheet,
 
-        // Extract sheet data
-        SheetData = try CheckSheet{{0}}[Data] otherwise error Error.Record(
+        // Extract sheet data, one table per sheet part in order
+        SheetData = try List.Transform(TargetParts, each CheckSheet{{[Name = _]}}[Data]) otherwise error Error.Record(
             "Data extraction failed",
             "Verify sheet structure",
             [SheetName = SelectedSheetName, AvailableColumns = Table.ColumnNames(CheckSheet)]
         ),
 
-        // Promote headers
-        PromotedHeaders = Table.PromoteHeaders(SheetData, [PromoteAllScalars=true]),
+        // Promote headers and re-append continuation sheets
+        PromotedHeaders = Table.Combine(List.Transform(SheetData, each Table.PromoteHeaders(_, [PromoteAllScalars=true]))),
         
-        // Detect and apply column types dynamically
+        {typing_steps}
+    in
+        FinalTable_{dataset_name}
+    '''
+    return mscript
+
+def m_type(hyper_type):
+    """M type for a Hyper SQL type from a schema file; unknown types load as text."""
+    return M_TYPES.get(hyper_type.split('(')[0].strip().upper(), "type text")
+
+def m_text(value):
+    return '"' + value.replace('"', '""') + '"'
+
+def static_typing_steps(dataset_name, column_schemas):
+    """M steps applying the exported column types of the selected sheet, known at generation time."""
+    column_types_str = ",\n            ".join(
+        f'#{m_text(sheet)} = {{' + ", ".join(f"{{{m_text(col['name'])}, {m_type(col['type'])}}}" for col in columns) + '}'
+        for sheet, columns in column_schemas.items()
+    )
+    return f'''// Column types recorded in each table's schema file at export
+        ColumnTypes = [
+            {column_types_str}
+        ],
+        FinalTable_{dataset_name} = Table.TransformColumnTypes(
+            PromotedHeaders, Record.FieldOrDefault(ColumnTypes, SelectedSheetName, {{}})
+        )'''
+
+def detected_typing_steps(dataset_name):
+    """M steps sniffing column types from the first value, for sheets without a schema file."""
+    return f'''// Detect and apply column types dynamically
        ColumnsToTransform = Table.ColumnNames(PromotedHeaders),
     ChangedTypes = Table.TransformColumnTypes(
         PromotedHeaders,
@@ -626,30 +904,159 @@ def generate_mscript_for_powerbi(excel_file, sheet_names):
 
         // Clean data
         CleanedData = Table.SelectRows(ChangedTypes, each not List.Contains(Record.FieldValues(_), null)),
-        FinalTable_{dataset_name} = Table.Distinct(CleanedData)
-    in
-        FinalTable_{dataset_name}
-    '''
-    return mscript
+        FinalTable_{dataset_name} = Table.Distinct(CleanedData)'''
+
+def table_query_name(data_file):
+    return os.path.basename(data_file_root(data_file))
+
+def generate_table_query(data_file, buffer=False):
+    """M query loading one exported table from its own file, typed from its schema file.
+
+    CSVs are parsed with invariant number formats ("en-US") so decimals survive any Power BI
+    locale, and .csv.gz files are decompressed on read; Parquet already carries its types. buffer=True adds a Table.Buffer step for tables
+    that several downstream queries read.
+    """
+    file_path = m_text(data_file)
+    if data_file.endswith(".parquet"):
+        steps = [f"Source = Parquet.Document(File.Contents({file_path}))"]
+    else:
+        contents = f"File.Contents({file_path})"
+        if data_file.endswith(".gz"):
+            contents = f"Binary.Decompress({contents}, Compression.GZip)"
+        steps = [
+            f"Source = Csv.Document({contents}, "
+            f"[Delimiter = \",\", Encoding = 65001, QuoteStyle = QuoteStyle.Csv])",
+            "PromotedHeaders = Table.PromoteHeaders(Source, [PromoteAllScalars = true])"
+        ]
+        columns = read_schema_file(data_file)
+        if columns:
+            column_types = ", ".join(f"{{{m_text(col['name'])}, {m_type(col['type'])}}}" for col in columns)
+            steps.append(f"ChangedTypes = Table.TransformColumnTypes(PromotedHeaders, {{{column_types}}}, \"en-US\")")
+    if buffer:
+        previous_step = steps[-1].split(" = ")[0]
+        steps.append(f"Buffered = Table.Buffer({previous_step})")
+    last_step = steps[-1].split(" = ")[0]
+    body = ",\n    ".join(steps)
+    return f"let\n    {body}\nin\n    {last_step}"
+
+def generate_table_queries(data_files, buffer=False):
+    """One named M query per exported table: {query name: M}. Names are unique within the set."""
+    queries = {}
+    for data_file in data_files:
+        query_name = table_query_name(data_file)
+        base_name = query_name
+        counter = 1
+        while query_name in queries:
+            query_name = f"{base_name}_{counter}"
+            counter += 1
+        queries[query_name] = generate_table_query(data_file, buffer)
+    return queries
 
-def process_twbx_file(twbx_file):
-    """Processes the .twbx file: extracts data, converts CSVs to Excel, and generates M script."""
-    # Step 1: Extract .twbx
-    extract_twbx(twbx_file)
+def write_query_folder(queries, folder=QUERY_FOLDER):
+    """Writes each query as <name>.pq plus Section1.m holding all of them as shared queries.
 
-    # Step 2: Extract dataset names & table names from .twb
-    table_mapping, table_names = find_table_names()
+    The .pq files paste into Power BI's blank-query editor one by one; Section1.m is the
+    section document Power Query keeps for a whole model. Queries from earlier runs are removed.
+    """
+    os.makedirs(folder, exist_ok=True)
+    for file in os.listdir(folder):
+        if file.endswith(".pq"):
+            os.remove(os.path.join(folder, file))
 
-    # Step 3: Find .hyper files
-    hyper_files = find_hyper_files()
-    if not hyper_files:
-        print(f"❌ No .hyper files found in {twbx_file}. Skipping extraction...")
+    for query_name, mscript in queries.items():
+        file_name = re.sub(r'[\\/:*?"<>|]', '_', query_name) + ".pq"
+        with open(os.path.join(folder, file_name), "w", encoding="utf-8") as file:
+            file.write(mscript + "\n")
+
+    section = ["section Section1;"]
+    for query_name, mscript in queries.items():
+        section.append(f"shared #{m_text(query_name)} = {mscript};")
+    with open(os.path.join(folder, "Section1.m"), "w", encoding="utf-8") as file:
+        file.write("\n\n".join(section) + "\n")
+    print(f"✅ {len(queries)} Power Query queries saved to: {folder}")
+    return folder
+
+def generate_mscript_for_files(data_files):
+    """Generates a Power BI M script with one typed query per exported Parquet or .csv.gz file.
+
+    Parquet carries the column types from Hyper, and CSV columns are typed from their schema
+    files, so no type detection is needed.
+    """
+    if not data_files:
+        return "// Error: No exported files found."
+
+    queries = generate_table_queries(data_files)
+    return "\n\n".join(f"// {query_name}\n{mscript}" for query_name, mscript in queries.items())
+
+def process_twbx_file(twbx_file, session=None, output_format='csv', engine='auto', workers=DEFAULT_WORKERS, force=False,
+                      buffer_queries=False, sample_rows=None, sample_by=None, sample_seed=0, categorical=False):
+    """Processes the .twbx file: extracts data, converts CSVs to Excel, and generates M script.
+
+    Pass a HyperSession to reuse one Hyper process across several workbooks. With
+    output_format='parquet' tables are exported as typed Parquet and the M script reads
+    them directly, skipping the Excel step; output_format='csv.gz' does the same with
+    gzip-compressed CSVs, which Power BI decompresses on refresh. `engine` picks COPY or Python export (see
+    hyper_export.export_table). Tables of all .hyper files are exported together, up to
+    `workers` at a time, and their timings are written to export_report.json.
+
+    Runs are incremental: run_manifest.json remembers every exported table, so tables whose
+    .hyper file and schema are unchanged are skipped and changed ones overwrite their previous
+    file. Pass force=True to re-export everything.
+
+    Besides the combined script, output/powerbi_queries/ gets one typed query per table that
+    reads the table's own file; buffer_queries=True wraps each in Table.Buffer.
+
+    For fast iteration on the visual generators, sample_rows=N exports a deterministic sample of
+    about N rows per table (the same `sample_seed` draws the same rows; `sample_by` stratifies it
+    by a column) with the tables' exact schemas. The manifest marks those files as samples, so
+    the next full run replaces them.
+
+    categorical=True exports low-cardinality text columns dictionary-encoded and marks them in
+    each table's .schema.json, so the generators load them as pandas categoricals.
+    """
+    if session is None:
+        with HyperSession() as session:
+            process_twbx_file(twbx_file, session, output_format, engine, workers, force, buffer_queries,
+                              sample_rows, sample_by, sample_seed, categorical)
+            session.report()
+        return
+
+    # Step 1: Open .twbx in place; hyper files are extracted only when exported
+    try:
+        archive = TwbxArchive(twbx_file, EXTRACT_DIR)
+    except zipfile.BadZipFile:
+        print(f"❌ Error: {twbx_file} is not a valid ZIP file.")
+        return
+    except Exception as e:
+        print(f"❌ Error opening {twbx_file}: {e}")
         return
 
+    with archive:
+        # Step 2: Extract dataset names & table names from .twb
+        table_mapping, table_names = find_table_names(archive)
+        hyper_datasources = find_hyper_datasources(archive)
+
+        # Step 3: Find .hyper files and materialize them for the export stages
+        hyper_members = archive.hyper_members()
+        if not hyper_members:
+            print(f"❌ No .hyper files found in {twbx_file}. Skipping extraction...")
+            return
+        try:
+            hyper_files = {
+                hyper_filename: archive.materialize(member)
+                for hyper_filename, member in hyper_members.items()
+            }
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+    # The per-file flow started one HyperProcess to list each .hyper file's tables and another
+    # to export them; this run uses the shared session instead
+    session.replaces_starts(2 * len(hyper_files))
+
     # Step 4: Extract table names from .hyper files
     all_tables = []
     for hyper_filename, hyper_file_path in hyper_files.items():
-        table_names_from_hyper = list_tables_in_hyper(hyper_file_path)
+        table_names_from_hyper = list_tables_in_hyper(hyper_file_path, session)
         all_tables.extend(table_names_from_hyper)
 
     print("\n📊 Extracted Table Names:")
@@ -664,27 +1071,104 @@ def process_twbx_file(twbx_file):
             calculations_json = data.get("calculations", {})
 
 
-    # Step 5: Extract data to CSV files
+    # Step 5: Extract data to CSV files, every table of every .hyper file on one scheduler;
+    # tables the run manifest shows as unchanged keep their existing file
+    manifest = RunManifest.load(RUN_MANIFEST_FILE)
+    sample = TableSample(sample_rows, sample_seed, sample_by) if sample_rows else None
+    if sample:
+        print(f"\n🧪 Dev mode: exporting a sample of about {sample.rows:,} rows per table"
+              + (f", stratified by {sample_by}" if sample_by else ""))
+    jobs = []
+    reserved = set()
     for hyper_filename, hyper_file_path in hyper_files.items():
-        extract_hyper_to_csv(hyper_file_path, hyper_filename, calculations_json)
-    print(f"\n✅ Dataset extraction completed! CSV files saved in {CSV_OUTPUT_DIR}")
+        jobs.extend(plan_hyper_exports(hyper_file_path, hyper_filename, table_mapping, session, output_format, reserved,
+                                       manifest, calculations_json, sample, categorical,
+                                       hyper_datasources.get(hyper_filename)))
+    pending = [job for job in jobs if force or not job.current]
+    report = export_hyper_tables(pending, session, output_format=output_format, engine=engine, workers=workers)
+
+    jobs_by_path = {job.path: job for job in pending}
+    for record in report['tables']:
+        job = jobs_by_path[record['path']]
+        if record['status'] == 'success':
+            manifest.record(job.key, job.source_sha256, job.schema, output_format, job.path, record['rows'],
+                            record.get('sample'))
+        elif record['status'] == 'empty':
+            manifest.forget(job.key)
+    for job in jobs:
+        if job not in pending:
+            print(f"⏭ {job.label} unchanged since the last run, keeping {job.path}")
+            report['tables'].append({'hyper_file': job.hyper_file, 'table': job.label, 'path': job.path,
+                                     'rows': manifest.tables[job.key]['rows'], 'status': 'skipped'})
+    report['skipped'] = len(jobs) - len(pending)
+    manifest.save()
+    save_export_report(report)
+
+    exported = {record['path'] for record in report['tables'] if record['status'] in ('success', 'skipped')}
+    exported_files = [job.path for job in jobs if job.path in exported]
+    print(f"\n✅ Dataset extraction completed! {output_format.upper()} files saved in {CSV_OUTPUT_DIR}")
 
-    # Step 6: Convert CSV files to a single Excel file
-    sheet_names = csv_to_excel(CSV_OUTPUT_DIR, EXCEL_OUTPUT_FILE)
+    # One typed query per table, each reading its own file, so Power BI can refresh them in parallel
+    write_query_folder(generate_table_queries(exported_files, buffer=buffer_queries))
+
+    if output_format in DIRECT_FORMATS:
+        # Parquet keeps the Hyper types and compressed CSVs stay small, so Power BI reads the files directly
+        mscript = generate_mscript_for_files(exported_files)
+        with open(MSCRIPT_FILE, "w", encoding="utf-8") as file:
+            file.write(mscript)
+        print(f"\n✅ Power BI M script saved to: {MSCRIPT_FILE}")
+        return
+
+    # Step 6: Stream the exported tables from Hyper into a single Excel file, unless the
+    # existing one was built from exactly the same table versions
+    excel_jobs = [job for job in jobs if job.path in exported]
+    table_states = [[job.key, job.source_sha256, job.schema, job.sample.describe() if job.sample else None]
+                    for job in excel_jobs]
+    table_sheets = manifest.excel_table_sheets(EXCEL_OUTPUT_FILE, table_states)
+    if table_sheets is not None:
+        print(f"\n⏭ {EXCEL_OUTPUT_FILE} is up to date.")
+    else:
+        table_sheets = hyper_to_excel(excel_jobs, session, EXCEL_OUTPUT_FILE)
+        manifest.record_excel(EXCEL_OUTPUT_FILE, table_states, table_sheets)
+        manifest.save()
+    sheet_names = {parts[0]: parts for parts in table_sheets.values()}
     if sheet_names:
-        print(f"\n✅ All CSVs combined into {EXCEL_OUTPUT_FILE} with {len(sheet_names)} sheets.")
+        sheet_count = sum(len(parts) for parts in sheet_names.values())
+        print(f"\n✅ All tables combined into {EXCEL_OUTPUT_FILE} with {sheet_count} sheets.")
 
-    # Step 7: Generate Power BI M script using the Excel file
-    mscript = generate_mscript_for_powerbi(EXCEL_OUTPUT_FILE, sheet_names)
+    # Step 7: Generate Power BI M script using the Excel file, typed from the schema files
+    # of the tables each sheet was written from
+    column_schemas = {parts[0]: read_schema_file(path) for path, parts in table_sheets.items()}
+    if not all(column_schemas.values()):
+        column_schemas = None
+    mscript = generate_mscript_for_powerbi(EXCEL_OUTPUT_FILE, sheet_names, column_schemas)
     with open(MSCRIPT_FILE, "w", encoding="utf-8") as file:
         file.write(mscript)
     print(f"\n✅ Power BI M script saved to: {MSCRIPT_FILE}")
 
 #✅ *Execute when run directly*
 if __name__ == "__main__":
-    twbx_file = input("🔹 Enter the path to the Tableau .twbx file: ").strip()
-    
-    if not os.path.exists(twbx_file):
-        print("❌ Error: The provided .twbx file does not exist.")
-    else:
-        process_twbx_file(twbx_file)
+    # One path per prompt, since paths may contain commas; a blank line ends the list
+    twbx_files = []
+    while True:
+        prompt = "🔹 Enter the path to the Tableau .twbx file" + (" (blank to start)" if twbx_files else "") + ": "
+        twbx_file = input(prompt).strip()
+        if not twbx_file:
+            break
+        twbx_files.append(twbx_file)
+    output_format = input("🔹 Output format [csv/csv.gz/parquet] (default csv): ").strip().lower() or 'csv'
+    if output_format not in OUTPUT_FORMATS:
+        print(f"⚠ Unknown output format '{output_format}', using csv.")
+        output_format = 'csv'
+    sample_input = input("🔹 Rows per table for a quick sampled dev run (blank for a full export): ").strip()
+    sample_rows = int(sample_input) if sample_input.isdigit() else None
+    categorical = input("🔹 Export low-cardinality text columns as categoricals? [y/N]: ").strip().lower() == 'y'
+
+    # One Hyper process serves every workbook in the run
+    with HyperSession() as session:
+        for twbx_file in twbx_files:
+            if not os.path.exists(twbx_file):
+                print(f"❌ Error: The provided .twbx file does not exist: {twbx_file}")
+            else:
+                process_twbx_file(twbx_file, session, output_format, sample_rows=sample_rows, categorical=categorical)
+        session.report()
@@ -1,11 +1,11 @@
 import os
 import json
-import pandas as pd
 import google.generativeai as genai
 import re
 import uuid
 import time
 from google.api_core import exceptions as api_exceptions
+from dataset_catalog import DatasetCatalog
 import sys 
 
 # === Configuration Paths ===
@@ -469,52 +469,26 @@ def extract_bullet_fields(chart_entry: dict) -> dict:
 # === Load Datasets ===
 def load_all_datasets():
     """
-    Load all CSV datasets from the specified directory and ensure numeric columns are correctly typed.
-    Dataset names are cleaned from UUIDs/suffixes.
+    Catalog all exported datasets in the specified directory without loading their data.
+    Column names and dtypes come from each file's header, schema file and a small sample;
+    a dataset's rows are only read when its load() is called. Dataset names are cleaned
+    from UUIDs/suffixes.
     """
     if not os.path.exists(CSV_OUTPUT_DIR):
         print(f"❌ CSV folder not found at: {CSV_OUTPUT_DIR}.")
         return {}
 
-    dataset_map = {}
     print("\n📌 Loading Datasets...")
-    for file in os.listdir(CSV_OUTPUT_DIR):
-        if file.endswith(".csv"):
-            raw_dataset_name = os.path.splitext(file)[0].strip()
-            cleaned_dataset_name = clean_dataset_filename_for_reference(raw_dataset_name)
-            
-            file_path = os.path.join(CSV_OUTPUT_DIR, file)
-            try:
-                df = pd.read_csv(file_path, encoding='utf-8-sig', on_bad_lines='skip')
-                
-                for col in df.columns:
-                    if pd.api.types.is_object_dtype(df[col]):
-                        if is_likely_identifier_or_category_column(col):
-                            print(f"  ℹ️ Keeping column '{col}' in '{raw_dataset_name}.csv' as string type (likely an identifier/category).")
-                            continue 
-                        
-                        original_dtype = df[col].dtype
-                        converted_col = pd.to_numeric(df[col], errors='coerce')
-                        
-                        if pd.api.types.is_numeric_dtype(converted_col) and not converted_col.isnull().all():
-                            if not df[col].equals(converted_col): 
-                                df[col] = converted_col
-                                if pd.isna(df[col]).sum() > 0:
-                                    num_nans = pd.isna(df[col]).sum()
-                                    print(f"  ⚠ Warning: Column '{col}' in '{raw_dataset_name}.csv' ({original_dtype}) converted to numeric, with {num_nans} non-numeric values now NaN.")
-                                else:
-                                    print(f"  ✅ Converted column '{col}' in '{raw_dataset_name}.csv' to numeric.")
-                        else:
-                             print(f"  ℹ️ Column '{col}' in '{raw_dataset_name}.csv' cannot be safely converted to numeric; keeping as original type.")
-
-                if cleaned_dataset_name not in dataset_map:
-                    dataset_map[cleaned_dataset_name] = df
-                    print(f"  📂 Loaded '{cleaned_dataset_name}' (from '{raw_dataset_name}')")
-                else:
-                    print(f"  ⚠ Duplicate cleaned dataset name '{cleaned_dataset_name}' found. Skipping '{raw_dataset_name}'.")
-
-            except Exception as e:
-                print(f"❌ Error reading {file}: {e}")
+    dataset_map = DatasetCatalog(CSV_OUTPUT_DIR, clean_dataset_filename_for_reference,
+                                 keep_text=is_likely_identifier_or_category_column)
+    for file, error in dataset_map.errors.items():
+        print(f"❌ Error reading {file}: {error}")
+    for cleaned_dataset_name, file in dataset_map.duplicates:
+        print(f"  ⚠ Duplicate cleaned dataset name '{cleaned_dataset_name}' found. Skipping '{file}'.")
+    for cleaned_dataset_name, dataset in dataset_map.items():
+        print(f"  📂 Loaded '{cleaned_dataset_name}' (from '{dataset.raw_name}', {len(dataset.columns)} columns)")
+        for col in dataset.numeric:
+            print(f"  ✅ Column '{col}' in '{dataset.raw_name}' has no recorded type; reading it as numeric.")
 
     return dataset_map
 
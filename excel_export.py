@@ -0,0 +1,132 @@
+import csv
+import os
+import re
+from openpyxl import Workbook
+from hyper_export import (DEFAULT_CHUNK_ROWS, column_names, frame_rows, iter_row_chunks, query_definition, rows_to_frame,
+                          sample_source, select_query, to_python)
+
+# Writes combined_datasets.xlsx in openpyxl's write-only mode: rows are flushed to the sheet's
+# temporary file as they are appended, so memory stays flat however large the tables are.
+
+# Excel's hard limit per sheet, header row included
+EXCEL_MAX_ROWS = 1_048_576
+SHEET_NAME_MAX = 31
+
+def excel_sheet_name(name, used):
+    """Sanitized sheet name (no /:*?"<>|, at most 31 chars) that is not in `used`."""
+    sheet_name = re.sub(r'[\/:*?"<>|]', '_', name)
+    if len(sheet_name) > SHEET_NAME_MAX:
+        sheet_name = sheet_name[:SHEET_NAME_MAX]
+    # Ensure uniqueness by appending a counter if necessary
+    base_name = sheet_name
+    counter = 1
+    while sheet_name in used:
+        suffix = f"_{counter}"
+        sheet_name = base_name[:SHEET_NAME_MAX - len(suffix)] + suffix
+        counter += 1
+    return sheet_name
+
+def csv_cell(text):
+    """Turns a CSV field back into the number it was exported from; other text is kept as is."""
+    if text == '':
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+class StreamingExcelWriter:
+    """Write-only xlsx writer fed one chunk of rows at a time.
+
+    A table longer than Excel's row limit continues on numbered sheets ("Orders", "Orders_2", ...),
+    each starting with the header row. `sheet_parts` maps every table to the sheets holding it.
+
+        with StreamingExcelWriter("combined_datasets.xlsx") as writer:
+            writer.write_table("Orders", header, chunks)
+    """
+
+    def __init__(self, path, max_rows=EXCEL_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.sheet_parts = {}
+        self._used = set()
+        self._workbook = Workbook(write_only=True)
+
+    def _new_sheet(self, table_name, parts, header):
+        part = len(parts) + 1
+        sheet_name = excel_sheet_name(table_name if part == 1 else f"{table_name}_{part}", self._used)
+        self._used.add(sheet_name)
+        parts.append(sheet_name)
+        sheet = self._workbook.create_sheet(sheet_name)
+        sheet.append(header)
+        return sheet
+
+    def write_table(self, table_name, header, chunks):
+        """Appends a table given as an iterable of row chunks; returns the sheet names used.
+
+        The table is keyed in `sheet_parts` by its first (sanitized) sheet name.
+        """
+        parts = []
+        sheet = self._new_sheet(table_name, parts, header)
+        sheet_rows = 1
+        for chunk in chunks:
+            for row in chunk:
+                if sheet_rows >= self.max_rows:
+                    sheet = self._new_sheet(table_name, parts, header)
+                    sheet_rows = 1
+                sheet.append(row)
+                sheet_rows += 1
+        self.sheet_parts[parts[0]] = parts
+        return parts
+
+    def close(self):
+        # Save next to the destination and rename, so a failed run never leaves a truncated workbook
+        root, extension = os.path.splitext(self.path)
+        partial_path = f"{root}.partial{extension}"
+        try:
+            self._workbook.save(partial_path)
+            os.replace(partial_path, self.path)
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+def write_csv_table(writer, table_name, csv_path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Streams a CSV into the workbook without loading it; numbers come back as numbers."""
+    with open(csv_path, 'r', newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return []
+        rows = ([csv_cell(value) for value in row] for row in reader)
+        return writer.write_table(table_name, header, iter_row_chunks(rows, chunk_rows))
+
+def write_hyper_table(writer, table_name, connection, table, chunk_rows=DEFAULT_CHUNK_ROWS, transform=None,
+                      expressions=None, sample=None):
+    """Streams a Hyper table straight into the workbook without going through a CSV.
+
+    `expressions`, `transform` and `sample` work as in hyper_export.export_table_to_csv.
+    """
+    table_definition = query_definition(connection, table, expressions)
+    header = column_names(table_definition) + (list(transform.names) if transform else [])
+
+    def converted_chunks(result):
+        for chunk in iter_row_chunks(result, chunk_rows):
+            rows = [[to_python(value) for value in row] for row in chunk]
+            if transform:
+                extra = transform(rows_to_frame(chunk, table_definition))
+                rows = [row + [to_python(value) for value in values] for row, values in zip(rows, frame_rows(extra))]
+            yield rows
+
+    with connection.execute_query(select_query(sample_source(connection, table, sample), expressions)) as result:
+        return writer.write_table(table_name, header, converted_chunks(result))
@@ -0,0 +1,89 @@
+import threading
+import time
+from contextlib import contextmanager
+from tableauhyperapi import HyperProcess, Connection, Telemetry
+
+class HyperSession:
+    """Keeps one HyperProcess alive for a whole run and hands out connections per database.
+
+    Starting hyperd costs hundreds of milliseconds to seconds, so the process is started
+    lazily on the first connect() and reused until close(). Connections are independent,
+    so worker threads can each hold their own.
+
+        with HyperSession() as session:
+            with session.connect("orders.hyper") as connection:
+                ...
+    """
+
+    def __init__(self, telemetry=Telemetry.SEND_USAGE_DATA_TO_TABLEAU, parameters=None):
+        self.telemetry = telemetry
+        self.parameters = parameters
+        self._process = None
+        self._lock = threading.Lock()
+        self.startup_seconds = 0.0
+        self.connections_opened = 0
+        self.replaced_starts = 0
+
+    @property
+    def endpoint(self):
+        return self._start().endpoint
+
+    def _start(self):
+        with self._lock:
+            if self._process is None:
+                started = time.perf_counter()
+                self._process = HyperProcess(telemetry=self.telemetry, parameters=self.parameters)
+                self.startup_seconds = time.perf_counter() - started
+            return self._process
+
+    def connect(self, database, create_mode=None):
+        """Opens a Connection to `database` on the shared process; use it as a context manager."""
+        process = self._start()
+        with self._lock:
+            self.connections_opened += 1
+        if create_mode is None:
+            return Connection(endpoint=process.endpoint, database=database)
+        return Connection(endpoint=process.endpoint, database=database, create_mode=create_mode)
+
+    def replaces_starts(self, count):
+        """Records `count` HyperProcess starts the per-file flow would have made for this work."""
+        with self._lock:
+            self.replaced_starts += count
+
+    def close(self):
+        with self._lock:
+            if self._process is not None:
+                self._process.close()
+                self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self):
+        # The starts this session replaced, less its own one, each at the startup time measured here
+        saved = self.startup_seconds * max(self.replaced_starts - 1, 0)
+        return {
+            'startup_seconds': round(self.startup_seconds, 3),
+            'connections_opened': self.connections_opened,
+            'replaced_process_starts': self.replaced_starts,
+            'seconds_saved': round(saved, 3)
+        }
+
+    def report(self):
+        stats = self.stats()
+        print(f"📊 Hyper session: started once in {stats['startup_seconds']}s, "
+              f"{stats['connections_opened']} connections reused it; "
+              f"~{stats['seconds_saved']}s saved over the {stats['replaced_process_starts']} process starts "
+              f"of the per-file flow")
+
+@contextmanager
+def session_scope(session=None):
+    """Yields `session`, or a short-lived HyperSession that is closed afterwards."""
+    if session is not None:
+        yield session
+        return
+    with HyperSession() as own_session:
+        yield own_session
@@ -0,0 +1,645 @@
+import argparse
+import json
+import re
+import numpy as np
+import pandas as pd
+from calc_engine import (FormulaError, as_number, broadcast, evaluate, field_name, is_aggregate, iter_nodes,
+                         parse_expression)
+from schema_files import read_schema_file
+
+# Evaluates Tableau LOD expressions ({FIXED/INCLUDE/EXCLUDE ...}) and table calculations
+# (RUNNING_SUM, WINDOW_AVG, RANK, LOOKUP, ...) with vectorized groupby and rolling operations.
+#
+# A calculation is rewritten into stages, one per level of detail it aggregates at. Each stage
+# streams the table chunk by chunk into per-group partial aggregates, so only one chunk plus one
+# row per group is in memory; a stage reading another stage's values runs in a later pass.
+# The worksheet's view is the last stage: its aggregates grouped by the sheet's dimensions, then
+# table calculations computed along the addressing fields within each partition.
+
+AGGREGATIONS = {'SUM', 'AVG', 'COUNT', 'COUNTD', 'MIN', 'MAX', 'MEDIAN', 'ATTR', 'STDEV', 'STDEVP', 'VAR', 'VARP'}
+RANKS = {'RANK': 'min', 'RANK_DENSE': 'dense', 'RANK_MODIFIED': 'max', 'RANK_UNIQUE': 'first', 'RANK_PERCENTILE': 'min'}
+WINDOW_AGGREGATES = {
+    'WINDOW_SUM': 'sum', 'WINDOW_AVG': 'mean', 'WINDOW_COUNT': 'count', 'WINDOW_MIN': 'min', 'WINDOW_MAX': 'max',
+    'WINDOW_MEDIAN': 'median', 'WINDOW_STDEV': 'std', 'WINDOW_VAR': 'var'
+}
+RUNNING = {'RUNNING_SUM', 'RUNNING_AVG', 'RUNNING_COUNT', 'RUNNING_MIN', 'RUNNING_MAX'}
+POSITIONS = {'INDEX', 'SIZE', 'FIRST', 'LAST'}
+TABLE_CALCULATIONS = set(RANKS) | set(WINDOW_AGGREGATES) | RUNNING | POSITIONS | {'LOOKUP', 'TOTAL'}
+
+# Partial results kept per group for each decomposable aggregate, and how partials merge
+STATS = {
+    'SUM': ('sum', 'count'), 'AVG': ('sum', 'count'), 'COUNT': ('count',), 'MIN': ('min',), 'MAX': ('max',),
+    'ATTR': ('min', 'max'), 'VAR': ('sum', 'count', 'sumsq'), 'VARP': ('sum', 'count', 'sumsq'),
+    'STDEV': ('sum', 'count', 'sumsq'), 'STDEVP': ('sum', 'count', 'sumsq')
+}
+MERGE = {'sum': 'sum', 'count': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+# Aggregates that do not decompose keep their (distinct) values per group instead
+HELD = ('COUNTD', 'MEDIAN')
+
+GROUP_ALL = '__all__'
+ROWS = '__rows__'
+VALUE = '__value__'
+
+def map_children(node, function):
+    """Copy of an AST node with `function` applied to each direct child."""
+    kind = node[0]
+    if kind == 'unary':
+        return (kind, node[1], function(node[2]))
+    if kind == 'binary':
+        return (kind, node[1], function(node[2]), function(node[3]))
+    if kind == 'if':
+        return (kind, [(function(condition), function(value)) for condition, value in node[1]], function(node[2]))
+    if kind == 'case':
+        return (kind, function(node[1]), [(function(match), function(value)) for match, value in node[2]], function(node[3]))
+    if kind == 'call':
+        return (kind, node[1], [function(argument) for argument in node[2]])
+    if kind == 'lod':
+        return (kind, node[1], node[2], function(node[3]))
+    return node
+
+def view_aggregates(node):
+    """Aggregate and table calculation calls outside any LOD expression."""
+    found = []
+
+    def visit(child):
+        if child[0] == 'lod':
+            return child
+        if child[0] == 'call' and is_aggregate(child):
+            found.append(child)
+        return map_children(child, visit)
+
+    visit(node)
+    return found
+
+class GroupAggregator:
+    """Aggregates values per group over a stream of chunks.
+
+    Decomposable aggregates keep one row of partials per group (sum, count, min, max, sum of
+    squares), merged every MERGE_EVERY chunks; COUNTD keeps the distinct (group, value) pairs and
+    MEDIAN every value, so only those grow with the data.
+    """
+
+    MERGE_EVERY = 16
+
+    def __init__(self, dimensions, measures):
+        self.keys = list(dimensions) or [GROUP_ALL]
+        self.dimensions = list(dimensions)
+        self.measures = measures  # column -> aggregate function
+        self._partials = []
+        self._held = {column: [] for column, function in measures.items() if function in HELD}
+
+    def add(self, keys, values):
+        """`keys` holds the dimension columns of a chunk, `values` {column: Series} aligned with it."""
+        frame = pd.DataFrame({name: keys[name] for name in self.dimensions}, index=keys.index)
+        if not self.dimensions:
+            frame[GROUP_ALL] = 0
+        aggregations = {ROWS: (self.keys[0], 'size')}
+        for column, function in self.measures.items():
+            value = values[column]
+            if function in HELD:
+                if function == 'MEDIAN':
+                    value = as_number(value, frame.index)
+                pairs = frame[self.keys].assign(**{VALUE: value}).dropna(subset=[VALUE])
+                self._held[column].append(pairs.drop_duplicates() if function == 'COUNTD' else pairs)
+                continue
+            if function not in ('MIN', 'MAX', 'ATTR', 'COUNT'):
+                value = as_number(value, frame.index)
+            for stat in STATS[function]:
+                source = f"{column}|{stat}"
+                frame[source] = value * value if stat == 'sumsq' else value
+                aggregations[source] = (source, 'sum' if stat == 'sumsq' else stat)
+        self._partials.append(frame.groupby(self.keys, dropna=False, sort=False).agg(**aggregations))
+        if len(self._partials) >= self.MERGE_EVERY:
+            self._partials = [self._merge()]
+            for column, held in self._held.items():
+                if self.measures[column] == 'COUNTD':
+                    self._held[column] = [pd.concat(held).drop_duplicates()]
+
+    def _merge(self):
+        combined = pd.concat(self._partials)
+        merge = {column: MERGE[column.rsplit('|', 1)[1]] if '|' in column else 'sum' for column in combined.columns}
+        return combined.groupby(level=list(range(len(self.keys))), dropna=False, sort=False).agg(merge)
+
+    def result(self):
+        """DataFrame of the dimensions and one column per measure, one row per group seen."""
+        if not self._partials:
+            return pd.DataFrame(columns=self.dimensions + list(self.measures))
+        partials = self._merge()
+        result = pd.DataFrame(index=partials.index)
+        for column, function in self.measures.items():
+            if function in HELD:
+                pairs = pd.concat(self._held[column]) if self._held[column] else pd.DataFrame(columns=self.keys + [VALUE])
+                grouped = pairs.groupby(self.keys, dropna=False)[VALUE]
+                values = (grouped.nunique() if function == 'COUNTD' else grouped.median()).reindex(result.index)
+                result[column] = values.fillna(0).astype('int64') if function == 'COUNTD' else values
+                continue
+            stat = lambda name: partials[f"{column}|{name}"]
+            if function == 'SUM':
+                result[column] = stat('sum').where(stat('count') > 0)
+            elif function == 'AVG':
+                result[column] = stat('sum') / stat('count').where(stat('count') > 0)
+            elif function == 'COUNT':
+                result[column] = stat('count')
+            elif function in ('MIN', 'MAX'):
+                result[column] = stat(function.lower())
+            elif function == 'ATTR':
+                # One value per group, or null where Tableau shows '*'
+                result[column] = stat('min').where(stat('min') == stat('max'))
+            else:
+                ddof = 1 if function in ('VAR', 'STDEV') else 0
+                count = stat('count')
+                variance = ((stat('sumsq') - stat('sum') ** 2 / count) / (count - ddof)).where(count > ddof).clip(lower=0)
+                result[column] = np.sqrt(variance) if function.startswith('STDEV') else variance
+        result = result.reset_index()
+        return result.drop(columns=[GROUP_ALL]) if not self.dimensions else result
+
+def lookup(result, frame, dimensions):
+    """Values of a stage's result for every row of `frame`, matched on the stage's dimensions."""
+    if not dimensions:
+        return result[VALUE].iloc[0] if len(result) else None
+    merged = frame[dimensions].merge(result[dimensions + [VALUE]], on=dimensions, how='left')
+    return pd.Series(merged[VALUE].to_numpy(), index=frame.index)
+
+def window_offset(node, size):
+    """Constant window bound; FIRST() and LAST() reach the partition's ends."""
+    if node[0] == 'call' and node[1] in ('FIRST', 'LAST') and not node[2]:
+        return -size if node[1] == 'FIRST' else size
+    if node[0] == 'unary' and node[1] == '-':
+        return -window_offset(node[2], size)
+    if node[0] == 'literal' and isinstance(node[1], (int, float)) and not isinstance(node[1], bool):
+        return int(node[1])
+    raise FormulaError("Window bounds must be numbers, FIRST() or LAST()")
+
+def offset_window(series, start, end, how):
+    # Rolling windows end at the current row: pad past the end and shift, so row i sees [i+start, i+end]
+    values = series.reset_index(drop=True)
+    padding = pd.Series(np.nan, index=range(len(values), len(values) + max(end, 0)))
+    padded = pd.concat([values, padding])
+    rolled = padded.rolling(end - start + 1, min_periods=1).agg(how).shift(-end)
+    return pd.Series(rolled.iloc[:len(values)].to_numpy(), index=series.index)
+
+def table_calculation(function, values, options, keys, index):
+    """One table calculation over the view, `values` sorted along the addressing fields and
+    grouped into partitions by `keys`."""
+    rows = pd.Series(0, index=index).groupby(keys, dropna=False, sort=False)
+    position = rows.cumcount()
+    if function in POSITIONS:
+        size = rows.transform('size')
+        return {'INDEX': position + 1, 'SIZE': size, 'FIRST': -position, 'LAST': size - 1 - position}[function]
+    if function in RUNNING:
+        if function == 'RUNNING_MIN':
+            return values.groupby(keys, dropna=False, sort=False).cummin()
+        if function == 'RUNNING_MAX':
+            return values.groupby(keys, dropna=False, sort=False).cummax()
+        numbers = as_number(values, index)
+        counts = numbers.notna().astype('int64').groupby(keys, dropna=False, sort=False).cumsum()
+        if function == 'RUNNING_COUNT':
+            return counts
+        sums = numbers.fillna(0).groupby(keys, dropna=False, sort=False).cumsum()
+        return sums if function == 'RUNNING_SUM' else sums / counts.where(counts > 0)
+    if function in WINDOW_AGGREGATES:
+        how = WINDOW_AGGREGATES[function]
+        grouped = as_number(values, index).groupby(keys, dropna=False, sort=False)
+        if not options:
+            return grouped.transform(how)
+        if len(options) != 2:
+            raise FormulaError(f"{function} needs both a start and an end offset")
+        start, end = (window_offset(option, len(index)) for option in options)
+        return grouped.transform(lambda series: offset_window(series, start, end, how))
+    if function in RANKS:
+        order = str(options[0][1]).lower() if options and options[0][0] == 'literal' else None
+        ascending = (order or ('asc' if function == 'RANK_PERCENTILE' else 'desc')) == 'asc'
+        grouped = as_number(values, index).groupby(keys, dropna=False, sort=False)
+        ranks = grouped.rank(method=RANKS[function], ascending=ascending)
+        if function == 'RANK_PERCENTILE':
+            counts = grouped.transform('count')
+            return (ranks - 1) / (counts - 1).where(counts > 1)
+        return ranks.astype('Int64')
+    if function == 'LOOKUP':
+        grouped = values.groupby(keys, dropna=False, sort=False)
+        offset = options[0] if options else ('literal', 0)
+        if offset[0] == 'call' and offset[1] in ('FIRST', 'LAST'):
+            return grouped.transform(offset[1].lower())
+        return grouped.shift(-window_offset(offset, len(index)))
+    raise FormulaError(f"{function} is not supported")
+
+class Stage:
+    """Aggregates at one level of detail and the expressions computed from them."""
+
+    def __init__(self, dimensions):
+        self.dimensions = list(dimensions)
+        self.aggregates = {}   # column -> (aggregate function, row-level AST)
+        self.row_inputs = []   # (stage, column): LOD values the aggregated rows read
+        self.joins = []        # (stage, column): coarser LOD values joined onto the groups
+        self.rollups = {}      # column -> (stage, aggregate function): finer LOD values aggregated per group
+        self.bodies = {}       # column -> AST over the aggregate columns
+        self.result = None
+
+    def inputs(self):
+        return [stage for stage, _ in self.row_inputs + self.joins] + [stage for stage, _ in self.rollups.values()]
+
+class LodCalculation:
+    """A calculated field that needs LOD or table calculation support, references inlined."""
+
+    def __init__(self, name, caption, formula, ast):
+        self.name = name
+        self.caption = caption
+        self.formula = formula
+        self.ast = ast
+
+    @property
+    def row_level(self):
+        """True when every aggregate sits inside an LOD, so the result has a value per row."""
+        return not view_aggregates(self.ast)
+
+class LodEngine:
+    """Computes LOD calculations per row and aggregate/table calculations for one view.
+
+    `dimensions` are the view's dimension columns (its level of detail); table calculations run
+    along `addressing` (default: all dimensions) and restart for every combination of the other
+    dimensions, Tableau's partitioning fields.
+
+        engine = LodEngine(calculations, dimensions=['Region', 'Category'], addressing=['Category'])
+        view = engine.run(lambda: pd.read_csv(path, chunksize=100_000))
+        for chunk in pd.read_csv(path, chunksize=100_000):
+            lod_columns = engine.transform(chunk)
+
+    `chunks` is a callable returning a fresh iterable of DataFrames, as the data is read once per
+    level of nesting. Calculations that cannot be planned are listed in `skipped`.
+    """
+
+    def __init__(self, calculations, dimensions=(), addressing=None, parameters=None):
+        self.dimensions = list(dimensions)
+        self.addressing = list(self.dimensions if addressing is None else addressing)
+        self.partition = [name for name in self.dimensions if name not in self.addressing]
+        self.parameters = parameters
+        self.view = Stage(self.dimensions)
+        self.rows = Stage([])     # holds the LOD values row-level calculations read
+        self.table_calcs = []     # (column, function, view-level AST, option ASTs)
+        self.row_calculations = []
+        self.view_calculations = []
+        self.skipped = {}
+        self._stages = {}
+        self._columns = 0
+        for calc in calculations:
+            try:
+                if calc.row_level:
+                    self.rows.bodies[calc.caption] = self._row(calc.ast, self.rows)
+                    self.row_calculations.append(calc)
+                else:
+                    self.view.bodies[calc.caption] = self._aggregate(calc.ast, self.view, view=True)
+                    self.view_calculations.append(calc)
+            except FormulaError as e:
+                self.skipped[calc.name] = str(e)
+
+    def _column(self, prefix):
+        self._columns += 1
+        return f"__{prefix}_{self._columns}__"
+
+    def _level(self, node, context):
+        dimensions = [field_name(dimension) for dimension in node[2]]
+        if node[1] == 'FIXED':
+            return dimensions
+        if node[1] == 'INCLUDE':
+            return context + [name for name in dimensions if name not in context]
+        return [name for name in context if name not in dimensions]
+
+    def _stage(self, node, context):
+        level = self._level(node, context)
+        key = (repr(node[3]), tuple(level))
+        if key not in self._stages:
+            stage = Stage(level)
+            stage.bodies[VALUE] = self._aggregate(node[3], stage)
+            self._stages[key] = stage
+        return self._stages[key]
+
+    def _row(self, node, owner):
+        """Rewrites a row-level expression; LOD expressions become columns looked up per row."""
+        if node[0] == 'lod':
+            stage = self._stage(node, owner.dimensions if owner is not self.rows else self.dimensions)
+            column = self._column('lod')
+            owner.row_inputs.append((stage, column))
+            return ('field', column)
+        if node[0] == 'call' and is_aggregate(node):
+            raise FormulaError(f"{node[1]} cannot be used inside another aggregate")
+        return map_children(node, lambda child: self._row(child, owner))
+
+    def _aggregate(self, node, stage, view=False):
+        """Rewrites an aggregate expression at `stage`'s level; aggregates become its columns."""
+        kind = node[0]
+        if kind == 'call' and node[1] in TABLE_CALCULATIONS:
+            if not view:
+                raise FormulaError(f"{node[1]} is a table calculation and cannot be used inside an LOD expression")
+            if node[1] == 'TOTAL':
+                # TOTAL is the aggregate over the whole partition, i.e. FIXED on the partitioning fields
+                return self._aggregate(('lod', 'FIXED', [f"[{name}]" for name in self.partition], node[2][0]), stage)
+            column = self._column('table_calc')
+            argument = None if node[1] in POSITIONS else self._aggregate(node[2][0], stage, view)
+            self.table_calcs.append((column, node[1], argument, node[2][1:]))
+            return ('field', column)
+        if kind == 'call' and is_aggregate(node):
+            if node[1] not in AGGREGATIONS:
+                raise FormulaError(f"{node[1]} is not supported")
+            if node[2] and node[2][0][0] == 'lod':
+                inner = self._stage(node[2][0], stage.dimensions)
+                if set(inner.dimensions) >= set(stage.dimensions):
+                    # Finer than this level: aggregate one value per LOD group, not one per row,
+                    # so AVG({INCLUDE [Customer] : SUM([Sales])}) is the average per customer
+                    column = self._column('rollup')
+                    stage.rollups[column] = (inner, node[1])
+                    return ('field', column)
+            column = self._column('aggregate')
+            argument = self._row(node[2][0], stage) if node[2] else ('literal', 1)
+            stage.aggregates[column] = (node[1], argument)
+            return ('field', column)
+        if kind == 'lod':
+            inner = self._stage(node, stage.dimensions)
+            if set(inner.dimensions) <= set(stage.dimensions):
+                # Coarser than this level: one value per group, joined on the LOD's dimensions
+                column = self._column('lod')
+                stage.joins.append((inner, column))
+                return ('field', column)
+            return self._aggregate(('call', 'ATTR', [node]), stage, view)
+        if kind == 'field':
+            name = field_name(node[1])
+            if name in stage.dimensions:
+                return ('field', name)
+            raise FormulaError(f"{node[1]} must be aggregated, it is not a dimension at this level of detail")
+        return map_children(node, lambda child: self._aggregate(child, stage, view))
+
+    def _attach(self, frame, inputs):
+        if not inputs:
+            return frame
+        frame = frame.copy(deep=False)
+        for stage, column in inputs:
+            frame[column] = lookup(stage.result, frame, stage.dimensions)
+        return frame
+
+    def _rollup(self, frame, stage):
+        if not stage.rollups:
+            return frame
+        frame = frame.copy(deep=False)
+        for column, (inner, function) in stage.rollups.items():
+            aggregator = GroupAggregator(stage.dimensions, {VALUE: function})
+            aggregator.add(inner.result, {VALUE: inner.result[VALUE]})
+            frame[column] = lookup(aggregator.result(), frame, stage.dimensions)
+        return frame
+
+    def _finish(self, stage, aggregated):
+        frame = self._rollup(self._attach(aggregated, stage.joins), stage)
+        if stage is self.view:
+            frame = self._table_calculations(frame)
+        for column, body in stage.bodies.items():
+            frame[column] = broadcast(evaluate(body, frame, self.parameters), frame.index)
+        return frame
+
+    def _table_calculations(self, frame):
+        frame = frame.sort_values(self.partition + self.addressing, kind='stable', na_position='last') \
+            if self.dimensions else frame
+        frame = frame.reset_index(drop=True)
+        keys = [frame[name] for name in self.partition] or pd.Series(0, index=frame.index)
+        for column, function, argument, options in self.table_calcs:
+            values = None if argument is None else broadcast(evaluate(argument, frame, self.parameters), frame.index)
+            frame[column] = table_calculation(function, values, options, keys, frame.index)
+        return frame
+
+    def _passes(self, targets):
+        """Stages needed for `targets`, grouped into passes so inputs are computed first."""
+        depth = {}
+
+        def visit(stage):
+            if stage not in depth:
+                depth[stage] = 1 + max((visit(inner) for inner in stage.inputs()), default=0)
+            return depth[stage]
+
+        for stage in targets:
+            visit(stage)
+        return [[stage for stage in depth if depth[stage] == level] for level in range(1, max(depth.values(), default=0) + 1)]
+
+    def run(self, chunks):
+        """Reads the data once per pass and returns the view: its dimensions plus one column per
+        aggregate or table calculation. Afterwards transform() computes the row-level ones."""
+        if isinstance(chunks, pd.DataFrame):
+            frame = chunks
+            chunks = lambda: [frame]
+        targets = ([self.view] if self.view_calculations else []) + self.rows.inputs()
+        for stages in self._passes(targets):
+            aggregators = {
+                stage: GroupAggregator(stage.dimensions, {column: function for column, (function, _) in stage.aggregates.items()})
+                for stage in stages
+            }
+            for chunk in chunks():
+                for stage in stages:
+                    working = self._attach(chunk, stage.row_inputs)
+                    values = {
+                        column: broadcast(evaluate(argument, working, self.parameters), working.index)
+                        for column, (_, argument) in stage.aggregates.items()
+                    }
+                    aggregators[stage].add(working, values)
+            for stage in stages:
+                stage.result = self._finish(stage, aggregators[stage].result())
+        if not self.view_calculations:
+            return pd.DataFrame(columns=self.dimensions)
+        return self.view.result[self.dimensions + [calc.caption for calc in self.view_calculations]]
+
+    @property
+    def names(self):
+        return [calc.caption for calc in self.row_calculations]
+
+    def transform(self, chunk):
+        """Row-level LOD calculations for one chunk, once run() has computed the LOD values."""
+        working = self._attach(chunk, self.rows.row_inputs)
+        return pd.DataFrame({
+            calc.caption: broadcast(evaluate(self.rows.bodies[calc.caption], working, self.parameters), chunk.index)
+            for calc in self.row_calculations
+        }, index=chunk.index, columns=self.names)
+
+def compile_lod_calculations(calculations_json, columns, parameters=None):
+    """Picks the calculations that need this engine and whose fields are all in `columns`.
+
+    References to other calculations are inlined, unless the calculation was already exported as
+    a column (calc_engine's row-level fields are). Returns ([LodCalculation], {name: reason}).
+    """
+    calculations_json = calculations_json or {}
+    available = set(columns)
+    captions = {calc.get('field_name'): name for name, calc in calculations_json.items() if calc.get('field_name')}
+    parsed = {}
+    errors = {}
+    for name, calc in calculations_json.items():
+        try:
+            parsed[name] = parse_expression(calc.get('formula'))
+        except FormulaError as e:
+            errors[name] = str(e)
+
+    def resolve(reference):
+        """('column', name) or ('calculation', name) for a field reference."""
+        name = field_name(reference)
+        target = reference if reference in calculations_json else (captions.get(name) if name not in available else None)
+        if target is None:
+            return 'column', name
+        caption = calculations_json[target].get('field_name') or target.strip('[]')
+        if caption in available:
+            return 'column', caption
+        return 'calculation', target
+
+    def inline(node, seen):
+        if node[0] == 'field':
+            kind, name = resolve(node[1])
+            if kind == 'column':
+                if name not in available:
+                    raise FormulaError(f"reads [{name}], not in this table")
+                return ('field', f"[{name}]")
+            if name in seen:
+                raise FormulaError(f"circular reference through {name}")
+            if name in errors:
+                raise FormulaError(f"reads {name}: {errors[name]}")
+            return inline(parsed[name], seen | {name})
+        if node[0] == 'lod':
+            dimensions = []
+            for dimension in node[2]:
+                kind, name = resolve(dimension)
+                if kind != 'column' or name not in available:
+                    raise FormulaError(f"LOD dimension {dimension} is not a column of this table")
+                dimensions.append(f"[{name}]")
+            return ('lod', node[1], dimensions, inline(node[3], seen))
+        return map_children(node, lambda child: inline(child, seen))
+
+    compiled = []
+    skipped = dict(errors)
+    for name, calc in calculations_json.items():
+        if name in errors:
+            continue
+        caption = calc.get('field_name') or name.strip('[]')
+        try:
+            ast = inline(parsed[name], {name})
+            for parameter in iter_nodes(ast, 'parameter'):
+                if not parameters or parameter[1] not in parameters:
+                    raise FormulaError(f"no value for parameter [{parameter[1]}]")
+        except FormulaError as e:
+            skipped[name] = str(e)
+            continue
+        if not any(True for _ in iter_nodes(ast, 'lod')) and not any(is_aggregate(call) for call in iter_nodes(ast, 'call')):
+            skipped[name] = "row-level; computed by calc_engine"
+            continue
+        compiled.append(LodCalculation(name, caption, calc.get('formula'), ast))
+    return compiled, skipped
+
+# Shelf pills as twbx_parser stores them: [datasource].[derivation:Field:role], e.g. [none:Region:nk]
+SHELF_FIELD = re.compile(r'\[[^\]]+\]\.\[(\w+):(.+?):(\w+)\]')
+
+def shelf_dimensions(shelf, calculations_json=None):
+    """Dimension fields on a shelf, calculated ones by caption; date parts and measures are left out."""
+    calculations_json = calculations_json or {}
+    dimensions = []
+    for derivation, name, role in SHELF_FIELD.findall(shelf or ''):
+        if derivation != 'none' or role not in ('nk', 'ok'):
+            continue
+        calc = calculations_json.get(f"[{name}]")
+        name = (calc.get('field_name') or name) if calc else name
+        if name not in dimensions:
+            dimensions.append(name)
+    return dimensions
+
+def worksheet_layout(visual, calculations_json=None):
+    """(dimensions, addressing) of a worksheet from its twbx_parser visuals entry.
+
+    Addressing follows Tableau's default, Table (across): the dimensions on Columns, or on Rows
+    when Columns has none.
+    """
+    columns = shelf_dimensions(visual.get('Columns'), calculations_json)
+    rows = shelf_dimensions(visual.get('Rows'), calculations_json)
+    dimensions = rows + [name for name in columns if name not in rows]
+    return dimensions, columns or rows
+
+def compare_results(expected, actual, keys, columns=None, tolerance=1e-6):
+    """Cells where two result tables disagree, e.g. Tableau's crosstab against this engine or a DAX query.
+
+    Rows are matched on `keys` (compared as text) and numbers within a relative `tolerance`.
+    Returns one row per differing cell with both values; a row missing on one side shows as null.
+    """
+    columns = columns or [column for column in expected.columns if column in actual.columns and column not in keys]
+    left = expected[keys + columns].astype({key: str for key in keys})
+    right = actual[keys + columns].astype({key: str for key in keys})
+    merged = left.merge(right, on=keys, how='outer', suffixes=(' (expected)', ' (actual)'))
+    differences = []
+    for column in columns:
+        wanted, got = merged[f"{column} (expected)"], merged[f"{column} (actual)"]
+        wanted_numbers, got_numbers = pd.to_numeric(wanted, errors='coerce'), pd.to_numeric(got, errors='coerce')
+        numeric = wanted_numbers.notna() & got_numbers.notna()
+        close = pd.Series(np.isclose(wanted_numbers, got_numbers, rtol=tolerance, atol=tolerance), index=merged.index)
+        same = (wanted.isna() & got.isna()) | (numeric & close) | (~numeric & (wanted.astype(str) == got.astype(str)))
+        if (~same).any():
+            differences.append(merged.loc[~same, keys].assign(column=column, expected=wanted[~same], actual=got[~same]))
+    if not differences:
+        return pd.DataFrame(columns=keys + ['column', 'expected', 'actual'])
+    return pd.concat(differences, ignore_index=True)
+
+def file_chunks(path, chunk_rows):
+    """Callable yielding an exported CSV or Parquet table chunk by chunk, dates parsed from its schema file."""
+    from hyper_export import hyper_type_name
+
+    def chunks():
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+            return
+        dates = [
+            column['name'] for column in read_schema_file(path) or []
+            if hyper_type_name(column['type']) in ('DATE', 'TIMESTAMP', 'TIMESTAMP_TZ')
+        ]
+        yield from pd.read_csv(path, chunksize=chunk_rows, parse_dates=dates)
+    return chunks
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compute Tableau LOD and table calculations for a worksheet.")
+    parser.add_argument("data", help="Exported table (.csv or .parquet) the worksheet reads")
+    parser.add_argument("--extracted", default="output/tableau_extracted_data.json",
+                        help="twbx_parser output with the calculations, usage and visuals")
+    parser.add_argument("--worksheet", help="Worksheet whose dimensions and calculations to use")
+    parser.add_argument("--dimensions", nargs="*", help="View dimensions, overriding the worksheet's")
+    parser.add_argument("--addressing", nargs="*", help="Fields table calculations run along")
+    parser.add_argument("--chunk-rows", type=int, default=100_000)
+    parser.add_argument("--expected", help="CSV of the numbers Tableau (or a DAX query) produced, to compare against")
+    parser.add_argument("--output", help="Write the computed view to this CSV")
+
+    args = parser.parse_args()
+    with open(args.extracted, "r", encoding="utf-8") as f:
+        extracted = json.load(f)
+    calculations_json = extracted.get("calculations", {})
+    dimensions, addressing = [], None
+    if args.worksheet:
+        visual = next((v for v in extracted.get("visuals", []) if v.get("Type") == "Worksheet" and v.get("Source") == args.worksheet), {})
+        dimensions, addressing = worksheet_layout(visual, calculations_json)
+        used = {usage['calculation'] for usage in extracted.get("usage", []) if usage['worksheet'] == args.worksheet}
+        calculations_json = {name: calc for name, calc in calculations_json.items() if name in used}
+    if args.dimensions is not None:
+        dimensions = args.dimensions
+    if args.addressing is not None:
+        addressing = args.addressing
+
+    chunks = file_chunks(args.data, args.chunk_rows)
+    columns = list(next(iter(chunks()), pd.DataFrame()).columns)
+    missing = [name for name in dimensions if name not in columns]
+    if missing:
+        print(f"⚠ Dimensions not in {args.data}, ignored: {missing}")
+        dimensions = [name for name in dimensions if name in columns]
+        addressing = None if addressing is None else [name for name in addressing if name in columns]
+    calculations, skipped = compile_lod_calculations(calculations_json, columns)
+    engine = LodEngine(calculations, dimensions, addressing)
+    for name, reason in {**skipped, **engine.skipped}.items():
+        print(f"⏭ {calculations_json[name].get('field_name') or name}: {reason}")
+    print(f"📐 Dimensions: {dimensions}, addressing: {engine.addressing}")
+
+    view = engine.run(chunks)
+    print(view.to_string(max_rows=50))
+    if args.output:
+        view.to_csv(args.output, index=False)
+        print(f"✅ View saved to {args.output}")
+    if args.expected:
+        differences = compare_results(pd.read_csv(args.expected), view, dimensions)
+        if differences.empty:
+            print("✅ Every value matches the expected results.")
+        else:
+            print(f"❌ {len(differences)} value(s) differ:")
+            print(differences.to_string(max_rows=50))
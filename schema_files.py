@@ -0,0 +1,29 @@
+import json
+
+# Naming of exported table files and the .schema.json written next to each of them. Kept free of
+# tableauhyperapi so the visual generators can read what the export recorded without installing it.
+
+# Extensions of exported table files, longest first so Orders.csv.gz is not read as Orders.csv
+DATA_EXTENSIONS = ('.csv.gz', '.csv', '.parquet')
+
+def is_data_file(path):
+    return path.endswith(DATA_EXTENSIONS)
+
+def data_file_root(data_path):
+    """Path of an exported table without its extension: Orders.csv.gz -> Orders."""
+    for extension in DATA_EXTENSIONS:
+        if data_path.endswith(extension):
+            return data_path[:-len(extension)]
+    return data_path
+
+def schema_path(data_path):
+    """Schema file written next to an exported table: Orders.csv -> Orders.schema.json."""
+    return data_file_root(data_path) + ".schema.json"
+
+def read_schema_file(data_path):
+    """Columns recorded for an exported table, or None when it has no (readable) schema file."""
+    try:
+        with open(schema_path(data_path), 'r', encoding='utf-8') as f:
+            return json.load(f)['columns']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
@@ -0,0 +1,206 @@
+import argparse
+import base64
+import json
+import os
+import random
+import zipfile
+from xml.sax.saxutils import quoteattr
+
+# Builds synthetic Tableau workbooks shaped like real ones (federated hyper datasources,
+# calculated fields, bar/bullet/box-plot panes, nested dashboard zones, thumbnails) so the
+# extractors can be measured offline at any size.
+
+DEFAULT_SPEC = {
+    'datasources': 2,
+    'columns': 30,
+    'calculations': 15,
+    'worksheets': 10,
+    'panes': 3,
+    'dashboards': 2,
+    'zones': 12,
+    'thumbnail_kb': 0,
+}
+
+# Bump whenever the generated markup changes so saved corpora stop matching their spec files
+GENERATOR_VERSION = 1
+
+def _attrs(**attributes):
+    return ''.join(f" {name.replace('_', '-')}={quoteattr(str(value))}" for name, value in attributes.items() if value is not None)
+
+def _datasource_name(d):
+    return f"federated.synthetic{d:04d}"
+
+def write_datasource(out, d, spec, rng):
+    ds_name = _datasource_name(d)
+    hyper = f"Data/Extracts/{ds_name.replace('.', '_')}.hyper"
+    out.write(f"    <datasource{_attrs(caption=f'Orders {d}', inline='true', name=ds_name, version='18.1')}>\n")
+    out.write("      <connection class='federated'>\n        <named-connections>\n")
+    out.write(f"          <named-connection{_attrs(caption='Extract', name=f'hyper.{d}')}>\n")
+    out.write(f"            <connection{_attrs(**{'class': 'hyper'}, dbname=hyper, filename=hyper, schema='Extract', tablename='Extract')}/>\n")
+    out.write("          </named-connection>\n        </named-connections>\n")
+    out.write(f"        <relation{_attrs(connection=f'hyper.{d}', name='Extract', table='[Extract].[Extract]', type='table')}>\n          <columns>\n")
+    for c in range(spec['columns']):
+        out.write(f"            <column{_attrs(datatype='real' if c % 3 else 'string', name=f'Field {c}', ordinal=c)}/>\n")
+    out.write("          </columns>\n        </relation>\n      </connection>\n")
+
+    for c in range(spec['columns']):
+        measure = c % 3 != 0
+        out.write(f"      <column{_attrs(datatype='real' if measure else 'string', name=f'[Field {c}]', role='measure' if measure else 'dimension', type='quantitative' if measure else 'nominal')}/>\n")
+    for k in range(spec['calculations']):
+        base = f"[Field {rng.randrange(1, max(spec['columns'], 2))}]"
+        if k and rng.random() < 0.5:
+            formula = f"[Calculation_{d}{rng.randrange(k):05d}] * 2 + ZN({base})"
+        elif k % 4 == 0:
+            formula = f"IF {base} > 100 THEN 'High' ELSE 'Low' END"
+        else:
+            formula = f"SUM({base}) / SUM([Field 1])"
+        out.write(f"      <column{_attrs(caption=f'Calc {d}.{k}', datatype='real', name=f'[Calculation_{d}{k:05d}]', role='measure', type='quantitative')}>\n")
+        out.write(f"        <calculation{_attrs(**{'class': 'tableau'}, formula=formula)}/>\n      </column>\n")
+    out.write("    </datasource>\n")
+
+def write_worksheet(out, w, spec, rng):
+    d = w % spec['datasources']
+    ds_name = _datasource_name(d)
+    kind = w % 3  # 0: bullet chart, 1: box plot, 2: plain bar
+    out.write(f"    <worksheet{_attrs(name=f'Sheet {w}')}>\n      <table>\n        <view>\n")
+    out.write(f"          <datasources>\n            <datasource{_attrs(caption=f'Orders {d}', name=ds_name)}/>\n          </datasources>\n")
+    out.write(f"          <datasource-dependencies{_attrs(datasource=ds_name)}>\n")
+    used = rng.sample(range(spec['columns']), min(4, spec['columns']))
+    for c in used:
+        out.write(f"            <column{_attrs(datatype='real', name=f'[Field {c}]', role='measure', type='quantitative')}/>\n")
+    if spec['calculations']:
+        k = rng.randrange(spec['calculations'])
+        out.write(f"            <column{_attrs(caption=f'Calc {d}.{k}', datatype='real', name=f'[Calculation_{d}{k:05d}]', role='measure', type='quantitative')}>\n")
+        out.write(f"              <calculation{_attrs(**{'class': 'tableau'}, formula='SUM([Field 1])')}/>\n            </column>\n")
+    out.write("          </datasource-dependencies>\n")
+    out.write(f"          <filter{_attrs(**{'class': 'categorical'}, column=f'[{ds_name}].[none:Field 0:nk]')}>\n")
+    out.write("            <groupfilter function='level-members' level='[none:Field 0:nk]'/>\n          </filter>\n")
+    out.write("        </view>\n        <style/>\n        <panes>\n")
+    for p in range(spec['panes']):
+        measure = f"[{ds_name}].[sum:Field {used[p % len(used)]}:qk]"
+        mark = 'Circle' if kind == 1 else 'Bar'
+        out.write(f"          <pane{_attrs(id=p, selection_relaxation_option='selection-relaxation-allow', x_axis_name=measure)}>\n")
+        out.write(f"            <view>\n              <breakdown value='auto'/>\n            </view>\n            <mark{_attrs(**{'class': mark})}/>\n")
+        if kind == 1 and p == 0:
+            out.write("            <reference-line axis-column='[sum:Field 1:qk]' boxplot-mark-exclusion='false' boxplot-whisker-type='standard' enable-instant-analytics='true' formula='average' id='refline0' label-type='automatic' scope='per-cell' value-column='[sum:Field 1:qk]' z-order='1'/>\n")
+        out.write("            <encodings>\n")
+        out.write(f"              <color{_attrs(column=f'[{ds_name}].[none:Field 0:nk]')}/>\n")
+        if kind == 0:
+            out.write(f"              <text{_attrs(column=measure)}/>\n")
+        if kind == 1:
+            out.write(f"              <lod{_attrs(column=f'[{ds_name}].[none:Field 3:nk]')}/>\n")
+        out.write(f"              <size{_attrs(column=measure)}/>\n            </encodings>\n          </pane>\n")
+    out.write("        </panes>\n")
+    out.write(f"        <rows>[{ds_name}].[none:Field 0:nk]</rows>\n")
+    out.write(f"        <cols>[{ds_name}].[sum:Field {used[0]}:qk]</cols>\n")
+    out.write("      </table>\n    </worksheet>\n")
+
+def write_dashboard(out, b, spec):
+    zones = spec['zones']
+    out.write(f"    <dashboard{_attrs(name=f'Dashboard {b}')}>\n      <size maxheight='800' maxwidth='1000'/>\n      <zones>\n")
+    out.write(f"        <zone{_attrs(h=100000, id=b * (zones + 1), type='layout-basic', w=100000, x=0, y=0)}>\n")
+    width = 100000 // max(zones, 1)
+    for z in range(zones):
+        sheet = (b * zones + z) % max(spec['worksheets'], 1)
+        out.write(f"          <zone{_attrs(h=50000, id=b * (zones + 1) + z + 1, name=f'Sheet {sheet}', w=width, x=z * width, y=(z % 2) * 50000)}>\n")
+        out.write(f"            <view{_attrs(name=f'Sheet {sheet}')}/>\n          </zone>\n")
+    out.write("        </zone>\n      </zones>\n    </dashboard>\n")
+
+def resolve_spec(**counts):
+    """DEFAULT_SPEC with the given counts applied, as write_workbook uses it."""
+    spec = dict(DEFAULT_SPEC, **counts)
+    spec['datasources'] = max(spec['datasources'], 1)
+    return spec
+
+def write_workbook(path, seed=0, **counts):
+    """Writes a synthetic .twb to `path`; keyword counts override DEFAULT_SPEC. Returns the spec used."""
+    spec = resolve_spec(**counts)
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write("<?xml version='1.0' encoding='utf-8' ?>\n")
+        out.write("<workbook original-version='18.1' source-build='2023.1.0' version='18.1' xmlns:user='http://www.tableausoftware.com/xml/user'>\n")
+        out.write("  <datasources>\n")
+        for d in range(spec['datasources']):
+            write_datasource(out, d, spec, rng)
+        out.write("  </datasources>\n  <worksheets>\n")
+        for w in range(spec['worksheets']):
+            write_worksheet(out, w, spec, rng)
+        out.write("  </worksheets>\n  <dashboards>\n")
+        for b in range(spec['dashboards']):
+            write_dashboard(out, b, spec)
+        out.write("  </dashboards>\n")
+        if spec['thumbnail_kb']:
+            blob = base64.b64encode(rng.randbytes(spec['thumbnail_kb'] * 768)).decode('ascii')
+            out.write("  <thumbnails>\n")
+            for w in range(spec['worksheets']):
+                out.write(f"    <thumbnail{_attrs(height=192, name=f'Sheet {w}', width=192)}>\n      {blob}\n    </thumbnail>\n")
+            out.write("  </thumbnails>\n")
+        out.write("</workbook>\n")
+    return spec
+
+def write_twbx(twb_path, twbx_path):
+    """Packages a .twb into a .twbx next to a small placeholder extract."""
+    with zipfile.ZipFile(twbx_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(twb_path, os.path.basename(twb_path))
+        archive.writestr('Data/Extracts/placeholder.hyper', b'')
+    return twbx_path
+
+def corpus_path(output_dir, worksheets):
+    return os.path.join(output_dir, f"synthetic_{worksheets}ws.twb")
+
+def spec_path(twb_path):
+    """Spec file written next to a corpus workbook: synthetic_10ws.twb -> synthetic_10ws.spec.json."""
+    return os.path.splitext(twb_path)[0] + ".spec.json"
+
+def corpus_spec(worksheets, seed=0, **counts):
+    """Everything that decides the content of the corpus file for a worksheet count."""
+    scaled = dict(counts)
+    scaled.setdefault('dashboards', max(1, worksheets // 10))
+    spec = resolve_spec(worksheets=worksheets, **scaled)
+    return dict(spec, seed=seed, generator_version=GENERATOR_VERSION)
+
+def corpus_is_current(twb_path, spec):
+    """True when twb_path exists and its spec file records exactly `spec`."""
+    if not os.path.exists(twb_path):
+        return False
+    try:
+        with open(spec_path(twb_path), 'r', encoding='utf-8') as f:
+            return json.load(f) == spec
+    except (OSError, ValueError):
+        return False
+
+def generate_corpus(output_dir, worksheet_counts=(10, 100, 1000, 10000), package=False, seed=0, **counts):
+    """Generates one workbook per worksheet count, scaling dashboards and zones along with it.
+
+    The spec of each workbook is saved next to it so callers can tell a stale corpus apart.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for worksheets in worksheet_counts:
+        spec = corpus_spec(worksheets, seed=seed, **counts)
+        twb_path = corpus_path(output_dir, worksheets)
+        write_workbook(twb_path, seed=seed, **{name: spec[name] for name in DEFAULT_SPEC})
+        with open(spec_path(twb_path), 'w', encoding='utf-8') as f:
+            json.dump(spec, f, indent=2)
+        if package:
+            twb_path = write_twbx(twb_path, twb_path + 'x')
+        paths.append(twb_path)
+        print(f"✅ Generated {twb_path} ({os.path.getsize(twb_path) / 1024 / 1024:.1f} MB)")
+    return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Tableau workbooks for parser benchmarks.")
+    parser.add_argument("--output", default=os.path.join("output", "synthetic"), help="Folder for generated files")
+    parser.add_argument("--worksheets", default="10,100,1000,10000", help="Comma separated worksheet counts, one file each")
+    for name, default in DEFAULT_SPEC.items():
+        if name not in ('worksheets', 'dashboards'):
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, default=default, help=f"default: {default}")
+    parser.add_argument("--dashboards", type=int, default=None, help="default: one per 10 worksheets")
+    parser.add_argument("--twbx", action="store_true", help="Also package each workbook as .twbx")
+    parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    counts = {name: getattr(args, name) for name in DEFAULT_SPEC if name not in ('worksheets', 'dashboards')}
+    if args.dashboards is not None:
+        counts['dashboards'] = args.dashboards
+    generate_corpus(args.output, [int(n) for n in args.worksheets.split(',')], package=args.twbx, seed=args.seed, **counts)
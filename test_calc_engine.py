@@ -0,0 +1,135 @@
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from calc_engine import FormulaError, compile_calculations, evaluate, parse_formula
+
+@pytest.fixture
+def orders():
+    return pd.DataFrame({
+        'Sales': [100.0, 50.0, None, 10.0],
+        'Region': ['East', 'West', 'East', None],
+        'Profit': [10, -5, 3, 0],
+    })
+
+def values(formula, frame):
+    return evaluate(parse_formula(formula), frame).tolist()
+
+def test_iif_null_test_takes_unknown_branch(orders):
+    assert values("IIF([Sales] > 60, 'big', 'small', 'unknown')", orders) == ['big', 'small', 'unknown', 'small']
+    assert pd.isna(values("IIF([Sales] > 60, 'big', 'small')", orders)[2])
+
+def test_if_elseif_first_match_wins(orders):
+    formula = "IF [Profit] > 0 THEN 'gain' ELSEIF [Profit] < 0 THEN 'loss' ELSE 'flat' END"
+    assert values(formula, orders) == ['gain', 'loss', 'gain', 'flat']
+
+def test_case_unmatched_and_null_take_else(orders):
+    formula = "CASE [Region] WHEN 'East' THEN 1 WHEN 'West' THEN 2 ELSE 0 END"
+    assert values(formula, orders) == [1, 2, 1, 0]
+
+def test_null_functions(orders):
+    assert values("ISNULL([Sales])", orders) == [False, False, True, False]
+    assert values("ZN([Sales])", orders) == [100.0, 50.0, 0.0, 10.0]
+    assert values("IFNULL([Region], 'n/a')", orders) == ['East', 'West', 'East', 'n/a']
+
+def test_logic_with_nulls_is_three_valued(orders):
+    assert values("[Sales] > 60 AND [Profit] > 0", orders)[:2] == [True, False]
+    assert pd.isna(values("[Sales] > 60 AND [Profit] > 0", orders)[2])
+    assert values("[Sales] > 60 AND [Profit] > 0", orders)[3] is False
+    assert pd.isna(values("NOT ([Sales] > 60)", orders)[2])
+
+def test_division_by_zero_is_null(orders):
+    result = values("[Sales] / [Profit]", orders)
+    assert result[:2] == [10.0, -10.0]
+    assert pd.isna(result[3])
+
+def test_plus_concatenates_text_and_propagates_null(orders):
+    result = values("[Region] + '-' + STR([Profit])", orders)
+    assert result[:3] == ['East-10', 'West--5', 'East-3']
+    assert pd.isna(result[3])
+
+def test_plus_adds_decimal_columns():
+    frame = pd.DataFrame({'Sales': [Decimal('1.5'), Decimal('2.5')], 'Profit': [Decimal('1'), Decimal('2')]})
+    assert values("[Sales] + [Profit]", frame) == [2.5, 4.5]
+
+def test_plus_on_all_null_chunk_stays_numeric():
+    frame = pd.DataFrame({'Discount': pd.Series([None, None], dtype=object), 'Sales': [1.0, 2.0]})
+    assert all(pd.isna(value) for value in values("[Discount] + [Sales]", frame))
+
+def test_unknown_field_raises(orders):
+    with pytest.raises(FormulaError):
+        values("[Quantity] * 2", orders)
+
+def test_compile_calculations_orders_dependencies_and_skips_missing_fields(orders):
+    calculations = {
+        '[Calculation_2]': {'field_name': 'Double Margin', 'formula': '[Calculation_1] * 2'},
+        '[Calculation_1]': {'field_name': 'Margin', 'formula': '[Profit] / [Sales]'},
+        '[Calculation_3]': {'field_name': 'Bump', 'formula': '[Quantity] + 1'},
+    }
+    calculated, skipped = compile_calculations(calculations, orders.columns)
+    assert calculated.names == ['Margin', 'Double Margin']
+    assert skipped == {'[Calculation_3]': 'reads [Quantity], not in this table'}
+    result = calculated(orders)
+    assert result['Margin'].tolist()[:2] == [0.1, -0.1]
+    assert result['Double Margin'].tolist()[:2] == [0.2, -0.2]
+    assert pd.isna(result['Double Margin'][2])
+
+def test_modulo_keeps_dividend_sign_and_zero_is_null(orders):
+    result = values("[Profit] % 3", orders)
+    assert result[:3] == [1, -2, 0]
+    assert all(pd.isna(value) for value in values("[Profit] % 0", orders))
+
+def test_round_halves_away_from_zero():
+    frame = pd.DataFrame({'Sales': [2.5, -2.5, 1.25, None]})
+    assert values("ROUND([Sales])", frame)[:3] == [3.0, -3.0, 1.0]
+    assert values("ROUND([Sales], 1)", frame)[:3] == [2.5, -2.5, 1.3]
+
+def test_date_minus_date_is_days():
+    frame = pd.DataFrame({'Ship Date': pd.to_datetime(['2024-01-10', '2024-03-01', None]),
+                          'Order Date': pd.to_datetime(['2024-01-01', '2024-02-01', '2024-01-01'])})
+    result = values("[Ship Date] - [Order Date]", frame)
+    assert result[:2] == [9, 29]
+    assert pd.isna(result[2])
+
+def test_div_truncates_toward_zero_and_zero_is_null():
+    frame = pd.DataFrame({'Quantity': [-7, 7, 5], 'Packs': [2, 2, 0]})
+    result = values("DIV([Quantity], [Packs])", frame)
+    assert result[:2] == [-3, 3]
+    assert pd.isna(result[2])
+
+def test_failing_calculation_is_null_and_others_still_compute(orders):
+    orders = orders.assign(**{'Order Date': pd.to_datetime(['2024-01-01'] * 4)})
+    calculations = {
+        '[Calculation_1]': {'field_name': 'Week', 'formula': "DATEPART('iso-week', [Order Date])"},
+        '[Calculation_2]': {'field_name': 'Double Sales', 'formula': '[Sales] * 2'},
+    }
+    calculated, skipped = compile_calculations(calculations, orders.columns)
+    assert skipped == {}
+    result = calculated(orders)
+    assert result['Week'].isna().all()
+    assert result['Double Sales'].tolist()[:2] == [200.0, 100.0]
+    assert list(calculated.failed) == ['[Calculation_1]']
+
+def test_two_argument_min_max_are_null_with_a_null_side(orders):
+    assert values("MIN([Sales], [Profit])", orders)[:2] == [10, -5]
+    assert pd.isna(values("MAX([Sales], [Profit])", orders)[2])
+
+def test_compile_calculations_keeps_to_the_tables_datasource(orders):
+    calculations = {
+        '[Calculation_1]': {'field_name': 'Orders Margin', 'formula': '[Profit] / [Sales]', 'datasource': 'federated.orders'},
+        '[Calculation_2]': {'field_name': 'Returns Margin', 'formula': '[Profit] / [Sales]', 'datasource': 'federated.returns'},
+    }
+    calculated, _ = compile_calculations(calculations, orders.columns, datasource='federated.orders')
+    assert calculated.names == ['Orders Margin']
+
+def test_a_reference_cycle_skips_only_what_it_reaches(orders):
+    calculations = {
+        '[Calculation_1]': {'field_name': 'A', 'formula': '[Calculation_2] + 1'},
+        '[Calculation_2]': {'field_name': 'B', 'formula': '[Calculation_1] + 1'},
+        '[Calculation_3]': {'field_name': 'C', 'formula': '[Calculation_1] * 2'},
+        '[Calculation_4]': {'field_name': 'Double Sales', 'formula': '[Sales] * 2'},
+    }
+    calculated, skipped = compile_calculations(calculations, orders.columns)
+    assert calculated.names == ['Double Sales']
+    assert sorted(skipped) == ['[Calculation_1]', '[Calculation_2]', '[Calculation_3]']
@@ -0,0 +1,140 @@
+import datetime
+import math
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from calc_engine import FormulaError, compile_calculations, evaluate, parse_formula
+from calc_sql import DATE, NUMBER, TEXT, SqlTranslator, push_down_calculations
+
+FIELDS = {
+    '[Sales]': ('"Sales"', NUMBER),
+    '[Profit]': ('"Profit"', NUMBER),
+    '[Region]': ('"Region"', TEXT),
+    '[Order Date]': ('"Order Date"', DATE),
+}
+
+def translate(formula):
+    return SqlTranslator(FIELDS).visit(parse_formula(formula))
+
+def test_division_casts_and_guards_zero():
+    assert translate("[Sales] / [Profit]") == ('(CAST("Sales" AS DOUBLE PRECISION) / NULLIF("Profit", 0))', NUMBER)
+
+def test_text_plus_is_concatenation():
+    assert translate("[Region] + '-' + [Region]") == ('(("Region" || \'-\') || "Region")', TEXT)
+
+def test_iif_without_unknown_branch_is_null():
+    sql, kind = translate("IIF([Sales] > 60, 'big', 'small')")
+    assert sql == "(CASE WHEN (\"Sales\" > 60) THEN 'big' WHEN NOT (\"Sales\" > 60) THEN 'small' ELSE NULL END)"
+    assert kind == TEXT
+
+def test_div_truncates():
+    assert translate("DIV([Sales], [Profit])")[0] == 'TRUNC(CAST("Sales" AS DOUBLE PRECISION) / NULLIF("Profit", 0))'
+
+def test_two_argument_min_is_null_with_a_null_side():
+    assert translate("MIN([Sales], [Profit])")[0] == \
+        '(CASE WHEN "Sales" IS NULL OR "Profit" IS NULL THEN NULL ELSE LEAST("Sales", "Profit") END)'
+
+def test_weekday_counts_sunday_as_one():
+    assert translate("DATEPART('weekday', [Order Date])")[0] == '(CAST(EXTRACT(DOW FROM "Order Date") AS BIGINT) + 1)'
+
+@pytest.mark.parametrize('formula', [
+    "[Region] + 1",
+    "STR([Sales])",
+    "DATEPART('week', [Order Date])",
+    "IIF([Sales] > 1, 'a', 2)",
+])
+def test_untranslatable_formulas_raise(formula):
+    with pytest.raises(FormulaError):
+        translate(formula)
+
+# --- SQL vs pandas parity ----------------------------------------------------------------
+
+ORDER_ROWS = [
+    [1, 100.0, 10, 'East', datetime.datetime(2024, 1, 31, 8, 30)],
+    [2, 50.0, -5, 'West', datetime.datetime(2024, 3, 3)],
+    [3, None, 3, 'East', datetime.datetime(2023, 12, 24, 23, 59)],
+    [4, 2.5, 0, None, None],
+    [5, -7.0, -7, 'West', datetime.datetime(2024, 2, 29)],
+]
+
+@pytest.fixture(scope='module')
+def orders(tmp_path_factory):
+    """(connection, table definition) of ORDER_ROWS in a scratch .hyper file."""
+    hyperapi = pytest.importorskip("tableauhyperapi")
+    definition = hyperapi.TableDefinition(hyperapi.TableName('Orders'), [
+        hyperapi.TableDefinition.Column('Row', hyperapi.SqlType.big_int()),
+        hyperapi.TableDefinition.Column('Sales', hyperapi.SqlType.double()),
+        hyperapi.TableDefinition.Column('Profit', hyperapi.SqlType.big_int()),
+        hyperapi.TableDefinition.Column('Region', hyperapi.SqlType.text()),
+        hyperapi.TableDefinition.Column('Order Date', hyperapi.SqlType.timestamp()),
+    ])
+    database = str(tmp_path_factory.mktemp('calc_sql') / 'orders.hyper')
+    with hyperapi.HyperProcess(telemetry=hyperapi.Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU) as process:
+        with hyperapi.Connection(process.endpoint, database, hyperapi.CreateMode.CREATE_AND_REPLACE) as connection:
+            connection.catalog.create_table(definition)
+            with hyperapi.Inserter(connection, definition) as inserter:
+                inserter.add_rows(ORDER_ROWS)
+                inserter.execute()
+            yield connection, definition
+
+def plain(value):
+    """One Python value per cell, so Hyper and pandas results compare directly."""
+    if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if hasattr(value, 'to_datetime'):
+        return value.to_datetime()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (float, Decimal)):
+        # Hyper and NumPy may differ in the last bits of a double
+        return round(float(value), 9)
+    return value
+
+@pytest.mark.parametrize('formula', [
+    "[Sales] / [Profit]",
+    "[Profit] % 3",
+    "DIV([Profit], 2)",
+    "DIV([Sales], [Profit])",
+    "MIN([Sales], [Profit])",
+    "MAX([Region], 'F')",
+    "ROUND([Sales] / 4, 1)",
+    "INT([Sales] / 3)",
+    "ZN([Sales]) + ABS([Profit])",
+    "IIF([Sales] > 60, 'big', 'small', 'unknown')",
+    "IF [Profit] > 0 THEN 'gain' ELSEIF [Profit] < 0 THEN 'loss' ELSE 'flat' END",
+    "CASE [Region] WHEN 'East' THEN 1 WHEN 'West' THEN 2 ELSE 0 END",
+    "IFNULL([Region], 'n/a')",
+    "ISNULL([Sales])",
+    "[Region] + '-' + UPPER([Region])",
+    "LEFT([Region], 2) + RIGHT([Region], 1)",
+    "MID([Region], 2, 2)",
+    "LEN([Region])",
+    "CONTAINS([Region], 'as')",
+    "DATEPART('month', [Order Date])",
+    "DATEPART('weekday', [Order Date])",
+    "DATETRUNC('month', [Order Date])",
+    "DATEADD('month', 1, [Order Date])",
+    "DATEDIFF('day', DATETRUNC('year', [Order Date]), [Order Date])",
+    "YEAR([Order Date]) * 100 + MONTH([Order Date])",
+])
+def test_sql_matches_pandas(orders, formula):
+    from hyper_export import column_names, rows_to_frame
+    connection, definition = orders
+    calculated, skipped = compile_calculations({'[Calculation_1]': {'field_name': 'Result', 'formula': formula}},
+                                               column_names(definition))
+    assert skipped == {}
+    expressions, remaining, fallbacks = push_down_calculations(connection, definition.table_name, calculated)
+    assert fallbacks == {} and not remaining
+    [(_, sql)] = expressions
+
+    rows = connection.execute_list_query(f'SELECT {sql} FROM {definition.table_name} ORDER BY "Row"')
+    frame = rows_to_frame(connection.execute_list_query(f'SELECT * FROM {definition.table_name} ORDER BY "Row"'),
+                          definition)
+    in_hyper = [plain(row[0]) for row in rows]
+    in_pandas = [plain(value) for value in evaluate(parse_formula(formula), frame)]
+    assert in_hyper == in_pandas
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from lod_engine import LodEngine, compile_lod_calculations
+
+@pytest.fixture
+def orders():
+    return pd.DataFrame({
+        'Region': ['East', 'East', 'West', 'West', 'West'],
+        'Category': ['A', 'B', 'A', 'A', 'B'],
+        'Sales': [10, 20, 5, 15, 30],
+    })
+
+def compile_all(frame, **formulas):
+    calculations = {f"[{caption}]": {'field_name': caption, 'formula': formula} for caption, formula in formulas.items()}
+    compiled, skipped = compile_lod_calculations(calculations, frame.columns)
+    assert skipped == {}
+    return compiled
+
+def view(frame, dimensions, addressing=None, **formulas):
+    engine = LodEngine(compile_all(frame, **formulas), dimensions=dimensions, addressing=addressing)
+    return engine.run(lambda: [frame.iloc[:2], frame.iloc[2:]])
+
+def test_fixed_is_row_level(orders):
+    engine = LodEngine(compile_all(orders, RegionSales="{FIXED [Region] : SUM([Sales])}",
+                                   Share="[Sales] / {FIXED [Region] : SUM([Sales])}",
+                                   Total="{FIXED : SUM([Sales])}"))
+    engine.run(orders)
+    result = engine.transform(orders)
+    assert result['RegionSales'].tolist() == [30, 30, 50, 50, 50]
+    assert result['Share'].tolist() == pytest.approx([1 / 3, 2 / 3, 0.1, 0.3, 0.6])
+    assert result['Total'].tolist() == [80] * 5
+
+def test_row_level_formulas_are_left_to_calc_engine(orders):
+    _, skipped = compile_lod_calculations({'[Double]': {'field_name': 'Double', 'formula': '[Sales] * 2'}}, orders.columns)
+    assert skipped == {'[Double]': 'row-level; computed by calc_engine'}
+
+def test_include_aggregates_per_included_group(orders):
+    result = view(orders, ['Region'], AvgCategory="AVG({INCLUDE [Category] : SUM([Sales])})",
+                  MaxCategory="MAX({INCLUDE [Category] : SUM([Sales])})")
+    assert result.to_dict('list') == {'Region': ['East', 'West'], 'AvgCategory': [15.0, 25.0], 'MaxCategory': [20, 30]}
+
+def test_exclude_reaches_the_coarser_level(orders):
+    result = view(orders, ['Region', 'Category'], Share="SUM([Sales]) / MIN({EXCLUDE [Category] : SUM([Sales])})")
+    assert result['Share'].tolist() == pytest.approx([1 / 3, 2 / 3, 0.4, 0.6])
+
+def test_table_calculations_restart_per_partition(orders):
+    result = view(orders, ['Region', 'Category'], addressing=['Category'],
+                  Running="RUNNING_SUM(SUM([Sales]))",
+                  Average="WINDOW_AVG(SUM([Sales]))",
+                  Moving="WINDOW_SUM(SUM([Sales]), -1, 0)",
+                  Rank="RANK(SUM([Sales]))",
+                  Previous="LOOKUP(SUM([Sales]), -1)",
+                  Index="INDEX()",
+                  Share="SUM([Sales]) / TOTAL(SUM([Sales]))")
+    assert result['Running'].tolist() == [10, 30, 20, 50]
+    assert result['Average'].tolist() == [15.0, 15.0, 25.0, 25.0]
+    assert result['Moving'].tolist() == [10.0, 30.0, 20.0, 50.0]
+    assert result['Rank'].tolist() == [2, 1, 2, 1]
+    assert pd.isna(result['Previous'][0]) and pd.isna(result['Previous'][2])
+    assert result['Previous'][[1, 3]].tolist() == [10.0, 20.0]
+    assert result['Index'].tolist() == [1, 2, 1, 2]
+    assert result['Share'].tolist() == pytest.approx([1 / 3, 2 / 3, 0.4, 0.6])
+
+def test_table_calculations_span_the_view_without_partitions(orders):
+    result = view(orders, ['Region', 'Category'],
+                  Running="RUNNING_SUM(SUM([Sales]))",
+                  Rank="RANK(SUM([Sales]))",
+                  Dense="RANK_DENSE(SUM([Sales]))")
+    assert result['Running'].tolist() == [10, 30, 50, 80]
+    assert result['Rank'].tolist() == [4, 2, 2, 1]
+    assert result['Dense'].tolist() == [3, 2, 2, 1]
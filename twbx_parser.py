@@ -3,6 +3,9 @@ import zipfile
 import xml.etree.ElementTree as ET
 import pandas as pd
 import json
+from workbook_model import load_workbook
+from twbx_archive import TwbxArchive
+from parse_cache import ParseCache, file_digest
 
 def extract_twbx(twbx_file_path, extract_path):
     """Unzips a .twbx file to access the .twb file inside."""
@@ -22,67 +25,54 @@ def save_to_output_folder(data, file_name, output_folder):
     print(f"Saved: {file_path}")
     return file_path
 
-def extract_calculations_and_references(root, data_source_mapping):
+def extract_calculations_and_references(workbook, data_source_mapping):
     calculations_mapping = {}
     usage_mapping = []
 
     # Extract Calculations
-    datasources = root.findall('.//datasource')
-    for datasource in datasources:
-        ds_name = datasource.get('name')
-        columns = datasource.findall('.//column')
-        for column in columns:
-            field_name = column.get('caption') or column.get('name')
-            tableau_generated_name = column.get('name')
-            calculation = column.find('.//calculation')
-            formula = calculation.get('formula') if calculation is not None else None
-
-            # Map calculations to formulas and readable field names
-            if 'calculation' in tableau_generated_name.lower():
-                calculations_mapping[tableau_generated_name] = {
-                    'field_name': field_name,
-                    'formula': formula,
-                    'data_source': data_source_mapping.get(ds_name, ds_name)
+    for datasource in workbook.datasources.values():
+        for column in datasource.columns.values():
+            # Map calculations to formulas and readable field names; a column is calculated when
+            # it carries a <calculation> with a formula, whatever its name (renamed or copied calcs
+            # included). Parameters, bins and groups also carry one but are not calculations.
+            if column.formula and not column.is_parameter:
+                calculations_mapping[column.name] = {
+                    'field_name': column.caption or column.name,
+                    'formula': column.formula,
+                    'data_source': data_source_mapping.get(datasource.name, datasource.name),
+                    'datasource': datasource.name
                 }
 
     # Cross-reference these calculations in worksheets and dashboards
-    worksheets = root.findall('.//worksheet')
-    for worksheet in worksheets:
-        ws_name = worksheet.get('name')
-        columns_in_use = worksheet.findall('.//column')
-        for col in columns_in_use:
-            col_name = col.get('name')
+    for worksheet in workbook.worksheets.values():
+        for col_name in worksheet.columns:
             if col_name in calculations_mapping:
                 usage_mapping.append({
-                    'worksheet': ws_name,
+                    'worksheet': worksheet.name,
                     'calculation': col_name,
                     'field_name': calculations_mapping[col_name]['field_name'],
-                    'data_source': calculations_mapping[col_name]['data_source']
+                    'data_source': calculations_mapping[col_name]['data_source'],
+                    'datasource': calculations_mapping[col_name]['datasource']
                 })
 
     return calculations_mapping, usage_mapping
 
-def extract_references_and_links(root):
+def extract_references_and_links(workbook):
     reference_data = []
     data_source_mapping = {}
 
     # Extract references to external files, data connections, and cross-file relationships
-    datasources = root.findall('.//datasource')
-    for datasource in datasources:
-        ds_name = datasource.get('name')
-        ds_caption = datasource.get('caption') or ds_name
-
-        connections = datasource.findall('.//connection')
-        for connection in connections:
+    for datasource in workbook.datasources.values():
+        for connection in datasource.connections:
             db_class = connection.get('class')
             db_name = connection.get('dbname') or connection.get('server') or 'N/A'
             ext_ref = connection.get('filename')  # Reference to external files (e.g., tde, hyper)
 
             if ext_ref:
                 csv_name = os.path.splitext(os.path.basename(ext_ref))[0]
-                data_source_mapping[ds_name] = csv_name
+                data_source_mapping[datasource.name] = csv_name
                 reference_data.append({
-                    'Data Source': ds_caption,
+                    'Data Source': datasource.caption,
                     'Connection Type': db_class,
                     'Database Name': db_name,
                     'External Reference': ext_ref
@@ -90,28 +80,17 @@ def extract_references_and_links(root):
 
     return reference_data, data_source_mapping
 
-def extract_visuals_and_layouts(root):
+def extract_visuals_and_layouts(workbook):
     visual_data = []
 
     # Extract Worksheets and their details
-    worksheets = root.findall('.//worksheet')
-    for worksheet in worksheets:
-        ws_name = worksheet.get('name')
-
-        # Initialize lists for rows, columns, and filters
-        rows = [row.text for row in worksheet.findall('.//rows') if row.text]
-        columns = [col.text for col in worksheet.findall('.//cols') if col.text]
-        filters = [filt.get('column') for filt in worksheet.findall('.//filter') if filt.get('column')]
-
-        # Process <panes> for <encodings>
-        panes = worksheet.findall('.//pane')
-        for pane in panes:
-            encodings = pane.find('.//encodings')
-            if encodings is not None:
-                for encoding in encodings:
-                    column = encoding.get('column')
-                    if column:
-                        columns.append(column)
+    for worksheet in workbook.worksheets.values():
+        rows = [worksheet.rows] if worksheet.rows else []
+        columns = [worksheet.cols] if worksheet.cols else []
+
+        # Columns placed through the panes' <encodings>
+        for pane in worksheet.panes:
+            columns.extend(pane.encoded_columns)
 
         # Deduplicate columns
         columns = list(set(columns))
@@ -119,29 +98,19 @@ def extract_visuals_and_layouts(root):
         # Append the worksheet details to the visual data
         visual_data.append({
             'Type': 'Worksheet',
-            'Source': ws_name,
+            'Source': worksheet.name,
             'Rows': ', '.join(rows),
             'Columns': ', '.join(columns),
-            'Filters': ', '.join(filters)
+            'Filters': ', '.join(worksheet.filters)
         })
 
     # Extract Dashboards
-    dashboards = root.findall('.//dashboard')
-    for dashboard in dashboards:
-        db_name = dashboard.get('name')
-        worksheets_in_dashboard = set()
-        zones = dashboard.findall('.//zone')
-        for zone in zones:
-            view = zone.find('.//view')
-            if view is not None:
-                worksheet_name = view.get('name')
-                if worksheet_name:
-                    worksheets_in_dashboard.add(worksheet_name)
-        worksheet_list = ', '.join(worksheets_in_dashboard)
+    for dashboard in workbook.dashboards.values():
+        worksheets_in_dashboard = {zone.view for zone in dashboard.zones if zone.view}
         visual_data.append({
             'Type': 'Dashboard',
-            'Source': db_name,
-            'Worksheets': worksheet_list,
+            'Source': dashboard.name,
+            'Worksheets': ', '.join(worksheets_in_dashboard),
             'Rows': '',
             'Columns': '',
             'Filters': ''
@@ -149,19 +118,204 @@ def extract_visuals_and_layouts(root):
 
     return visual_data
 
-def parse_workbook(twb_file_path):
-    """Parses the .twb file to extract calculations, visuals, and external file references."""
-    tree = ET.parse(twb_file_path)
-    root = tree.getroot()
+# Subtrees that never feed the extractors but can make up most of a large .twb
+STREAMING_SKIP_TAGS = {'thumbnails'}
+
+def parse_workbook_streaming(twb_source):
+    """Single-pass iterparse version of parse_workbook with bounded memory.
+
+    Produces the same calculations, usage, references and visuals as parse_workbook (which reads
+    them from workbook_model), but clears every element once it has been consumed and ignores
+    STREAMING_SKIP_TAGS. `twb_source` may be a path or a binary file object.
+    """
+    # One slot per top-level <datasource> in document order, like Workbook.datasources
+    datasource_slots = []
+    usage_columns = []
+    worksheet_visuals = []
+    dashboard_visuals = []
+
+    stack = []
+    datasource = None
+    column = None
+    worksheet = None
+    pane = None
+    encodings = None
+    dashboard = None
+    zone_stack = []
+    skip_depth = 0
+
+    for event, elem in ET.iterparse(twb_source, events=('start', 'end')):
+        tag = elem.tag
+
+        if event == 'start':
+            parent = stack[-1] if stack else None
+            stack.append(elem)
+            if skip_depth or tag in STREAMING_SKIP_TAGS:
+                skip_depth += 1
+                continue
+
+            if tag == 'datasource' and len(stack) == 3 and parent.tag == 'datasources':
+                datasource = {'elem': elem, 'name': elem.get('name'), 'connections': [], 'columns': []}
+                datasource['caption'] = elem.get('caption') or datasource['name']
+                datasource_slots.append(datasource)
+            elif tag == 'connection' and datasource is not None:
+                datasource['connections'].append(dict(elem.attrib))
+            elif tag == 'column':
+                col_name = elem.get('name')
+                if datasource is not None and parent is datasource['elem']:
+                    # Formula of the column's first <calculation> child, filled in below
+                    column = {'elem': elem, 'name': col_name, 'field_name': elem.get('caption') or col_name,
+                              'formula': None, 'parameter': elem.get('param-domain-type') is not None}
+                    datasource['columns'].append(column)
+                if worksheet is not None:
+                    usage_columns.append((worksheet['name'], col_name))
+            elif tag == 'calculation' and column is not None and parent is column['elem']:
+                if 'found' not in column:
+                    column['found'] = True
+                    column['formula'] = elem.get('formula')
+            elif tag == 'worksheet':
+                worksheet = {'name': elem.get('name'), 'table': None, 'rows': None, 'cols': None,
+                             'columns': [], 'filters': []}
+            elif tag == 'table' and worksheet is not None and worksheet['table'] is None:
+                worksheet['table'] = elem
+            elif tag == 'filter' and worksheet is not None:
+                if elem.get('column'):
+                    worksheet['filters'].append(elem.get('column'))
+            elif tag == 'pane' and worksheet is not None:
+                pane = elem
+            elif tag == 'encodings' and pane is not None and parent is pane and encodings is None:
+                encodings = elem
+            elif tag == 'dashboard':
+                dashboard = {'name': elem.get('name'), 'worksheets': set()}
+            elif tag == 'zone' and dashboard is not None:
+                zone_stack.append({'view': None})
+            elif tag == 'view' and zone_stack:
+                # The first view below each enclosing zone
+                for zone in zone_stack:
+                    if zone['view'] is None:
+                        zone['view'] = elem.get('name')
+
+            if encodings is not None and parent is encodings:
+                if elem.get('column'):
+                    worksheet['columns'].append(elem.get('column'))
+            continue
+
+        stack.pop()
+        if skip_depth:
+            skip_depth -= 1
+        elif datasource is not None and elem is datasource['elem']:
+            del datasource['elem']
+            datasource = None
+        elif column is not None and elem is column['elem']:
+            del column['elem']
+            column = None
+        elif tag in ('rows', 'cols') and worksheet is not None:
+            # Shelf text of the first <table>'s own <rows> and <cols>
+            if stack and stack[-1] is worksheet['table'] and worksheet[tag] is None:
+                worksheet[tag] = elem.text or ""
+        elif tag == 'pane':
+            pane = None
+            encodings = None
+        elif tag == 'worksheet' and worksheet is not None:
+            columns = [worksheet['cols']] if worksheet['cols'] else []
+            worksheet_visuals.append({
+                'Type': 'Worksheet',
+                'Source': worksheet['name'],
+                'Rows': worksheet['rows'] or '',
+                'Columns': ', '.join(list(set(columns + worksheet['columns']))),
+                'Filters': ', '.join(worksheet['filters'])
+            })
+            worksheet = None
+        elif tag == 'zone' and zone_stack:
+            zone = zone_stack.pop()
+            if zone['view']:
+                dashboard['worksheets'].add(zone['view'])
+        elif tag == 'dashboard' and dashboard is not None:
+            dashboard_visuals.append({
+                'Type': 'Dashboard',
+                'Source': dashboard['name'],
+                'Worksheets': ', '.join(dashboard['worksheets']),
+                'Rows': '',
+                'Columns': '',
+                'Filters': ''
+            })
+            dashboard = None
+
+        # Everything has been captured by now; drop the element so memory stays flat
+        elem.clear()
+        if stack and len(stack[-1]) and stack[-1][-1] is elem:
+            del stack[-1][-1]
+
+    references = []
+    data_source_mapping = {}
+    for slot in datasource_slots:
+        for connection in slot['connections']:
+            ext_ref = connection.get('filename')
+            if ext_ref:
+                data_source_mapping[slot['name']] = os.path.splitext(os.path.basename(ext_ref))[0]
+                references.append({
+                    'Data Source': slot['caption'],
+                    'Connection Type': connection.get('class'),
+                    'Database Name': connection.get('dbname') or connection.get('server') or 'N/A',
+                    'External Reference': ext_ref
+                })
+
+    calculations_mapping = {}
+    for slot in datasource_slots:
+        for column in slot['columns']:
+            if not column['formula'] or column['parameter']:
+                continue
+            calculations_mapping[column['name']] = {
+                'field_name': column['field_name'],
+                'formula': column['formula'],
+                'data_source': data_source_mapping.get(slot['name'], slot['name']),
+                'datasource': slot['name']
+            }
+
+    usage_mapping = [
+        {
+            'worksheet': ws_name,
+            'calculation': col_name,
+            'field_name': calculations_mapping[col_name]['field_name'],
+            'data_source': calculations_mapping[col_name]['data_source'],
+            'datasource': calculations_mapping[col_name]['datasource']
+        }
+        for ws_name, col_name in usage_columns
+        if col_name in calculations_mapping
+    ]
+
+    return calculations_mapping, usage_mapping, references, worksheet_visuals + dashboard_visuals
+
+def parse_workbook(twb_file_path, streaming=False, cache=None, digest=None):
+    """Parses the .twb file to extract calculations, visuals, and external file references.
+
+    With a ParseCache the results are looked up by the .twb content hash first; pass `digest`
+    when twb_file_path is a stream, since hashing would consume it.
+    """
+    if cache is not None:
+        if digest is None:
+            digest = file_digest(twb_file_path)
+        cached = cache.get(digest, 'workbook')
+        if cached is not None:
+            return tuple(cached)
+        result = parse_workbook(twb_file_path, streaming=streaming)
+        cache.put(digest, 'workbook', list(result))
+        return result
+
+    if streaming:
+        return parse_workbook_streaming(twb_file_path)
+
+    # The shared model the chart extractors read; lxml when installed, ElementTree otherwise
+    workbook = load_workbook(twb_file_path)
 
     # Extract external file references and data source mapping
-    references, data_source_mapping = extract_references_and_links(root)
+    references, data_source_mapping = extract_references_and_links(workbook)
 
     # Extract calculations and usage with data_source_mapping applied
-    calculations_mapping, usage_mapping = extract_calculations_and_references(root, data_source_mapping)
+    calculations_mapping, usage_mapping = extract_calculations_and_references(workbook, data_source_mapping)
 
     # Extract visuals and layout information
-    visuals = extract_visuals_and_layouts(root)
+    visuals = extract_visuals_and_layouts(workbook)
 
     return calculations_mapping, usage_mapping, references, visuals
 
@@ -179,46 +333,69 @@ def find_csv_or_hyper_files(extract_dir):
 
     return csv_files, hyper_files
 
-def extract_tableau_workbook(file_path, main_output_dir):
-    """Extract Tableau workbook data and save it to the main output folder."""
-    # DYNAMIC PATH: Get current script directory
+def preview_csv(csv_file, source):
+    """Reads the first rows of a CSV from a path or an open archive member."""
+    try:
+        df = pd.read_csv(source, nrows=3)
+        return {
+            'file': csv_file,
+            'preview': df.to_dict(orient='records')
+        }
+    except Exception as e:
+        print(f"⚠️ Error previewing CSV {csv_file}: {str(e)}")
+        return {
+            'file': csv_file,
+            'error': str(e)
+        }
+
+def extract_tableau_workbook(file_path, main_output_dir, streaming=False, cache=None):
+    """Extract Tableau workbook data and save it to the main output folder.
+
+    Set streaming=True to parse very large workbooks with parse_workbook_streaming,
+    and pass a ParseCache to skip parsing workbooks that have not changed.
+    Returns the extracted data that is written to tableau_extracted_data.json.
+
+    For a .twbx nothing is extracted, so 'csv_files' and 'hyper_files' list archive member
+    names (e.g. 'Data/Extracts/Orders.hyper'); use TwbxArchive.materialize() to get a file on
+    disk. For a .twb they remain paths found under the extract folder.
+    """
+    # DYNAMIC PATH: Default to the output folder next to this script
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_dir = os.path.join(script_dir, "output")
+    output_dir = main_output_dir or os.path.join(script_dir, "output")
     
     extract_dir = os.path.join(output_dir, "input_tableau_output")
     os.makedirs(extract_dir, exist_ok=True)
 
-    # Extract the .twb file from .twbx
+    # Read the .twb straight out of the .twbx; data files stay in the archive
     if file_path.endswith('.twbx'):
-        twb_file = extract_twbx(file_path, extract_dir)
+        with TwbxArchive(file_path, extract_dir) as archive:
+            if not archive.twb_name:
+                raise ValueError("No .twb file found in the .twbx package or invalid file path.")
+
+            # Parse the .twb file
+            digest = file_digest(archive.open_twb()) if cache is not None else None
+            with archive.open_twb() as twb_stream:
+                calculations, usage, references, visuals = parse_workbook(
+                    twb_stream, streaming=streaming, cache=cache, digest=digest)
+
+            # List CSV and Hyper members and preview CSVs without extracting them
+            csv_files = archive.members('.csv')
+            hyper_files = archive.members('.hyper')
+            csv_preview = []
+            for csv_file in csv_files:
+                with archive.open(csv_file) as csv_stream:
+                    csv_preview.append(preview_csv(csv_file, csv_stream))
     else:
         twb_file = file_path
+        if not os.path.isfile(twb_file):
+            raise ValueError("No .twb file found in the .twbx package or invalid file path.")
 
-    if not twb_file:
-        raise ValueError("No .twb file found in the .twbx package or invalid file path.")
-
-    # Parse the .twb file
-    calculations, usage, references, visuals = parse_workbook(twb_file)
+        # Parse the .twb file
+        calculations, usage, references, visuals = parse_workbook(twb_file, streaming=streaming, cache=cache)
 
-    # Find CSV and Hyper files
-    csv_files, hyper_files = find_csv_or_hyper_files(extract_dir)
-
-    # Create a CSV preview
-    csv_preview = []
-    if csv_files:
-        for csv_file in csv_files:
-            try:
-                df = pd.read_csv(csv_file, nrows=3)
-                csv_preview.append({
-                    'file': csv_file,
-                    'preview': df.to_dict(orient='records')
-                })
-            except Exception as e:
-                print(f"⚠️ Error previewing CSV {csv_file}: {str(e)}")
-                csv_preview.append({
-                    'file': csv_file,
-                    'error': str(e)
-                })
+        # Find CSV and Hyper files
+        csv_files, hyper_files = find_csv_or_hyper_files(extract_dir)
+        csv_preview = [preview_csv(csv_file, csv_file) for csv_file in csv_files]
 
     # Consolidate all extracted data
     extracted_data = {
@@ -235,6 +412,7 @@ def extract_tableau_workbook(file_path, main_output_dir):
     save_to_output_folder(extracted_data, 'tableau_extracted_data.json', output_dir)
 
     print(f"✅ Extraction completed. All data saved in: {output_dir}")
+    return extracted_data
 
 if __name__ == "__main__":
     # Ask the user for the .twbx/.twb file path
@@ -251,7 +429,9 @@ if __name__ == "__main__":
         output_dir = os.path.join(script_dir, "output")
 
         try:
-            # Extract Tableau workbook
-            extract_tableau_workbook(file_path, output_dir)
+            # Extract Tableau workbook, reusing cached parse results for unchanged files
+            cache = ParseCache()
+            extract_tableau_workbook(file_path, output_dir, cache=cache)
+            cache.report()
         except Exception as e:
             print(f"An error occurred during extraction: {e}")
\ No newline at end of file
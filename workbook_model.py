@@ -0,0 +1,224 @@
+from xml_backend import Lookups, parse
+
+# Compact, name-indexed view of a .twb shared by the chart extractors.
+# Parse a file once with load_workbook() and hand the Workbook to every extractor.
+
+def local_name(tag):
+    """Strips the XML namespace from a tag."""
+    return tag.split('}')[-1] if isinstance(tag, str) else None
+
+class Column:
+    __slots__ = ('name', 'caption', 'datatype', 'role', 'type', 'formula', 'param_domain_type')
+
+    def __init__(self, name, caption=None, datatype=None, role=None, type=None, formula=None,
+                 param_domain_type=None):
+        self.name = name
+        self.caption = caption
+        self.datatype = datatype
+        self.role = role
+        self.type = type
+        self.formula = formula
+        self.param_domain_type = param_domain_type  # set on parameters only
+
+    @property
+    def is_calculated(self):
+        return self.formula is not None
+
+    @property
+    def is_parameter(self):
+        return self.param_domain_type is not None
+
+class Datasource:
+    __slots__ = ('name', 'caption', 'connections', 'relations', 'columns')
+
+    def __init__(self, name, caption=None):
+        self.name = name
+        self.caption = caption or name
+        self.connections = []  # attribute dicts of every nested <connection>
+        self.relations = []    # table names from <relation>
+        self.columns = {}      # column name -> Column
+
+class Pane:
+    __slots__ = ('mark_class', 'mark_classes', 'encodings', 'encoded_columns', 'x_axis', 'y_axis',
+                 'boxplot_whisker_type')
+
+    def __init__(self):
+        self.mark_class = None            # class of the pane's own <mark>
+        self.mark_classes = []            # classes of every <mark> below the pane
+        self.encodings = None             # encoding tag -> column, None without <encodings>
+        self.encoded_columns = []         # column of every encoding, repeated tags included
+        self.x_axis = None
+        self.y_axis = None
+        self.boxplot_whisker_type = None  # set when the pane draws a box plot
+
+class Worksheet:
+    __slots__ = ('name', 'rows', 'cols', 'panes', 'filters', 'columns', 'dependencies')
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = ""     # shelf text of the first <table>
+        self.cols = ""
+        self.panes = []
+        self.filters = []       # column of every <filter> that names one
+        self.columns = []       # names of every <column> the worksheet depends on
+        self.dependencies = []  # (datasource name, column name) per <datasource-dependencies> column
+
+class Zone:
+    __slots__ = ('name', 'type', 'x', 'y', 'w', 'h', 'view')
+
+    def __init__(self, name, type, x, y, w, h, view=None):
+        self.name = name
+        self.type = type
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.view = view  # name of the first <view> below the zone
+
+class Dashboard:
+    __slots__ = ('name', 'zones')
+
+    def __init__(self, name):
+        self.name = name
+        self.zones = []  # every <zone> in document order, nested layouts flattened
+
+class Workbook:
+    __slots__ = ('source', 'datasources', 'worksheets', 'dashboards')
+
+    def __init__(self, source=None):
+        self.source = source
+        self.datasources = {}
+        self.worksheets = {}
+        self.dashboards = {}
+
+    def zones_for(self, worksheet_name):
+        """Yields (dashboard, zone) pairs that place the given worksheet."""
+        for dashboard in self.dashboards.values():
+            for zone in dashboard.zones:
+                if zone.name == worksheet_name:
+                    yield dashboard, zone
+
+def _build_pane(pane_elem, lookups):
+    pane = Pane()
+    pane.x_axis = pane_elem.get("x-axis-name")
+    pane.y_axis = pane_elem.get("y-axis-name")
+
+    # One walk over the direct children picks up the first <mark>, <encodings> and <reference-line>
+    seen = set()
+    for child in pane_elem:
+        tag = local_name(child.tag)
+        if tag in seen:
+            continue
+        if tag == "mark":
+            pane.mark_class = child.get("class")
+        elif tag == "encodings":
+            pane.encodings = {}
+            for encoding in child:
+                encoding_tag = local_name(encoding.tag)
+                if encoding_tag and encoding_tag not in pane.encodings:
+                    pane.encodings[encoding_tag] = encoding.get("column")
+                if encoding.get("column"):
+                    pane.encoded_columns.append(encoding.get("column"))
+        elif tag == "reference-line":
+            pane.boxplot_whisker_type = child.get("boxplot-whisker-type")
+        else:
+            continue
+        seen.add(tag)
+    pane.mark_classes = [m.get("class", "") for m in lookups.all('marks', pane_elem)]
+    return pane
+
+def _build_datasource(ds_elem, lookups):
+    datasource = Datasource(ds_elem.get("name"), ds_elem.get("caption"))
+    for connection in lookups.all('connections', ds_elem):
+        datasource.connections.append(dict(connection.attrib))
+    for relation in lookups.all('relations', ds_elem):
+        table_name = relation.get("name") or relation.get("table")
+        if table_name:
+            datasource.relations.append(table_name)
+    for col_elem in lookups.all('columns', ds_elem):
+        calculation = lookups.first('calculation', col_elem)
+        column = Column(
+            col_elem.get("name"),
+            caption=col_elem.get("caption"),
+            datatype=col_elem.get("datatype"),
+            role=col_elem.get("role"),
+            type=col_elem.get("type"),
+            formula=calculation.get("formula") if calculation is not None else None,
+            param_domain_type=col_elem.get("param-domain-type")
+        )
+        datasource.columns[column.name] = column
+    return datasource
+
+def _build_worksheet(ws_elem, lookups):
+    worksheet = Worksheet(ws_elem.get("name"))
+    table = lookups.first('table', ws_elem)
+    if table is not None:
+        prefix = "t:" if lookups.ns else ""
+        worksheet.rows = table.findtext(f"{prefix}rows", default="", namespaces=lookups.ns)
+        worksheet.cols = table.findtext(f"{prefix}cols", default="", namespaces=lookups.ns)
+    worksheet.panes = [_build_pane(p, lookups) for p in lookups.all('panes', ws_elem)]
+    worksheet.filters = [f.get("column") for f in lookups.all('filters', ws_elem) if f.get("column")]
+    worksheet.columns = [c.get("name") for c in lookups.all('dependencies', ws_elem)]
+    worksheet.dependencies = [
+        (deps.get("datasource"), c.get("name"))
+        for deps in lookups.all('datasource_dependencies', ws_elem)
+        for c in lookups.all('columns', deps)
+    ]
+    return worksheet
+
+def _build_dashboard(db_elem, lookups):
+    dashboard = Dashboard(db_elem.get("name"))
+    for zone in lookups.all('zones', db_elem):
+        view = lookups.first('views', zone)
+        dashboard.zones.append(Zone(
+            zone.get("name"),
+            zone.get("type"),
+            int(zone.get("x", 0)),
+            int(zone.get("y", 0)),
+            int(zone.get("w", 0)),
+            int(zone.get("h", 0)),
+            view=view.get("name") if view is not None else None
+        ))
+    return dashboard
+
+def build_workbook(root, source=None):
+    """Builds a Workbook from an already parsed <workbook> root element (lxml or ElementTree)."""
+    lookups = Lookups(root)
+    workbook = Workbook(source)
+
+    for ds_elem in lookups.all('datasources', root):
+        datasource = _build_datasource(ds_elem, lookups)
+        workbook.datasources[datasource.name] = datasource
+
+    for ws_elem in lookups.all('worksheets', root):
+        worksheet = _build_worksheet(ws_elem, lookups)
+        workbook.worksheets[worksheet.name] = worksheet
+
+    for db_elem in lookups.all('dashboards', root):
+        dashboard = _build_dashboard(db_elem, lookups)
+        workbook.dashboards[dashboard.name] = dashboard
+
+    return workbook
+
+def load_workbook(source, backend=None):
+    """Parses a .twb path or binary stream into a Workbook.
+
+    An existing Workbook is returned unchanged, so extractors can accept either.
+    The XML backend defaults to lxml when it is installed (see xml_backend).
+    """
+    if isinstance(source, Workbook):
+        return source
+    root = parse(source, backend)
+    return build_workbook(root, source if isinstance(source, str) else None)
+
+def workbook_to_dict(workbook):
+    """Plain-data view of a Workbook, handy for comparing backends or caching."""
+    def convert(value):
+        if hasattr(value, '__slots__'):
+            return {slot: convert(getattr(value, slot)) for slot in value.__slots__}
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [convert(item) for item in value]
+        return value
+    return convert(workbook)
@@ -0,0 +1,101 @@
+import xml.etree.ElementTree as ET
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # lxml is optional; ElementTree is always available
+    lxml_etree = None
+
+LXML = "lxml"
+ELEMENTTREE = "etree"
+
+def available_backends():
+    return [LXML, ELEMENTTREE] if lxml_etree is not None else [ELEMENTTREE]
+
+def resolve_backend(backend=None):
+    """Picks lxml when installed unless a backend is requested explicitly."""
+    if backend is None:
+        return LXML if lxml_etree is not None else ELEMENTTREE
+    if backend not in (LXML, ELEMENTTREE):
+        raise ValueError(f"Unknown XML backend '{backend}', expected one of {LXML}, {ELEMENTTREE}")
+    if backend == LXML and lxml_etree is None:
+        raise ValueError("The lxml backend was requested but lxml is not installed")
+    return backend
+
+def backend_of(root):
+    """Names the backend an already parsed element belongs to."""
+    if lxml_etree is not None and isinstance(root, lxml_etree._Element):
+        return LXML
+    return ELEMENTTREE
+
+def parse(source, backend=None):
+    """Parses a path or binary stream and returns the root element."""
+    if resolve_backend(backend) == LXML:
+        parser = lxml_etree.XMLParser(huge_tree=True, remove_comments=True, remove_pis=True)
+        return lxml_etree.parse(source, parser).getroot()
+    return ET.parse(source).getroot()
+
+def detect_namespace(root):
+    """Returns the (ns, prefix) pair used for find/findall on this document."""
+    if "}" in root.tag:
+        ns_uri = root.tag.split("}")[0].strip("{")
+        return {"t": ns_uri}, "t:"
+    return {}, ""
+
+# Lookup name -> path relative to its context element; "{p}" is the namespace prefix
+LOOKUP_PATHS = {
+    'datasources': "{p}datasources/{p}datasource",
+    'connections': ".//{p}connection",
+    'relations': ".//{p}relation",
+    'columns': "{p}column",
+    'calculation': "{p}calculation",
+    'worksheets': ".//{p}worksheet",
+    'table': ".//{p}table",
+    'panes': ".//{p}pane",
+    'filters': ".//{p}filter",
+    'marks': ".//{p}mark",
+    'dependencies': ".//{p}column",
+    'datasource_dependencies': ".//{p}datasource-dependencies",
+    'dashboards': ".//{p}dashboard",
+    'zones': ".//{p}zone",
+    'views': ".//{p}view",
+}
+
+class Lookups:
+    """Hot lookups for one document, compiled once per backend and namespace.
+
+    With lxml the descendant scans become precompiled XPath expressions; everything else
+    goes through find/findall with the namespace map resolved up front.
+    """
+
+    _compiled = {}
+
+    def __init__(self, root, backend=None):
+        self.backend = resolve_backend(backend) if backend else backend_of(root)
+        self.ns, prefix = detect_namespace(root)
+        key = (self.backend, self.ns.get("t"))
+        if key not in Lookups._compiled:
+            paths = {name: path.format(p=prefix) for name, path in LOOKUP_PATHS.items()}
+            if self.backend == LXML:
+                # Descendant scans pay off as XPath; direct-child steps are cheaper through find()
+                namespaces = self.ns or None
+                paths = {
+                    name: lxml_etree.XPath(path, namespaces=namespaces) if path.startswith(".//") else path
+                    for name, path in paths.items()
+                }
+            Lookups._compiled[key] = paths
+        self._lookups = Lookups._compiled[key]
+
+    def all(self, name, elem):
+        """Every element matching the lookup below `elem`, in document order."""
+        lookup = self._lookups[name]
+        if callable(lookup):
+            return lookup(elem)
+        return elem.findall(lookup, self.ns)
+
+    def first(self, name, elem):
+        """The first matching element or None."""
+        lookup = self._lookups[name]
+        if callable(lookup):
+            found = lookup(elem)
+            return found[0] if found else None
+        return elem.find(lookup, self.ns)